@@ -18,12 +18,129 @@ class Settings(BaseSettings):
     DB_USER: str = os.getenv("DB_USER", "root")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
     DB_NAME: str = os.getenv("DB_NAME", "stream_box")
+
+    # Réplicas de lectura: "host:puerto" separados por comas (vacío = todo al primario)
+    DB_REPLICAS: str = os.getenv("DB_REPLICAS", "")
+    DB_REPLICA_MAX_LAG_SECONDS: int = int(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+    DB_REPLICA_CHECK_SECONDS: int = int(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+    DB_STICKY_SECONDS: int = int(os.getenv("DB_STICKY_SECONDS", "5"))  # lecturas al primario tras escribir
+
+    # Plazos y admisión de consultas: cada petición tiene un plazo que limita la espera en
+    # cola y el tiempo de sus consultas; las que no caben se rechazan con 503
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))  # 0 = sin plazo
+    REQUEST_DEADLINES: str = os.getenv("REQUEST_DEADLINES", "/admin/users/import=300,/videos/batch=60")  # "prefijo=segundos"
+    DB_CONNECT_TIMEOUT_SECONDS: int = int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "5"))
+    DB_READ_TIMEOUT_SECONDS: int = int(os.getenv("DB_READ_TIMEOUT_SECONDS", "300"))  # tope del socket sin plazo
+    DB_WRITE_TIMEOUT_SECONDS: int = int(os.getenv("DB_WRITE_TIMEOUT_SECONDS", "60"))
+    # Límite inicial:máximo de consultas simultáneas por worker de cada clase de carga
+    DB_WORKLOAD_LIMITS: str = os.getenv("DB_WORKLOAD_LIMITS", "auth=8:32,public=16:64,write=8:32,admin=2:8,search=4:16")
+    DB_LIMIT_INITIAL: int = int(os.getenv("DB_LIMIT_INITIAL", "20"))  # clases sin límite en DB_WORKLOAD_LIMITS
+    DB_LIMIT_MIN: int = int(os.getenv("DB_LIMIT_MIN", "2"))
+    DB_LIMIT_MAX: int = int(os.getenv("DB_LIMIT_MAX", "200"))
+    DB_LIMIT_LATENCY_MS: float = float(os.getenv("DB_LIMIT_LATENCY_MS", "250"))  # más lentas = congestión
+    DB_LIMIT_BACKOFF: float = float(os.getenv("DB_LIMIT_BACKOFF", "0.9"))
     
     # Configuración de seguridad
     SECRET_KEY: str = os.getenv("SECRET_KEY", "tu_clave_secreta_aqui")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 100
     
+    # Configuración de búsqueda
+    SUGGEST_MAX_RESULTS: int = int(os.getenv("SUGGEST_MAX_RESULTS", "10"))
+    SUGGEST_SYNC_SECONDS: int = int(os.getenv("SUGGEST_SYNC_SECONDS", "30"))  # comprobar cambios de otros workers
+    SUGGEST_REFRESH_SECONDS: int = int(os.getenv("SUGGEST_REFRESH_SECONDS", "3600"))  # recarga completa periódica
+    
+    # Configuración de videos relacionados
+    RELATED_TOP_K: int = int(os.getenv("RELATED_TOP_K", "20"))
+    RELATED_CREATOR_BOOST: float = float(os.getenv("RELATED_CREATOR_BOOST", "0.15"))
+    RELATED_MAX_TAG_DF: float = float(os.getenv("RELATED_MAX_TAG_DF", "0.01"))
+    RELATED_MIN_DF_ABS: int = int(os.getenv("RELATED_MIN_DF_ABS", "500"))
+    RELATED_BATCH_SIZE: int = int(os.getenv("RELATED_BATCH_SIZE", "1024"))
+    RELATED_REFRESH_SECONDS: int = int(os.getenv("RELATED_REFRESH_SECONDS", "3600"))
+    RELATED_MIN_REBUILD_INTERVAL_SECONDS: int = int(os.getenv("RELATED_MIN_REBUILD_INTERVAL_SECONDS", "300"))
+    
+    # Configuración de detección de casi duplicados (MinHash + LSH en memoria)
+    DUPLICATE_NUM_PERM: int = int(os.getenv("DUPLICATE_NUM_PERM", "64"))
+    DUPLICATE_BANDS: int = int(os.getenv("DUPLICATE_BANDS", "8"))  # 8 bandas de 8 filas: umbral efectivo ~0.77
+    DUPLICATE_SHINGLE_SIZE: int = int(os.getenv("DUPLICATE_SHINGLE_SIZE", "5"))  # caracteres por shingle
+    DUPLICATE_THRESHOLD: float = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))  # similitud de Jaccard estimada
+    DUPLICATE_MAX_CANDIDATES: int = int(os.getenv("DUPLICATE_MAX_CANDIDATES", "16"))  # por banda al indexar
+    DUPLICATE_MAX_RECENT: int = int(os.getenv("DUPLICATE_MAX_RECENT", "50000"))  # reconstruir antes si se supera
+    DUPLICATE_CLUSTER_SAMPLE: int = int(os.getenv("DUPLICATE_CLUSTER_SAMPLE", "10"))  # videos mostrados por grupo
+    DUPLICATE_BATCH_SIZE: int = int(os.getenv("DUPLICATE_BATCH_SIZE", "4096"))
+    DUPLICATE_REFRESH_SECONDS: int = int(os.getenv("DUPLICATE_REFRESH_SECONDS", "3600"))
+    DUPLICATE_MIN_REBUILD_INTERVAL_SECONDS: int = int(os.getenv("DUPLICATE_MIN_REBUILD_INTERVAL_SECONDS", "300"))
+    
+    # Configuración de contadores de vistas (write-behind)
+    VIEW_COUNTER_SHARDS: int = int(os.getenv("VIEW_COUNTER_SHARDS", "16"))
+    VIEW_COUNTER_FLUSH_SECONDS: int = int(os.getenv("VIEW_COUNTER_FLUSH_SECONDS", "5"))
+    VIEW_COUNTER_FLUSH_THRESHOLD: int = int(os.getenv("VIEW_COUNTER_FLUSH_THRESHOLD", "5000"))
+    VIEW_COUNTER_BATCH_SIZE: int = int(os.getenv("VIEW_COUNTER_BATCH_SIZE", "500"))
+    
+    # Configuración de la cola de trabajos en segundo plano
+    BACKGROUND_QUEUE_MAXSIZE: int = int(os.getenv("BACKGROUND_QUEUE_MAXSIZE", "10000"))
+    BACKGROUND_QUEUE_WORKERS: int = int(os.getenv("BACKGROUND_QUEUE_WORKERS", "2"))
+    BACKGROUND_QUEUE_MAX_RETRIES: int = int(os.getenv("BACKGROUND_QUEUE_MAX_RETRIES", "3"))
+    BACKGROUND_QUEUE_BACKOFF_SECONDS: float = float(os.getenv("BACKGROUND_QUEUE_BACKOFF_SECONDS", "0.5"))
+    BACKGROUND_QUEUE_DRAIN_SECONDS: float = float(os.getenv("BACKGROUND_QUEUE_DRAIN_SECONDS", "10"))
+    
+    # Configuración de listas de administración
+    ADMIN_DEFAULT_PAGE_SIZE: int = int(os.getenv("ADMIN_DEFAULT_PAGE_SIZE", "50"))
+    ADMIN_MAX_PAGE_SIZE: int = int(os.getenv("ADMIN_MAX_PAGE_SIZE", "200"))
+    ADMIN_COUNT_CACHE_SECONDS: int = int(os.getenv("ADMIN_COUNT_CACHE_SECONDS", "30"))
+    ADMIN_COUNT_CACHE_MAX_ENTRIES: int = int(os.getenv("ADMIN_COUNT_CACHE_MAX_ENTRIES", "1024"))
+    ADMIN_EXACT_COUNT_THRESHOLD: int = int(os.getenv("ADMIN_EXACT_COUNT_THRESHOLD", "100000"))
+    
+    # Configuración de importación masiva de usuarios
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+    IMPORT_HASH_WORKERS: int = int(os.getenv("IMPORT_HASH_WORKERS", "0"))  # 0 = un proceso por núcleo
+    IMPORT_MAX_REPORTED_ERRORS: int = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+    
+    # Configuración de creación de videos por lotes
+    VIDEO_BATCH_MAX_ITEMS: int = int(os.getenv("VIDEO_BATCH_MAX_ITEMS", "1000"))
+    VIDEO_BATCH_CHUNK_SIZE: int = int(os.getenv("VIDEO_BATCH_CHUNK_SIZE", "500"))
+
+    # Configuración de miniaturas (derivados WebP en disco, direccionados por contenido)
+    THUMBNAIL_DIR: str = os.getenv("THUMBNAIL_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "media", "thumbnails"))
+    THUMBNAIL_WIDTHS: str = os.getenv("THUMBNAIL_WIDTHS", "160,320,640,1280")  # anchos en píxeles
+    THUMBNAIL_QUALITY: int = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+    THUMBNAIL_PLACEHOLDER_WIDTH: int = int(os.getenv("THUMBNAIL_PLACEHOLDER_WIDTH", "16"))
+    THUMBNAIL_MAX_BYTES: int = int(os.getenv("THUMBNAIL_MAX_BYTES", str(10 * 1024 * 1024)))  # imagen original decodificada
+    THUMBNAIL_MAX_PIXELS: int = int(os.getenv("THUMBNAIL_MAX_PIXELS", str(40_000_000)))
+    THUMBNAIL_WORKERS: int = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+    THUMBNAIL_BACKFILL_BATCH_SIZE: int = int(os.getenv("THUMBNAIL_BACKFILL_BATCH_SIZE", "50"))
+
+    # Configuración de la deduplicación por ID de YouTube
+    YOUTUBE_BACKFILL_BATCH_SIZE: int = int(os.getenv("YOUTUBE_BACKFILL_BATCH_SIZE", "1000"))
+    
+    # Configuración del profiler por muestreo
+    PROFILER_MAX_SECONDS: int = int(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    
+    # Configuración de la contabilidad de memoria por ruta (0 = desactivada)
+    MEMORY_TRACKING_SAMPLE_RATE: float = float(os.getenv("MEMORY_TRACKING_SAMPLE_RATE", "0"))
+    MEMORY_TRACKING_WINDOW: int = int(os.getenv("MEMORY_TRACKING_WINDOW", "500"))
+    MEMORY_TRACKING_TOP_SITES: int = int(os.getenv("MEMORY_TRACKING_TOP_SITES", "10"))
+    MEMORY_TRACKING_FRAMES: int = int(os.getenv("MEMORY_TRACKING_FRAMES", "10"))
+    
+    # Configuración de la caché compartida entre workers (memoria compartida, sin servicios externos)
+    SHARED_CACHE_ENABLED: bool = os.getenv("SHARED_CACHE_ENABLED", "True").lower() == "true"
+    SHARED_CACHE_SLOTS: int = int(os.getenv("SHARED_CACHE_SLOTS", "4096"))
+    SHARED_CACHE_SLOT_BYTES: int = int(os.getenv("SHARED_CACHE_SLOT_BYTES", "16384"))  # valores mayores no se cachean
+    SHARED_CACHE_TTL_SECONDS: float = float(os.getenv("SHARED_CACHE_TTL_SECONDS", "30"))
+    
+    # Configuración del servidor de producción (serve.py)
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "0"))  # 0 = un proceso por núcleo
+    SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # reciclar el worker tras N peticiones (0 = nunca)
+    SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+    SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+    SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+    SERVER_LIMIT_CONCURRENCY: int = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))  # conexiones por worker (0 = sin límite)
+    SERVER_DRAIN_SECONDS: float = float(os.getenv("SERVER_DRAIN_SECONDS", "5"))  # /health/ready en 503 antes de cerrar
+    SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))  # espera a las peticiones en curso
+
     # Configuración CORS
     CORS_ORIGINS: list = [
         "http://localhost:3000",
@@ -1,59 +1,800 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
 import pymysql
+from pymysql.constants import CLIENT
 from pymysql.cursors import DictCursor
 from contextlib import contextmanager
 from app.config import settings
+from app.utils.shared_cache import shared_cache
+
+# Procedimientos de solo lectura (se pueden servir desde una réplica)
+_READ_PROCEDURE = re.compile(r"^sp_(get|search)_")
+_READ_QUERY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_LOCKING_READ = re.compile(r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.IGNORECASE)
+
+class Replica:
+    """Réplica de lectura y su último estado conocido."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.healthy = False  # hasta la primera comprobación
+        self.lag: Optional[int] = None
+        self.error: Optional[str] = None
+        self.reads = 0
+
+class ReplicaRouter:
+    """
+    Reparto de lecturas entre réplicas con expulsión por retraso de replicación.
+
+    Un hilo comprueba cada `check_interval` segundos el retraso de cada réplica
+    (SHOW REPLICA STATUS) y solo reciben lecturas las que no superan `max_lag`.
+    Los clientes que acaban de escribir quedan `sticky_seconds` pegados al primario
+    para que lean sus propias escrituras. El plazo se guarda en este worker y en la
+    caché compartida, para que la siguiente petición del cliente lo respete aunque la
+    atienda otro worker (si la caché lo desaloja antes, solo lo respeta este).
+    """
+
+    def __init__(self, replicas: List[Replica], max_lag: int = 5, sticky_seconds: int = 5,
+                 check_interval: int = 5):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self._recent_writers: Dict[object, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls):
+        replicas = []
+        for item in filter(None, (part.strip() for part in settings.DB_REPLICAS.split(","))):
+            host, _, port = item.partition(":")
+            replicas.append(Replica(host, int(port or 3306)))
+        return cls(replicas, settings.DB_REPLICA_MAX_LAG_SECONDS, settings.DB_STICKY_SECONDS,
+                   settings.DB_REPLICA_CHECK_SECONDS)
+
+    def choose(self) -> Optional[Replica]:
+        """Réplica sana al azar, o None si no hay ninguna (se lee del primario)."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        return random.choice(healthy) if healthy else None
+
+    def mark_failed(self, replica: Replica, error: Exception):
+        replica.healthy = False
+        replica.error = str(error)
+
+    def mark_write(self, client_key):
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[client_key] = now + self.sticky_seconds
+            if len(self._recent_writers) > 10000:
+                self._recent_writers = {key: until for key, until in self._recent_writers.items() if until > now}
+        shared_cache.set("sticky", client_key, True, ttl=self.sticky_seconds)
+
+    def is_sticky(self, client_key) -> bool:
+        until = self._recent_writers.get(client_key)
+        if until is not None and until > time.monotonic():
+            return True
+        return shared_cache.get("sticky", client_key, False)
+
+    def check(self):
+        """Mide el retraso de cada réplica y actualiza su estado."""
+        for replica in self.replicas:
+            try:
+                connection = _connect(replica)
+                try:
+                    replica.lag = _replication_lag(connection)
+                finally:
+                    connection.close()
+                if replica.lag is None:
+                    replica.healthy, replica.error = False, "Replicación detenida"
+                else:
+                    replica.healthy = replica.lag <= self.max_lag
+                    replica.error = None if replica.healthy else f"Retraso de {replica.lag}s"
+            except Exception as e:
+                self.mark_failed(replica, e)
+
+    def start(self):
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_metrics(self):
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag,
+                 "error": replica.error, "reads": replica.reads}
+                for replica in self.replicas
+            ],
+            # Clientes que escribieron a través de este worker
+            "sticky_clients": sum(1 for until in list(self._recent_writers.values()) if until > now),
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.check_interval)
+
+def _replication_lag(connection) -> Optional[int]:
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            row = cursor.fetchone()
+            key = "Seconds_Behind_Source"
+        except pymysql.err.ProgrammingError:
+            # MySQL anterior a 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+            row = cursor.fetchone()
+            key = "Seconds_Behind_Master"
+    return row[key] if row else None
+
+def _connect(replica: Optional[Replica] = None, multi_statements: bool = False):
+    return pymysql.connect(
+        host=replica.host if replica else settings.DB_HOST,
+        port=replica.port if replica else settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+        charset='utf8mb4',
+        cursorclass=DictCursor,
+        autocommit=True,
+        # Varias sentencias en un solo paquete solo en las conexiones de execute_batch: en
+        # las demás, una inyección SQL no podría encadenar sentencias
+        client_flag=CLIENT.MULTI_STATEMENTS if multi_statements else 0,
+        connect_timeout=settings.DB_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.DB_READ_TIMEOUT_SECONDS,
+        write_timeout=settings.DB_WRITE_TIMEOUT_SECONDS
+    )
+
+replica_router = ReplicaRouter.from_settings()
+
+# Error de MySQL de una consulta interrumpida por MAX_EXECUTION_TIME
+_ER_QUERY_TIMEOUT = 3024
+_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+class DatabaseOverloaded(pymysql.err.OperationalError):
+    """La consulta no se admitió o no terminó dentro del plazo de la petición."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionLimiter:
+    """
+    Límite adaptativo (AIMD) de consultas simultáneas de una clase de carga de este worker.
+
+    Cada consulta terminada a tiempo con el límite en uso sube el límite en 1/límite
+    (uno por ventana completa); una consulta lenta (más de `latency_threshold`) o un
+    error de conexión lo multiplica por `backoff`, como mucho una vez por tiempo medio
+    de servicio. Así la concurrencia se ajusta a lo que MySQL atiende sin degradarse.
+
+    Las consultas que no caben esperan en cola mientras quede plazo. Si la espera
+    estimada (posición en la cola x tiempo medio de servicio / límite) ya supera el
+    plazo de la petición, se rechazan al instante para que las admitidas conserven su
+    latencia. Las rutas que consultan son síncronas (FastAPI las ejecuta en el threadpool)
+    o delegan en `run_in_threadpool`, así que la espera bloquea un hilo del pool y no el
+    event loop. Si aun así se consulta desde el event loop no se espera: o hay hueco o se
+    rechaza, porque bloquearlo detendría todas las peticiones del worker.
+    """
+
+    def __init__(self, name: str, initial: int = 20, minimum: int = 2, maximum: int = 200,
+                 latency_threshold: float = 0.25, backoff: float = 0.9):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.waiting = 0
+        self._service_time = latency_threshold / 10
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys(("admitted", "queued", "rejected", "deadline_exceeded", "decreases"), 0)
+
+    @classmethod
+    def from_settings(cls, name: str, initial: int, maximum: int):
+        return cls(name, initial, min(settings.DB_LIMIT_MIN, initial), maximum,
+                   settings.DB_LIMIT_LATENCY_MS / 1000, settings.DB_LIMIT_BACKOFF)
+
+    @contextmanager
+    def admit(self, deadline: Optional[float] = None):
+        """Ocupa un hueco durante la consulta; lanza DatabaseOverloaded si no llega a tiempo."""
+        self._acquire(deadline)
+        started = time.monotonic()
+        dropped = False
+        try:
+            yield
+        except pymysql.err.OperationalError:
+            dropped = True
+            raise
+        finally:
+            self._release(time.monotonic() - started, dropped)
+
+    def _acquire(self, deadline: Optional[float]):
+        with self._condition:
+            now = time.monotonic()
+            if deadline is not None and deadline <= now:
+                self._stats["deadline_exceeded"] += 1
+                raise DatabaseOverloaded("Plazo de la petición agotado antes de consultar")
+            on_event_loop = _on_event_loop()
+            if self.in_flight < int(self.limit) and (self.waiting == 0 or on_event_loop):
+                self.in_flight += 1
+                self._stats["admitted"] += 1
+                return
+
+            wait = (self.waiting + 1) * self._service_time / self.limit
+            if on_event_loop or (deadline is not None and now + wait > deadline):
+                self._stats["rejected"] += 1
+                raise DatabaseOverloaded(f"Base de datos saturada ({self.name})", max(1, math.ceil(wait)))
+
+            self.waiting += 1
+            self._stats["queued"] += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        self._stats["rejected"] += 1
+                        raise DatabaseOverloaded(f"Base de datos saturada ({self.name})", max(1, math.ceil(wait)))
+                    self._condition.wait(timeout)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self._stats["admitted"] += 1
+
+    def _release(self, latency: float, dropped: bool):
+        with self._condition:
+            in_use = self.in_flight
+            self.in_flight -= 1
+            self._service_time += 0.1 * (latency - self._service_time)
+            now = time.monotonic()
+            if dropped or latency > self.latency_threshold:
+                if now - self._last_decrease >= self._service_time:
+                    self.limit = max(float(self.minimum), self.limit * self.backoff)
+                    self._last_decrease = now
+                    self._stats["decreases"] += 1
+            elif in_use * 2 >= self.limit:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            free = int(self.limit) - self.in_flight
+            if free > 0 and self.waiting:
+                self._condition.notify(free)
+
+    def get_metrics(self):
+        with self._condition:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "avg_service_ms": round(self._service_time * 1000, 3),
+                **self._stats,
+            }
+
+# Clases de carga (bulkheads): cada una tiene su propio límite de consultas simultáneas,
+# así que una avalancha en una (p. ej. el panel de administración) no agota a las demás
+WORKLOADS = ("auth", "public", "write", "admin", "search")
+
+def _build_bulkheads() -> Dict[str, AdmissionLimiter]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in settings.DB_WORKLOAD_LIMITS.split(","))):
+        name, _, limits = item.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS:
+            raise ValueError(f"Clase de carga desconocida en DB_WORKLOAD_LIMITS: {name}")
+        initial, _, maximum = limits.partition(":")
+        budgets[name] = (int(initial), int(maximum or initial))
+    return {
+        name: AdmissionLimiter.from_settings(
+            name, *budgets.get(name, (settings.DB_LIMIT_INITIAL, settings.DB_LIMIT_MAX))
+        )
+        for name in WORKLOADS
+    }
+
+bulkheads = _build_bulkheads()
+
+_workload: ContextVar[Optional[str]] = ContextVar("workload", default=None)
 
 @contextmanager
-def get_connection():
-    """Proporciona una conexión a la base de datos MySQL."""
-    connection = None
+def workload(name: str):
+    """Asigna la clase de carga de las consultas que se ejecuten dentro del bloque."""
+    if name not in bulkheads:
+        raise ValueError(f"Clase de carga desconocida: {name}")
+    token = _workload.set(name)
     try:
-        connection = pymysql.connect(
-            host=settings.DB_HOST,
-            port=settings.DB_PORT,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            db=settings.DB_NAME,
-            charset='utf8mb4',
-            cursorclass=DictCursor,
-            autocommit=True
+        yield
+    finally:
+        _workload.reset(token)
+
+def use_workload(name: str):
+    """Dependencia que declara la clase de carga de las consultas de una ruta."""
+    if name not in bulkheads:
+        raise ValueError(f"Clase de carga desconocida: {name}")
+
+    async def declare():
+        holder = _request_connection.get()
+        if holder is not None:
+            holder.workload = name
+
+    return declare
+
+def _bulkhead(read: bool, holder) -> AdmissionLimiter:
+    # Bloque `workload` > clase de la ruta > lectura pública o escritura
+    name = _workload.get() or (holder.workload if holder is not None else None)
+    return bulkheads[name or ("public" if read else "write")]
+
+def get_workload_metrics():
+    """Límite, ocupación y rechazos de cada clase de carga."""
+    return {name: limiter.get_metrics() for name, limiter in bulkheads.items()}
+
+def _on_event_loop() -> bool:
+    # Una ruta async que consulta sin threadpool ya bloquea el event loop: ahí no se espera
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def _parse_deadlines(value: str) -> List[tuple]:
+    deadlines = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        prefix, _, seconds = item.partition("=")
+        deadlines.append((prefix.strip(), float(seconds)))
+    # El prefijo más largo gana
+    return sorted(deadlines, key=lambda item: len(item[0]), reverse=True)
+
+_ROUTE_DEADLINES = _parse_deadlines(settings.REQUEST_DEADLINES)
+
+def _request_deadline(path: str) -> Optional[float]:
+    """Instante (monotonic) en que vence una petición a `path`, o None si no tiene plazo."""
+    seconds = next((seconds for prefix, seconds in _ROUTE_DEADLINES if path.startswith(prefix)),
+                   settings.REQUEST_DEADLINE_SECONDS)
+    return time.monotonic() + seconds if seconds > 0 else None
+
+def _kill_query(connection):
+    """Cancela en el servidor la consulta abandonada por tiempo (su socket ya no sirve)."""
+    thread_id, host, port = connection.thread_id(), connection.host, connection.port
+
+    def kill():
+        try:
+            killer = pymysql.connect(host=host, port=port, user=settings.DB_USER, password=settings.DB_PASSWORD,
+                                     connect_timeout=settings.DB_CONNECT_TIMEOUT_SECONDS)
+            try:
+                with killer.cursor() as cursor:
+                    cursor.execute("KILL QUERY %s", [thread_id])
+            finally:
+                killer.close()
+        except pymysql.err.MySQLError:
+            pass
+
+    threading.Thread(target=kill, name="kill-query", daemon=True).start()
+
+class ProcedureStats:
+    """Estadísticas acumuladas de llamadas por procedimiento."""
+
+    def __init__(self):
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, procedure_name: str, seconds: float, rows: int, failed: bool):
+        with self._lock:
+            stats = self._stats.get(procedure_name)
+            if stats is None:
+                stats = self._stats[procedure_name] = {"calls": 0, "errors": 0, "rows": 0, "total": 0.0, "max": 0.0}
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["rows"] += rows
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+
+    def get_metrics(self):
+        """Procedimientos ordenados por tiempo total acumulado."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1]["total"], reverse=True)
+            return {
+                name: {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "rows": stats["rows"],
+                    "total_ms": round(stats["total"] * 1000, 1),
+                    "avg_ms": round(stats["total"] * 1000 / stats["calls"], 3),
+                    "max_ms": round(stats["max"] * 1000, 3),
+                }
+                for name, stats in items
+            }
+
+procedure_stats = ProcedureStats()
+
+_PROCEDURE_NAME = re.compile(r"^\w+$")
+_READ_CALL = re.compile(r"^\s*CALL\s+sp_(get|search)_", re.IGNORECASE)
+
+def _fetch_result_sets(cursor) -> List[list]:
+    """Lee todos los conjuntos de resultados pendientes del cursor."""
+    results = []
+    while True:
+        # Las sentencias sin columnas (y el estado final de un CALL) no aportan conjunto
+        if cursor.description is not None:
+            results.append(cursor.fetchall())
+        if not cursor.nextset():
+            return results
+
+def _is_read(query: str) -> bool:
+    if _READ_CALL.match(query):
+        return True
+    return bool(_READ_QUERY.match(query)) and not _LOCKING_READ.search(query)
+
+def call_procedure(cursor, procedure_name: str, params=None) -> List[list]:
+    """
+    Ejecuta un procedimiento con un único `CALL` y devuelve todos sus conjuntos de resultados.
+
+    `cursor.callproc` envía antes un `SET @_proc_0=...` con los argumentos (una ida y
+    vuelta más) y deja sin leer los conjuntos posteriores al primero. Aquí los
+    argumentos se escapan en el propio `CALL` y se consumen todos los conjuntos, así
+    que la conexión queda lista para la siguiente consulta.
+    """
+    if not _PROCEDURE_NAME.match(procedure_name):
+        raise ValueError(f"Nombre de procedimiento no válido: {procedure_name}")
+    params = list(params or [])
+    results = []
+    failed = True
+    started = time.perf_counter()
+    try:
+        cursor.execute(f"CALL {procedure_name}({', '.join(['%s'] * len(params))})", params)
+        results = _fetch_result_sets(cursor)
+        failed = False
+        return results
+    finally:
+        procedure_stats.record(procedure_name, time.perf_counter() - started,
+                               sum(len(rows) for rows in results), failed)
+
+class RequestConnection:
+    """
+    Conexiones compartidas por todas las consultas de una petición (unidad de trabajo).
+
+    Se abren con la primera consulta que las necesita y se cierran en `release`. Las
+    dependencias de FastAPI y los servicios que corren en el threadpool heredan el
+    contexto de la petición, así que las usan todos; el RLock serializa el acceso si
+    dos hilos de la misma petición consultan a la vez (pymysql no es thread-safe).
+
+    Las lecturas van a una réplica elegida una vez por petición, salvo que el cliente
+    haya escrito hace poco; tras la primera escritura todo va al primario.
+    """
+
+    def __init__(self, client_key=None, deadline: Optional[float] = None):
+        self.client_key = client_key
+        self.deadline = deadline
+        self.workload: Optional[str] = None  # clase de carga declarada por la ruta
+        # Segundos sugeridos al cliente si alguna consulta se rechazó por saturación
+        self.retry_after: Optional[int] = None
+        self.in_transaction = False
+        self.use_primary = not replica_router.replicas or (
+            client_key is not None and replica_router.is_sticky(client_key)
         )
-        yield connection
-    except Exception as e:
-        print(f"Error al conectar a la base de datos: {e}")
+        self._wrote = False
+        self._replica: Optional[Replica] = None
+        self._connections: Dict[Optional[Replica], object] = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def checkout(self, read: bool = False, multi_statements: bool = False):
+        """
+        Conexión para una consulta. Con `multi_statements` es una conexión aparte que
+        admite varias sentencias por paquete, salvo dentro de una transacción.
+        """
+        with self._lock:
+            if not read:
+                self._mark_write()
+            multi_statements = multi_statements and not self.in_transaction
+            target = self._target(read)
+            key = (target, "batch") if multi_statements else target
+            connection = self._connections.get(key)
+            if connection is None:
+                try:
+                    connection = self._connections[key] = _connect(target, multi_statements)
+                except pymysql.err.OperationalError as e:
+                    if target is None:
+                        raise
+                    # Réplica inaccesible: fuera del reparto y lectura desde el primario
+                    replica_router.mark_failed(target, e)
+                    self.use_primary, target = True, None
+                    key = (None, "batch") if multi_statements else None
+                    connection = self._connections.get(key)
+                    if connection is None:
+                        connection = self._connections[key] = _connect(None, multi_statements)
+            if target is not None:
+                target.reads += 1
+            try:
+                yield connection
+            except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+                # Puede que la conexión se haya perdido: la siguiente consulta abre otra
+                if not self.in_transaction:
+                    self._discard(key)
+                raise
+
+    def remaining(self) -> Optional[float]:
+        """Segundos que le quedan a la petición, o None si no tiene plazo."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def release(self):
+        """Cierra las conexiones abiertas, revirtiendo lo que quedara sin confirmar."""
+        with self._lock:
+            primary = self._connections.get(None)
+            if primary is not None and self.in_transaction:
+                try:
+                    primary.rollback()
+                except Exception:
+                    pass
+            self.in_transaction = False
+            for target in list(self._connections):
+                self._discard(target)
+
+    def _target(self, read: bool) -> Optional[Replica]:
+        if not read or self.use_primary or self.in_transaction:
+            return None
+        if self._replica is None or not self._replica.healthy:
+            self._replica = replica_router.choose()
+        return self._replica
+
+    def _mark_write(self):
+        self.use_primary = True
+        # Una vez por petición: en la caché compartida cada marca toma el lock de escritura
+        if self.client_key is not None and not self._wrote:
+            self._wrote = True
+            replica_router.mark_write(self.client_key)
+
+    def _discard(self, target):
+        connection = self._connections.pop(target, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+_request_connection: ContextVar[Optional[RequestConnection]] = ContextVar("request_connection", default=None)
+
+def _client_key(scope):
+    # El mismo token identifica al cliente; sin token, su dirección. Se usa un hash
+    # estable (no hash(), que cambia entre procesos) porque la clave se comparte entre workers
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return hashlib.blake2b(value, digest_size=16).hexdigest()
+    client = scope.get("client")
+    return client[0] if client else None
+
+_OVERLOADED_BODY = json.dumps({"detail": "Servidor saturado, reintente más tarde"}).encode()
+
+class RequestConnectionMiddleware:
+    """
+    Middleware ASGI que abre una unidad de trabajo por petición y la libera al terminar.
+
+    También fija el plazo de la petición según su ruta. Si alguna consulta se rechazó
+    por saturación o plazo, la respuesta de error que construya la ruta (los servicios
+    envuelven las excepciones en 500) se sustituye por un 503 con Retry-After.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        holder = RequestConnection(_client_key(scope), _request_deadline(scope["path"]))
+        token = _request_connection.set(holder)
+        replaced = False
+
+        async def send_or_shed(message):
+            nonlocal replaced
+            if (message["type"] == "http.response.start" and holder.retry_after is not None
+                    and message["status"] >= 400):
+                # La ruta falló porque se rechazó una consulta: el cliente debe reintentar
+                replaced = True
+                headers = [(name, value) for name, value in message.get("headers", [])
+                           if name not in (b"content-length", b"content-type")]
+                headers += [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_OVERLOADED_BODY)).encode()),
+                    (b"retry-after", str(holder.retry_after).encode()),
+                ]
+                await send({"type": "http.response.start", "status": 503, "headers": headers})
+                await send({"type": "http.response.body", "body": _OVERLOADED_BODY})
+            elif not replaced:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_or_shed)
+        finally:
+            _request_connection.reset(token)
+            holder.release()
+
+@contextmanager
+def get_connection(read: bool = False, multi_statements: bool = False):
+    """
+    Proporciona una conexión a la base de datos MySQL (a una réplica si `read` y la petición lo permite).
+
+    `multi_statements` pide una conexión que admita varias sentencias por paquete (solo
+    para execute_batch); dentro de una transacción se usa la de la transacción, que no lo admite.
+    """
+    holder = _request_connection.get()
+    if holder is not None:
+        try:
+            with _bulkhead(read, holder).admit(holder.deadline):
+                # Dentro de una petición o transacción se reutiliza su conexión
+                with holder.checkout(read, multi_statements) as connection, _within_deadline(connection, holder):
+                    yield connection
+        except DatabaseOverloaded as e:
+            holder.retry_after = holder.retry_after or e.retry_after
+            raise
+        return
+
+    with _bulkhead(read, None).admit():
+        connection = None
+        try:
+            connection = _connect(multi_statements=multi_statements)
+            yield connection
+        except Exception as e:
+            print(f"Error al conectar a la base de datos: {e}")
+            raise
+        finally:
+            if connection:
+                connection.close()
+
+@contextmanager
+def _within_deadline(connection, holder: RequestConnection):
+    """Limita la espera del socket al plazo restante de la petición y traduce sus timeouts."""
+    remaining = holder.remaining()
+    if remaining is None:
+        yield
+        return
+    connection._read_timeout = max(0.001, min(remaining, settings.DB_READ_TIMEOUT_SECONDS))
+    connection._write_timeout = max(0.001, min(remaining, settings.DB_WRITE_TIMEOUT_SECONDS))
+    try:
+        yield
+    except DatabaseOverloaded:
         raise
-    finally:
-        if connection:
-            connection.close()
+    except pymysql.err.MySQLError as e:
+        # Tras un timeout del socket la conexión queda cerrada y lo siguiente (p. ej. el
+        # rollback) falla con otro error: cuenta cualquier error de conexión ya vencido
+        timed_out = (isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+                     and holder.remaining() < 0.01)
+        if not timed_out and (e.args[0] if e.args else None) != _ER_QUERY_TIMEOUT:
+            raise
+        if timed_out:
+            _kill_query(connection)
+        holder.retry_after = 1
+        raise DatabaseOverloaded("Plazo de la petición agotado en la base de datos") from e
+
+def _limit_execution_time(query: str) -> str:
+    """Añade a un SELECT el tiempo máximo de ejecución que le queda a la petición."""
+    holder = _request_connection.get()
+    remaining = holder.remaining() if holder is not None else None
+    if remaining is None or remaining <= 0 or not _SELECT.match(query):
+        return query
+    return _SELECT.sub(lambda match: f"{match.group(0)} /*+ MAX_EXECUTION_TIME({math.ceil(remaining * 1000)}) */",
+                       query, count=1)
 
 @contextmanager
-def get_cursor():
+def get_cursor(read: bool = False):
     """Proporciona un cursor para ejecutar consultas SQL."""
-    with get_connection() as connection:
+    with get_connection(read) as connection:
         cursor = connection.cursor()
         try:
             yield cursor
         finally:
             cursor.close()
 
+@contextmanager
+def transaction():
+    """
+    Proporciona un cursor dentro de una transacción: confirma al salir y revierte si hay errores.
+
+    Mientras dura, las funciones `execute_*` usan la misma conexión (la del primario) y
+    forman parte de la transacción. Una transacción anidada se une a la exterior, que es
+    la que confirma.
+    """
+    holder = _request_connection.get()
+    token = None
+    if holder is None:
+        # Fuera de una petición: unidad de trabajo propia durante la transacción
+        holder = RequestConnection()
+        holder.use_primary = True
+        token = _request_connection.set(holder)
+    try:
+        with holder.checkout() as connection, _within_deadline(connection, holder):
+            if holder.in_transaction:
+                with connection.cursor() as cursor:
+                    yield cursor
+                return
+
+            connection.begin()
+            holder.in_transaction = True
+            cursor = connection.cursor()
+            try:
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                holder.in_transaction = False
+                cursor.close()
+    finally:
+        if token is not None:
+            _request_connection.reset(token)
+            holder.release()
+
+def _commit(connection):
+    """Confirma salvo que la consulta forme parte de una transacción en curso."""
+    holder = _request_connection.get()
+    if holder is None or not holder.in_transaction:
+        connection.commit()
+
 def execute_query(query, params=None):
     """Ejecuta una consulta SQL y devuelve los resultados."""
-    with get_cursor() as cursor:
-        cursor.execute(query, params)
+    with get_cursor(_is_read(query)) as cursor:
+        cursor.execute(_limit_execution_time(query), params)
         return cursor.fetchall()
 
 def execute_procedure(procedure_name, params=None):
     """Ejecuta un procedimiento almacenado y devuelve los resultados."""
-    with get_cursor() as cursor:
-        cursor.callproc(procedure_name, params or [])
-        return cursor.fetchall()
+    with get_cursor(bool(_READ_PROCEDURE.match(procedure_name))) as cursor:
+        results = call_procedure(cursor, procedure_name, params)
+        return results[0] if results else []
+
+def execute_procedure_results(procedure_name, params=None):
+    """Ejecuta un procedimiento almacenado y devuelve todos sus conjuntos de resultados."""
+    with get_cursor(bool(_READ_PROCEDURE.match(procedure_name))) as cursor:
+        return call_procedure(cursor, procedure_name, params)
+
+def execute_batch(statements):
+    """
+    Ejecuta varias consultas o CALL en una sola ida y vuelta y devuelve sus resultados en orden.
+
+    `statements` es una lista de (consulta, parámetros). Cada SELECT aporta un conjunto de
+    resultados y cada CALL los que devuelva. Si todas son lecturas el lote puede ir a una
+    réplica.
+    """
+    read = all(_is_read(query) for query, _ in statements)
+    with get_connection(read, multi_statements=True) as connection, connection.cursor() as cursor:
+        queries = [cursor.mogrify(_limit_execution_time(query), params) for query, params in statements]
+        if not connection.client_flag & CLIENT.MULTI_STATEMENTS:
+            # Conexión de una transacción: una sentencia por ida y vuelta
+            results = []
+            for query in queries:
+                cursor.execute(query)
+                results.extend(_fetch_result_sets(cursor))
+            return results
+        # Los valores ya van escapados: se ejecuta sin parámetros
+        cursor.execute(";\n".join(queries))
+        return _fetch_result_sets(cursor)
 
 def execute_update(query, params=None):
     """Ejecuta una consulta de actualización (INSERT, UPDATE, DELETE) y devuelve el número de filas afectadas."""
     with get_connection() as connection:
         with connection.cursor() as cursor:
             rows_affected = cursor.execute(query, params)
-            connection.commit()
+            _commit(connection)
             return rows_affected
 
 def execute_insert(query, params=None):
@@ -61,5 +802,5 @@ def execute_insert(query, params=None):
     with get_connection() as connection:
         with connection.cursor() as cursor:
             cursor.execute(query, params)
-            connection.commit()
-            return cursor.lastrowid
\ No newline at end of file
+            _commit(connection)
+            return cursor.lastrowid
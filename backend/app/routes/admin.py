@@ -1,19 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from datetime import datetime
+import asyncio
 
-from app.schemas.response import StandardResponse
-from app.schemas.user import UserResponse
-from app.schemas.video import VideoResponse
+from app.schemas.response import StandardResponse, Page, BulkResult
+from app.schemas.user import UserResponse, UserImportResult
+from app.schemas.video import ModerationVideoResponse, DuplicateClusterResponse
 from app.schemas.report import ReportResponse, ReportUpdate
 from app.utils.auth import get_current_user, admin_only
-from app.services import admin_service, moderation_service
+from app.utils.task_queue import background_queue
+from app.utils.pagination import PageParams
+from app.utils.profiler import SamplingProfiler, route_names, session_lock
+from app.utils.memory_tracker import memory_tracker
+from app.utils.shared_cache import shared_cache
+from app.config import settings
+from app.database import replica_router, procedure_stats, get_workload_metrics, use_workload
+from app.services import (admin_service, moderation_service, view_counter_service, user_import_service,
+                          thumbnail_service, youtube_service, duplicate_service)
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"],
     responses={404: {"description": "No encontrado"}},
-    dependencies=[Depends(admin_only())]
+    # Consultas pesadas del panel en su propio bulkhead para no agotar a los espectadores
+    dependencies=[Depends(use_workload("admin")), Depends(admin_only())]
 )
 
 class RoleUpdate(BaseModel):
@@ -25,58 +38,252 @@ class StatusUpdate(BaseModel):
 class PasswordReset(BaseModel):
     new_password: str
 
+class BulkIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class BulkUserUpdate(BulkIds):
+    status: Optional[str] = None
+    role_id: Optional[int] = None
+
+class MemoryTrackingUpdate(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1)  # 0 desactiva el seguimiento
+    reset: bool = False
+
+class AdminOverview(BaseModel):
+    users: Page[UserResponse]
+    videos: Page[ModerationVideoResponse]
+    reports: Page[ReportResponse]
+
+# Resumen del panel de administración
+@router.get("/overview", response_model=StandardResponse[AdminOverview])
+def get_overview(
+    page_size: int = Query(settings.ADMIN_DEFAULT_PAGE_SIZE, ge=1, le=settings.ADMIN_MAX_PAGE_SIZE,
+                           description="Elementos por lista"),
+    _: dict = Depends(admin_only())
+):
+    """Primera página de usuarios, videos activos y reportes pendientes en una sola petición. Solo administradores (role_id=3)."""
+    overview = admin_service.get_overview(page_size)
+    return StandardResponse(data=overview, message="SUCCESS")
+
 # Endpoints para administración de usuarios
-@router.get("/users", response_model=StandardResponse[List[UserResponse]])
-async def get_all_users(_: dict = Depends(admin_only())):
-    """Listar todos los usuarios registrados. Solo administradores (role_id=3)."""
-    users = admin_service.get_all_users()
-    return StandardResponse(data=users, message="SUCCESS")
+@router.get("/users", response_model=StandardResponse[Page[UserResponse]])
+def get_all_users(
+    params: PageParams = Depends(),
+    status_filter: Optional[str] = Query(None, alias="status", description="activo o suspendido"),
+    role_id: Optional[int] = Query(None, description="Filtrar por rol"),
+    q: Optional[str] = Query(None, description="Prefijo de username o email"),
+    created_from: Optional[datetime] = Query(None, description="Creados desde (inclusive)"),
+    created_to: Optional[datetime] = Query(None, description="Creados hasta (exclusive)"),
+    fields=Depends(admin_service.USER_FIELDS.param),
+    _: dict = Depends(admin_only())
+):
+    """Listar usuarios registrados paginados. Orden: created_at, username, last_login, id. Solo administradores (role_id=3)."""
+    users = admin_service.get_users_page(params, status_filter, role_id, q, created_from, created_to, fields)
+    return admin_service.USER_FIELDS.respond(users, fields, page=True)
 
 @router.put("/users/{user_id}/role", response_model=StandardResponse[UserResponse])
-async def change_user_role(user_id: int, role_data: RoleUpdate, _: dict = Depends(admin_only())):
+def change_user_role(user_id: int, role_data: RoleUpdate, _: dict = Depends(admin_only())):
     """Cambiar rol del usuario. Solo administradores (role_id=3)."""
     updated_user = admin_service.change_user_role(user_id, role_data.role_id)
     return StandardResponse(data=updated_user, message="SUCCESS")
 
 @router.put("/users/{user_id}/status", response_model=StandardResponse[UserResponse])
-async def change_user_status(user_id: int, status_data: StatusUpdate, _: dict = Depends(admin_only())):
+def change_user_status(user_id: int, status_data: StatusUpdate, _: dict = Depends(admin_only())):
     """Suspender/reactivar cuenta de usuario. Solo administradores (role_id=3)."""
     updated_user = admin_service.change_user_status(user_id, status_data.status)
     return StandardResponse(data=updated_user, message="SUCCESS")
 
+@router.post("/users/import", response_model=StandardResponse[UserImportResult])
+async def import_users(
+    file: UploadFile = File(..., description="Archivo CSV (con cabecera) o NDJSON con los campos de registro"),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$",
+                                       description="csv o ndjson; por defecto se deduce del archivo"),
+    _: dict = Depends(admin_only())
+):
+    """Alta masiva de usuarios desde CSV o NDJSON. Solo administradores (role_id=3)."""
+    if file_format is None:
+        is_csv = (file.filename or "").lower().endswith(".csv") or (file.content_type or "").endswith("csv")
+        file_format = "csv" if is_csv else "ndjson"
+    # La importación bloquea (hashing e inserciones): se ejecuta fuera del event loop
+    result = await run_in_threadpool(user_import_service.import_users, file.file, file_format)
+    return StandardResponse(data=result, message="SUCCESS")
+
+@router.post("/users/bulk-update", response_model=StandardResponse[BulkResult])
+def bulk_update_users(data: BulkUserUpdate, _: dict = Depends(admin_only())):
+    """Cambiar estado y/o rol de varios usuarios en una transacción. Solo administradores (role_id=3)."""
+    result = admin_service.update_users(data.ids, data.status, data.role_id)
+    return StandardResponse(data=result, message="SUCCESS")
+
 @router.delete("/users/{user_id}", response_model=StandardResponse)
-async def delete_user(user_id: int, _: dict = Depends(admin_only())):
+def delete_user(user_id: int, _: dict = Depends(admin_only())):
     """Eliminar cuenta del sistema. Solo administradores (role_id=3)."""
     admin_service.delete_user(user_id)
     return StandardResponse(message="SUCCESS")
 
 @router.put("/users/{user_id}/reset", response_model=StandardResponse)
-async def reset_user_password(user_id: int, password_data: PasswordReset, _: dict = Depends(admin_only())):
+def reset_user_password(user_id: int, password_data: PasswordReset, _: dict = Depends(admin_only())):
     """Restablecer contraseña de usuario. Solo administradores (role_id=3)."""
     admin_service.reset_user_password(user_id, password_data.new_password)
     return StandardResponse(message="SUCCESS")
 
 # Endpoints para moderación de contenido
-@router.get("/videos", response_model=StandardResponse[List[VideoResponse]])
-async def get_all_videos_for_moderation(_: dict = Depends(admin_only())):
-    """Listar todos los videos para moderación. Solo administradores (role_id=3)."""
-    videos = moderation_service.get_all_videos()
-    return StandardResponse(data=videos, message="SUCCESS")
+@router.get("/videos", response_model=StandardResponse[Page[ModerationVideoResponse]])
+def get_all_videos_for_moderation(
+    params: PageParams = Depends(),
+    status_filter: Optional[str] = Query("activo", alias="status", description="activo o suspendido; vacío para todos"),
+    video_type: Optional[str] = Query(None, alias="type", description="en_vivo o grabado"),
+    user_id: Optional[int] = Query(None, description="Filtrar por creador"),
+    q: Optional[str] = Query(None, description="Prefijo del título"),
+    has_reports: Optional[bool] = Query(None, description="Solo videos con (o sin) reportes pendientes"),
+    created_from: Optional[datetime] = Query(None, description="Creados desde (inclusive)"),
+    created_to: Optional[datetime] = Query(None, description="Creados hasta (exclusive)"),
+    fields=Depends(moderation_service.VIDEO_FIELDS.param),
+    _: dict = Depends(admin_only())
+):
+    """Listar videos para moderación paginados. Orden: created_at, title, report_count, id. Solo administradores (role_id=3)."""
+    videos = moderation_service.get_videos_page(
+        params, status_filter, video_type, user_id, q, has_reports, created_from, created_to, fields
+    )
+    return moderation_service.VIDEO_FIELDS.respond(videos, fields, page=True)
+
+@router.get("/videos/duplicates", response_model=StandardResponse[Page[DuplicateClusterResponse]])
+def get_duplicate_clusters(params: PageParams = Depends(), _: dict = Depends(admin_only())):
+    """Listar grupos de videos casi duplicados (posibles oleadas de spam). Orden: size, id. Solo administradores (role_id=3)."""
+    clusters = duplicate_service.get_clusters_page(params)
+    return StandardResponse(data=clusters, message="SUCCESS")
+
+@router.post("/videos/bulk-suspend", response_model=StandardResponse[BulkResult])
+def bulk_suspend_videos(data: BulkIds, _: dict = Depends(admin_only())):
+    """Suspender varios videos y resolver sus reportes en una transacción. Solo administradores (role_id=3)."""
+    result = moderation_service.suspend_videos(data.ids)
+    return StandardResponse(data=result, message="SUCCESS")
 
 @router.delete("/videos/{video_id}", response_model=StandardResponse)
-async def delete_video_by_admin(video_id: int, _: dict = Depends(admin_only())):
+def delete_video_by_admin(video_id: int, _: dict = Depends(admin_only())):
     """Eliminar video por incumplimiento. Solo administradores (role_id=3)."""
     moderation_service.delete_video(video_id)
     return StandardResponse(message="SUCCESS")
 
-@router.get("/reports", response_model=StandardResponse[List[ReportResponse]])
-async def get_all_reports(_: dict = Depends(admin_only())):
-    """Ver reportes de abuso. Solo administradores (role_id=3)."""
-    reports = moderation_service.get_all_reports()
-    return StandardResponse(data=reports, message="SUCCESS")
+@router.get("/reports", response_model=StandardResponse[Page[ReportResponse]])
+def get_all_reports(
+    params: PageParams = Depends(),
+    status_filter: Optional[str] = Query(None, alias="status", description="pendiente o resuelto"),
+    video_id: Optional[int] = Query(None, description="Filtrar por video"),
+    reporter_id: Optional[int] = Query(None, description="Filtrar por usuario que reportó"),
+    q: Optional[str] = Query(None, description="Prefijo del motivo"),
+    created_from: Optional[datetime] = Query(None, description="Creados desde (inclusive)"),
+    created_to: Optional[datetime] = Query(None, description="Creados hasta (exclusive)"),
+    fields=Depends(moderation_service.REPORT_FIELDS.param),
+    _: dict = Depends(admin_only())
+):
+    """Ver reportes de abuso paginados. Orden: created_at, resolved_at, id. Solo administradores (role_id=3)."""
+    reports = moderation_service.get_reports_page(
+        params, status_filter, video_id, reporter_id, q, created_from, created_to, fields
+    )
+    return moderation_service.REPORT_FIELDS.respond(reports, fields, page=True)
+
+@router.post("/reports/bulk-resolve", response_model=StandardResponse[BulkResult])
+def bulk_resolve_reports(data: BulkIds, _: dict = Depends(admin_only())):
+    """Marcar varios reportes como resueltos en una transacción. Solo administradores (role_id=3)."""
+    result = moderation_service.resolve_reports(data.ids)
+    return StandardResponse(data=result, message="SUCCESS")
 
 @router.put("/reports/{report_id}/resolve", response_model=StandardResponse[ReportResponse])
-async def resolve_report(report_id: int, _: dict = Depends(admin_only())):
+def resolve_report(report_id: int, _: dict = Depends(admin_only())):
     """Marcar un reporte como resuelto. Solo administradores (role_id=3)."""
     updated_report = moderation_service.resolve_report(report_id)
     return StandardResponse(data=updated_report, message="SUCCESS")
+
+@router.post("/thumbnails/backfill", response_model=StandardResponse, status_code=status.HTTP_202_ACCEPTED)
+def backfill_thumbnails(_: dict = Depends(admin_only())):
+    """Convertir en segundo plano las miniaturas guardadas como data URI. Solo administradores (role_id=3)."""
+    if not background_queue.enqueue(thumbnail_service.backfill, key=("thumbnails", "backfill")):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La cola de trabajos está llena"
+        )
+    return StandardResponse(message="SUCCESS")
+
+@router.post("/videos/youtube-ids/backfill", response_model=StandardResponse, status_code=status.HTTP_202_ACCEPTED)
+def backfill_youtube_ids(_: dict = Depends(admin_only())):
+    """Calcular en segundo plano el ID de YouTube de los videos existentes. Solo administradores (role_id=3)."""
+    if not background_queue.enqueue(youtube_service.backfill, key=("youtube_ids", "backfill")):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La cola de trabajos está llena"
+        )
+    return StandardResponse(message="SUCCESS")
+
+# Endpoints de diagnóstico
+@router.get("/metrics", response_model=StandardResponse[dict])
+async def get_metrics(_: dict = Depends(admin_only())):
+    """Métricas internas de los subsistemas en memoria. Solo administradores (role_id=3)."""
+    return StandardResponse(
+        data={
+            "view_counters": view_counter_service.get_metrics(),
+            "background_queue": background_queue.get_metrics(),
+            "memory": memory_tracker.get_metrics(),
+            "database": replica_router.get_metrics(),
+            "procedures": procedure_stats.get_metrics(),
+            "workloads": get_workload_metrics(),
+            "shared_cache": shared_cache.get_metrics(),
+            "duplicates": duplicate_service.get_metrics(),
+        },
+        message="SUCCESS"
+    )
+
+@router.put("/memory", response_model=StandardResponse[dict])
+async def update_memory_tracking(body: MemoryTrackingUpdate, _: dict = Depends(admin_only())):
+    """
+    Activa (sample_rate > 0) o desactiva la contabilidad de memoria por ruta de este worker.
+    Los resultados se consultan en /admin/metrics. Solo administradores (role_id=3).
+    """
+    if body.reset:
+        memory_tracker.reset()
+    if body.sample_rate > 0:
+        memory_tracker.start(body.sample_rate)
+    else:
+        memory_tracker.stop()
+    return StandardResponse(data=memory_tracker.get_metrics(), message="SUCCESS")
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_cpu(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS, description="Duración del muestreo"),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1, le=1000, description="Intervalo entre muestras"),
+    include_idle: bool = Query(False, description="Incluir hilos en espera"),
+    _: dict = Depends(admin_only())
+):
+    """
+    Perfila este worker durante `seconds` segundos muestreando las pilas de todos sus hilos.
+    Devuelve pilas en formato collapsed (flamegraph.pl, speedscope). Solo administradores (role_id=3).
+    """
+    if not session_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya hay una sesión de profiling en curso"
+        )
+    try:
+        profiler = SamplingProfiler(
+            interval=interval_ms / 1000,
+            include_idle=include_idle,
+            route_names=route_names(request.app)
+        )
+        profiler.start()
+        try:
+            # Esperar sin bloquear el event loop: las peticiones en curso son las que se miden
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    finally:
+        session_lock.release()
+
+    filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(profiler.samples),
+            "X-Profile-Duration": f"{profiler.duration:.3f}",
+        }
+    )
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 
 from app.schemas.response import StandardResponse
@@ -6,6 +7,7 @@ from app.schemas.album import AlbumCreate, AlbumUpdate, AlbumResponse
 from app.schemas.video import VideoResponse
 from app.utils.auth import get_current_user, creator_only
 from app.services import album_service
+from app.services.video_list_service import VIDEO_FIELDS
 
 router = APIRouter(
     prefix="/my/albums",
@@ -15,43 +17,46 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=StandardResponse[List[AlbumResponse]])
-async def get_my_albums(current_user: dict = Depends(get_current_user)):
+def get_my_albums(current_user: dict = Depends(get_current_user),
+                        fields=Depends(album_service.ALBUM_FIELDS.param)):
     """Obtiene la lista de álbumes del creador autenticado."""
-    albums = album_service.get_albums_by_user(current_user["id"])
-    return StandardResponse(data=albums, message="SUCCESS")
+    albums = album_service.get_albums_by_user(current_user["id"], fields)
+    return album_service.ALBUM_FIELDS.respond(albums, fields)
 
 @router.post("/", response_model=StandardResponse[AlbumResponse], status_code=status.HTTP_201_CREATED)
 async def create_album(album: AlbumCreate, current_user: dict = Depends(get_current_user)):
     """Crea un nuevo álbum para el creador autenticado."""
-    created_album = album_service.create_album(current_user["id"], album)
+    # La miniatura se procesa fuera del event loop
+    created_album = await run_in_threadpool(album_service.create_album, current_user["id"], album)
     return StandardResponse(data=created_album, message="SUCCESS")
 
 @router.put("/{album_id}", response_model=StandardResponse[AlbumResponse])
 async def update_album(album_id: int, album: AlbumUpdate, current_user: dict = Depends(get_current_user)):
     """Actualiza un álbum del creador autenticado."""
-    updated_album = album_service.update_album(album_id, album, current_user["id"])
+    updated_album = await run_in_threadpool(album_service.update_album, album_id, album, current_user["id"])
     return StandardResponse(data=updated_album, message="SUCCESS")
 
 @router.delete("/{album_id}", response_model=StandardResponse)
-async def delete_album(album_id: int, current_user: dict = Depends(get_current_user)):
+def delete_album(album_id: int, current_user: dict = Depends(get_current_user)):
     """Elimina un álbum del creador autenticado."""
     album_service.delete_album(album_id, current_user["id"])
     return StandardResponse(message="SUCCESS")
 
 @router.post("/{album_id}/videos/{video_id}", response_model=StandardResponse)
-async def add_video_to_album(album_id: int, video_id: int, current_user: dict = Depends(get_current_user)):
+def add_video_to_album(album_id: int, video_id: int, current_user: dict = Depends(get_current_user)):
     """Agrega un video al álbum del creador autenticado."""
     album_service.add_video_to_album(album_id, video_id, current_user["id"])
     return StandardResponse(message="SUCCESS")
 
 @router.delete("/{album_id}/videos/{video_id}", response_model=StandardResponse)
-async def remove_video_from_album(album_id: int, video_id: int, current_user: dict = Depends(get_current_user)):
+def remove_video_from_album(album_id: int, video_id: int, current_user: dict = Depends(get_current_user)):
     """Quita un video del álbum del creador autenticado."""
     album_service.remove_video_from_album(album_id, video_id, current_user["id"])
     return StandardResponse(message="SUCCESS")
 
 @router.get("/{album_id}/videos", response_model=StandardResponse[List[VideoResponse]])
-async def get_videos_from_album(album_id: int, current_user: dict = Depends(get_current_user)):
+def get_videos_from_album(album_id: int, current_user: dict = Depends(get_current_user),
+                                fields=Depends(VIDEO_FIELDS.param)):
     """Obtiene todos los videos de un álbum del creador autenticado."""
     # Verificar que el álbum pertenezca al usuario
     album = album_service.get_album_by_id(album_id)
@@ -61,5 +66,5 @@ async def get_videos_from_album(album_id: int, current_user: dict = Depends(get_
             detail="No tienes permiso para ver este álbum"
         )
     
-    videos = album_service.get_videos_by_album(album_id)
-    return StandardResponse(data=videos, message="SUCCESS")
+    videos = album_service.get_videos_by_album(album_id, fields)
+    return VIDEO_FIELDS.respond(videos, fields)
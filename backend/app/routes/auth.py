@@ -1,15 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from datetime import timedelta, datetime, timezone
 from pydantic import BaseModel
 from app.schemas.user import UserCreate, UserResponse, Token
 from app.schemas.response import StandardResponse
 from app.services import auth_service
 from app.config import settings
+from app.database import use_workload
 
 router = APIRouter(
     prefix="/auth",
     tags=["authentication"],
     responses={401: {"description": "No autorizado"}},
+    dependencies=[Depends(use_workload("auth"))]
 )
 
 class LoginRequest(BaseModel):
@@ -17,13 +19,13 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/register", response_model=StandardResponse[UserResponse], status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate):
+def register(user: UserCreate):
     """Registra un nuevo usuario en el sistema."""
     user_data = auth_service.register_user(user)
     return StandardResponse(data=user_data, message="SUCCESS")
 
 @router.post("/login", response_model=StandardResponse[Token])
-async def login(login_data: LoginRequest):
+def login(login_data: LoginRequest):
     """Genera un token de acceso para el usuario usando username y password."""
     user = auth_service.authenticate_user(login_data.username, login_data.password)
     if not user:
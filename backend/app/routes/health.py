@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, status
+
+from app.schemas.response import StandardResponse
+from app.utils.lifecycle import lifecycle
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+@router.get("/live", response_model=StandardResponse)
+async def live():
+    """El proceso responde (para reiniciarlo si se bloquea)."""
+    return StandardResponse(message="SUCCESS")
+
+@router.get("/ready", response_model=StandardResponse)
+async def ready():
+    """El worker acepta tráfico: arrancado y sin drenar. 503 durante el arranque y la parada."""
+    if not lifecycle.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Drenando" if lifecycle.draining else "Arrancando"
+        )
+    return StandardResponse(message="SUCCESS")
@@ -22,19 +22,19 @@ class PasswordUpdate(BaseModel):
     new_password: str
 
 @router.get("/", response_model=StandardResponse[UserResponse])
-async def get_profile(current_user: dict = Depends(get_current_user)):
+def get_profile(current_user: dict = Depends(get_current_user)):
     """Obtiene los datos del perfil del usuario actual."""
     profile = profile_service.get_profile(current_user["id"])
     return StandardResponse(data=profile, message="SUCCESS")
 
 @router.put("/", response_model=StandardResponse[UserResponse])
-async def update_profile(profile_data: UserUpdateProfile, current_user: dict = Depends(get_current_user)):
+def update_profile(profile_data: UserUpdateProfile, current_user: dict = Depends(get_current_user)):
     """Actualiza los datos personales del usuario actual."""
     updated_profile = profile_service.update_profile(current_user["id"], profile_data)
     return StandardResponse(data=updated_profile, message="SUCCESS")
 
 @router.put("/password", response_model=StandardResponse)
-async def change_password(password_data: PasswordUpdate, current_user: dict = Depends(get_current_user)):
+def change_password(password_data: PasswordUpdate, current_user: dict = Depends(get_current_user)):
     """Cambia la contraseu00f1a del usuario actual."""
     result = profile_service.change_password(
         current_user["id"], 
@@ -44,14 +44,14 @@ async def change_password(password_data: PasswordUpdate, current_user: dict = De
     return StandardResponse(message="SUCCESS")
 
 @router.put("/picture", response_model=StandardResponse[str])
-async def update_profile_picture(picture_data: ProfilePictureUpdate, current_user: dict = Depends(get_current_user)):
+def update_profile_picture(picture_data: ProfilePictureUpdate, current_user: dict = Depends(get_current_user)):
     """Actualiza la foto de perfil del usuario actual."""
     updated_profile = profile_service.update_profile_picture(current_user["id"], picture_data.profile_picture)
     # Solo devolvemos la URL de la imagen como string, no el perfil completo
     return StandardResponse(data=updated_profile.get("profile_picture", ""), message="SUCCESS")
 
 @router.get("/picture", response_model=StandardResponse[str])
-async def get_profile_picture(current_user: dict = Depends(get_current_user)):
+def get_profile_picture(current_user: dict = Depends(get_current_user)):
     """Obtiene la foto de perfil del usuario actual."""
     profile_picture = profile_service.get_profile_picture(current_user["id"])
     return StandardResponse(data=profile_picture, message="SUCCESS")
@@ -4,7 +4,10 @@ from typing import List
 from app.schemas.response import StandardResponse
 from app.schemas.report import ReportCreate, ReportResponse
 from app.utils.auth import get_current_user, any_role
-from app.database import execute_procedure
+from app.database import execute_procedure, transaction
+from app.utils.pagination import count_cache
+from app.services import moderation_service
+from app.services.moderation_service import REPORT_FIELDS
 
 router = APIRouter(
     prefix="/reports",
@@ -14,22 +17,26 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=StandardResponse[ReportResponse], status_code=status.HTTP_201_CREATED)
-async def create_report(report: ReportCreate, current_user: dict = Depends(get_current_user)):
+def create_report(report: ReportCreate, current_user: dict = Depends(get_current_user)):
     """Crear un reporte de abuso para un video."""
     try:
-        # Verificar si el video existe
-        video = execute_procedure("sp_get_video", [report.video_id])
-        if not video:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Video no encontrado"
+        # Comprobación e inserción en una sola transacción
+        with transaction():
+            # Verificar si el video existe
+            video = execute_procedure("sp_get_video", [report.video_id])
+            if not video:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Video no encontrado"
+                )
+        
+            # Usar el ID del usuario autenticado
+            report_id = execute_procedure(
+                "sp_create_report",
+                [report.video_id, current_user["id"], report.reason, report.description]
             )
         
-        # Usar el ID del usuario autenticado
-        report_id = execute_procedure(
-            "sp_create_report",
-            [report.video_id, current_user["id"], report.reason, report.description]
-        )
+        count_cache.invalidate("report")
         
         # Obtener el reporte creado
         created_report = execute_procedure("sp_get_report", [report_id[0]["id"]])
@@ -47,16 +54,13 @@ async def create_report(report: ReportCreate, current_user: dict = Depends(get_c
         )
 
 @router.get("/my", response_model=StandardResponse[List[ReportResponse]])
-async def get_my_reports(current_user: dict = Depends(get_current_user)):
+def get_my_reports(current_user: dict = Depends(get_current_user), fields=Depends(REPORT_FIELDS.param)):
     """Obtener los reportes creados por el usuario actual."""
     try:
         # Obtener los reportes del usuario
-        reports = execute_procedure("sp_get_user_reports", [current_user["id"]])
+        reports = moderation_service.get_user_reports(current_user["id"], fields)
         
-        return StandardResponse(
-            data=reports,
-            message="SUCCESS"
-        )
+        return REPORT_FIELDS.respond(reports, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
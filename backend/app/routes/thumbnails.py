@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
+from fastapi.responses import FileResponse
+from typing import Optional
+
+from app.services import thumbnail_service
+
+router = APIRouter(
+    prefix="/thumbnails",
+    tags=["thumbnails"],
+)
+
+@router.get("/{name}", response_class=FileResponse)
+async def get_thumbnail(
+    name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="Ancho deseado; se sirve el menor derivado que lo cubra")
+):
+    """Sirve un derivado WebP de una miniatura (público y cacheable indefinidamente)."""
+    resolved = thumbnail_service.resolve_file(name, w)
+    if resolved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Miniatura no encontrada"
+        )
+    path, width = resolved
+    # El contenido de cada nombre es inmutable: el ETag no necesita leer el archivo
+    etag = f'"{name[:-len(".webp")]}-{width}"'
+    headers = {"Cache-Control": thumbnail_service.CACHE_CONTROL, "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type="image/webp", headers=headers)
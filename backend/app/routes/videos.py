@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
 import json
-from app.schemas.video import VideoCreate, VideoResponse, VideoUpdate
+from app.config import settings
+from app.schemas.video import (VideoCreate, VideoResponse, VideoUpdate, SuggestionResponse, VideoEventBatch,
+                               VideoBatchResult)
 from app.schemas.response import StandardResponse
-from app.database import execute_procedure
+from app.database import execute_procedure, transaction, use_workload
+from app.services import (suggest_service, related_service, view_counter_service, video_batch_service,
+                          thumbnail_service, video_list_service, youtube_service, duplicate_service)
+from app.services.video_list_service import CACHED_VIDEO_FIELDS, VIDEO_FIELDS
 from app.utils.auth import get_current_user, any_role
 from app.utils.data_processor import process_video_data, process_single_video_data
+from app.utils.task_queue import background_queue
+from app.utils.shared_cache import shared_cache
 
 router = APIRouter(
     prefix="/videos",
@@ -15,39 +23,104 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=StandardResponse[VideoResponse], status_code=status.HTTP_201_CREATED)
-async def create_video(video: VideoCreate, current_user: dict = Depends(get_current_user)):
+def create_video(video: VideoCreate, current_user: dict = Depends(get_current_user)):
     """Crea un nuevo video en el sistema."""
     try:
         processed_tags = [str(tag) if isinstance(tag, int) else tag for tag in video.tags]
         tags_json = json.dumps(processed_tags)
-        execute_procedure(
-            "sp_create_video",
-            [video.user_id, video.title, video.youtube_link, video.description, 
-             video.type, 'activo', video.thumbnail, tags_json]
-        )
+        youtube_id = youtube_service.require_video_id(video.youtube_link)
+        # Se guarda la URL de los derivados y su marcador, no la imagen
+        thumbnail, placeholder = thumbnail_service.derive(video.thumbnail)
+        # El procedimiento inserta el video y sus etiquetas: todo o nada. El índice único
+        # de youtube_id rechaza el video si ya estaba registrado
+        with transaction():
+            result = execute_procedure(
+                "sp_create_video",
+                [video.user_id, video.title, video.youtube_link, youtube_id, video.description,
+                 video.type, 'activo', thumbnail, placeholder, tags_json]
+            )
+        shared_cache.invalidate("video")
+        video_id = result[0]["id"] if result else None
+        if video_id is not None:
+            suggest_service.index_video(
+                video_id, video.user_id, video.title, processed_tags,
+                current_user["username"] if current_user["id"] == video.user_id else None
+            )
+            # Comparación inmediata con el índice LSH: los casi duplicados aparecen en moderación
+            duplicate_service.index_video(video_id, video.title, video.description, processed_tags)
+            background_queue.enqueue(
+                related_service.refresh_video, video_id, video.user_id, processed_tags,
+                key=("related", video_id)
+            )
         return StandardResponse(
             data={
-                "id": 1,
+                "id": video_id,
                 **video.dict(),
+                "thumbnail": thumbnail,
+                "thumbnail_placeholder": placeholder,
                 "created_at": "2025-03-28T00:00:00",
                 "tags": processed_tags
             },
             message="SUCCESS"
         )
+    except HTTPException:
+        raise
     except Exception as e:
+        if youtube_service.is_duplicate(e):
+            raise youtube_service.duplicate_error(youtube_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error al crear video: {str(e)}"
         )
 
+@router.post("/batch", response_model=StandardResponse[VideoBatchResult], status_code=status.HTTP_201_CREATED,
+             openapi_extra={"requestBody": {"content": {
+                 "application/json": {"schema": {"type": "array", "items": VideoCreate.model_json_schema()}},
+                 "application/x-ndjson": {"schema": {"type": "string"}},
+             }}})
+async def create_videos_batch(request: Request, current_user: dict = Depends(get_current_user)):
+    """Crea varios videos a la vez desde una lista JSON o un flujo NDJSON (un video por línea)."""
+    items = await _read_batch(request)
+    result = await run_in_threadpool(video_batch_service.create_videos, items, current_user)
+    return StandardResponse(data=result, message="SUCCESS")
+
+async def _read_batch(request: Request) -> list:
+    """Lee el cuerpo como lista JSON o NDJSON sin superar el máximo de elementos del lote."""
+    try:
+        if "ndjson" not in request.headers.get("content-type", ""):
+            items = json.loads(await request.body())
+            if not isinstance(items, list):
+                raise ValueError("se esperaba una lista de videos")
+            return items
+
+        items, buffer = [], b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            items.extend(json.loads(line) for line in lines if line.strip())
+            if len(items) > settings.VIDEO_BATCH_MAX_ITEMS:
+                break
+        if buffer.strip():
+            items.append(json.loads(buffer))
+        return items
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cuerpo inválido: {str(e)}"
+        )
+
 @router.get("/", response_model=StandardResponse[List[VideoResponse]])
-async def get_videos():
+def get_videos(sort: str = Query("recent", pattern="^(recent|popular)$", description="Orden: recent o popular"),
+                     fields=Depends(CACHED_VIDEO_FIELDS.param)):
     """Obtiene la lista de todos los videos activos."""
     try:
-        videos = execute_procedure("sp_get_videos")
+        procedure_name = "sp_get_videos_popular" if sort == "popular" else "sp_get_videos"
         # Procesar los datos para convertir campos JSON en estructuras de Python
-        processed_videos = process_video_data(videos)
-        return StandardResponse(data=processed_videos, message="SUCCESS")
+        processed_videos = shared_cache.get_or_load(
+            "video", ("feed", sort), lambda: process_video_data(execute_procedure(procedure_name))
+        )
+        # La lista completa está en la caché compartida: los campos se recortan al responder
+        return CACHED_VIDEO_FIELDS.respond(processed_videos, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -56,15 +129,17 @@ async def get_videos():
 
 def get_all_videos_by_type(video_type: str):
     """Función auxiliar para obtener videos por tipo."""
-    videos = execute_procedure("sp_get_videos_by_type", [video_type])
-    return process_video_data(videos)
+    return shared_cache.get_or_load(
+        "video", ("type", video_type),
+        lambda: process_video_data(execute_procedure("sp_get_videos_by_type", [video_type]))
+    )
 
 @router.get("/live", response_model=StandardResponse[List[VideoResponse]])
-async def get_live_videos():
+def get_live_videos(fields=Depends(CACHED_VIDEO_FIELDS.param)):
     """Obtiene la lista de todos los videos en vivo activos."""
     try:
         videos = get_all_videos_by_type("en_vivo")
-        return StandardResponse(data=videos, message="SUCCESS")
+        return CACHED_VIDEO_FIELDS.respond(videos, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -72,35 +147,50 @@ async def get_live_videos():
         )
 
 @router.get("/recorded", response_model=StandardResponse[List[VideoResponse]])
-async def get_recorded_videos():
+def get_recorded_videos(fields=Depends(CACHED_VIDEO_FIELDS.param)):
     """Obtiene la lista de todos los videos grabados activos."""
     try:
         videos = get_all_videos_by_type("grabado")
-        return StandardResponse(data=videos, message="SUCCESS")
+        return CACHED_VIDEO_FIELDS.respond(videos, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener videos grabados: {str(e)}"
         )
 
-@router.get("/search", response_model=StandardResponse[List[VideoResponse]])
-async def search_videos(q: str = Query(..., description="Término de búsqueda")):
+@router.get("/search", response_model=StandardResponse[List[VideoResponse]], dependencies=[Depends(use_workload("search"))])
+def search_videos(q: str = Query(..., description="Término de búsqueda"), fields=Depends(VIDEO_FIELDS.param)):
     """Busca videos por título, canal o palabra clave."""
     try:
-        videos = execute_procedure("sp_search_videos", [q])
-        processed_videos = process_video_data(videos)
-        return StandardResponse(data=processed_videos, message="SUCCESS")
+        processed_videos = video_list_service.search_videos(q, fields)
+        return VIDEO_FIELDS.respond(processed_videos, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al buscar videos: {str(e)}"
         )
 
+@router.post("/events", response_model=StandardResponse, status_code=status.HTTP_202_ACCEPTED)
+async def record_video_events(batch: VideoEventBatch):
+    """Registra vistas e impresiones; se acumulan en memoria y se vuelcan por lotes."""
+    for event in batch.events:
+        view_counter_service.record(event.video_id, event.kind, event.count)
+    return StandardResponse(message="SUCCESS")
+
+@router.get("/suggest", response_model=StandardResponse[List[SuggestionResponse]])
+async def suggest_videos(
+    prefix: str = Query(..., min_length=1, description="Prefijo escrito por el usuario"),
+    k: Optional[int] = Query(None, ge=1, description="Número máximo de sugerencias")
+):
+    """Sugiere etiquetas, títulos y canales que empiezan por el prefijo (sin consultar MySQL)."""
+    suggestions = suggest_service.suggest(prefix, k)
+    return StandardResponse(data=suggestions, message="SUCCESS")
+
 @router.get("/tags", response_model=StandardResponse[List])
-async def get_video_tags():
+def get_video_tags():
     """Obtiene todas las categorías/etiquetas disponibles."""
     try:
-        tags = execute_procedure("sp_get_video_tags")
+        tags = shared_cache.get_or_load("video", ("tags",), lambda: execute_procedure("sp_get_video_tags"))
         print(tags)
         return StandardResponse(data=tags, message="SUCCESS")
     except Exception as e:
@@ -109,11 +199,37 @@ async def get_video_tags():
             detail=f"Error al obtener etiquetas: {str(e)}"
         )
 
+@router.get("/by-youtube/{youtube_id}", response_model=StandardResponse[VideoResponse])
+def get_video_by_youtube_id(
+    youtube_id: str = Path(..., pattern=youtube_service.VIDEO_ID_PATTERN, description="ID de 11 caracteres del video en YouTube"),
+    fields=Depends(CACHED_VIDEO_FIELDS.param)
+):
+    """Obtiene el video registrado con un ID de YouTube (búsqueda por índice único)."""
+    try:
+        video_details = shared_cache.get_or_load(
+            "video", ("youtube", youtube_id), lambda: execute_procedure("sp_get_video_by_youtube_id", [youtube_id])
+        )
+        if not video_details:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Video no encontrado"
+            )
+        return CACHED_VIDEO_FIELDS.respond(process_single_video_data(video_details[0]), fields)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener video: {str(e)}"
+        )
+
 @router.get("/{video_id}", response_model=StandardResponse[VideoResponse])
-async def get_video(video_id: int):
+def get_video(video_id: int, fields=Depends(CACHED_VIDEO_FIELDS.param)):
     """Obtiene los detalles de un video específico."""
     try:
-        video_details = execute_procedure("sp_get_video", [video_id])
+        video_details = shared_cache.get_or_load(
+            "video", ("video", video_id), lambda: execute_procedure("sp_get_video", [video_id])
+        )
         if not video_details:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -122,7 +238,7 @@ async def get_video(video_id: int):
         
         # Procesar los datos para convertir campos JSON en estructuras de Python
         processed_video = process_single_video_data(video_details[0])
-        return StandardResponse(data=processed_video, message="SUCCESS")
+        return CACHED_VIDEO_FIELDS.respond(processed_video, fields)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -131,13 +247,19 @@ async def get_video(video_id: int):
             detail=f"Error al obtener video: {str(e)}"
         )
 
+@router.get("/{video_id}/related", response_model=StandardResponse[List[VideoResponse]])
+def get_related_videos(video_id: int, k: Optional[int] = Query(None, ge=1, description="Número máximo de videos"),
+                             fields=Depends(CACHED_VIDEO_FIELDS.param)):
+    """Obtiene videos similares por etiquetas y creador (precalculados en segundo plano)."""
+    videos = related_service.get_related_videos(video_id, k)
+    return CACHED_VIDEO_FIELDS.respond(videos, fields)
+
 @router.get("/user/{user_id}", response_model=StandardResponse[List[VideoResponse]])
-async def get_videos_by_user(user_id: int):
+def get_videos_by_user(user_id: int, fields=Depends(VIDEO_FIELDS.param)):
     """Obtiene todos los videos de un usuario específico."""
     try:
-        videos = execute_procedure("sp_get_videos_by_user", [user_id])
-        processed_videos = process_video_data(videos)
-        return StandardResponse(data=processed_videos, message="SUCCESS")
+        processed_videos = video_list_service.get_videos_by_user(user_id, fields)
+        return VIDEO_FIELDS.respond(processed_videos, fields)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -145,54 +267,84 @@ async def get_videos_by_user(user_id: int):
         )
 
 @router.put("/{video_id}", response_model=StandardResponse[VideoResponse])
-async def update_video(video_id: int, video: VideoUpdate, current_user: dict = Depends(get_current_user)):
+def update_video(video_id: int, video: VideoUpdate, current_user: dict = Depends(get_current_user)):
     """Actualiza los datos de un video."""
     try:
-        # Verificar si el video existe
-        video_details = execute_procedure("sp_get_video", [video_id])
-        if not video_details:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Video no encontrado"
-            )
+        # La miniatura nueva se deriva antes de abrir la transacción: decodificar y codificar
+        # la imagen no debe ocupar la conexión ni retener los bloqueos de la comprobación.
+        # Crear un video ya permite derivar miniaturas a cualquier usuario autenticado
+        derived = None
+        if video.thumbnail is not None:
+            derived = thumbnail_service.derive(video.thumbnail)
+
+        # Comprobación y actualización (video y etiquetas) en una sola transacción
+        with transaction():
+            # Verificar si el video existe
+            video_details = execute_procedure("sp_get_video", [video_id])
+            if not video_details:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Video no encontrado"
+                )
         
-        # Verificar que el usuario sea el propietario del video o un administrador
-        if video_details[0]["user_id"] != current_user["id"] and current_user["role_id"] != 3:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para actualizar este video"
-            )
+            # Verificar que el usuario sea el propietario del video o un administrador
+            if video_details[0]["user_id"] != current_user["id"] and current_user["role_id"] != 3:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="No tienes permiso para actualizar este video"
+                )
         
-        # Preparar datos para actualizar
-        update_data = {}
-        for field, value in video.dict(exclude_unset=True).items():
-            if value is not None:
-                update_data[field] = value
+            # Preparar datos para actualizar
+            update_data = {}
+            for field, value in video.dict(exclude_unset=True).items():
+                if value is not None:
+                    update_data[field] = value
         
-        # Convertir tags a JSON si estu00e1n presentes
-        tags_json = None
-        if "tags" in update_data:
-            # Procesar las etiquetas para asegurar que sean del formato correcto
-            processed_tags = [str(tag) if isinstance(tag, int) else tag for tag in update_data["tags"]]
-            tags_json = json.dumps(processed_tags)
-            update_data["tags"] = processed_tags
+            # Convertir tags a JSON si estu00e1n presentes
+            tags_json = None
+            if "tags" in update_data:
+                # Procesar las etiquetas para asegurar que sean del formato correcto
+                processed_tags = [str(tag) if isinstance(tag, int) else tag for tag in update_data["tags"]]
+                tags_json = json.dumps(processed_tags)
+                update_data["tags"] = processed_tags
         
-        # Guardar el estado actual para asegurarnos de que podamos recuperar el video despuu00e9s de actualizar
-        current_status = video_details[0]["status"]
-        new_status = update_data.get("status", current_status)
+            # Guardar el estado actual para asegurarnos de que podamos recuperar el video despuu00e9s de actualizar
+            current_status = video_details[0]["status"]
+            new_status = update_data.get("status", current_status)
+
+            # Un enlace nuevo debe ser de YouTube; sin él se conserva el ID guardado (NULL)
+            youtube_id = None
+            if "youtube_link" in update_data:
+                youtube_id = youtube_service.require_video_id(update_data["youtube_link"])
+
+            thumbnail = video_details[0]["thumbnail"]
+            placeholder = video_details[0].get("thumbnail_placeholder")
+            if derived is not None:
+                thumbnail, placeholder = derived
         
-        # Actualizar video
-        execute_procedure(
-            "sp_update_video",
-            [video_id, 
-             update_data.get("title", video_details[0]["title"]), 
-             update_data.get("youtube_link", video_details[0]["youtube_link"]),
-             update_data.get("description", video_details[0]["description"]), 
-             update_data.get("type", video_details[0]["type"]),
-             new_status,
-             tags_json,
-             update_data.get("thumbnail", video_details[0]["thumbnail"])]
-        )
+            # Actualizar video
+            execute_procedure(
+                "sp_update_video",
+                [video_id, 
+                 update_data.get("title", video_details[0]["title"]), 
+                 update_data.get("youtube_link", video_details[0]["youtube_link"]),
+                 youtube_id,
+                 update_data.get("description", video_details[0]["description"]), 
+                 update_data.get("type", video_details[0]["type"]),
+                 new_status,
+                 tags_json,
+                 thumbnail,
+                 placeholder]
+            )
+        shared_cache.invalidate("video")
+        suggest_service.update_video(video_id, update_data.get("title"), update_data.get("tags"))
+        # Se reindexa con los datos guardados (las etiquetas pueden no venir en la petición)
+        background_queue.enqueue(duplicate_service.refresh_video, video_id, key=("duplicates", video_id))
+        if "tags" in update_data:
+            background_queue.enqueue(
+                related_service.refresh_video, video_id, video_details[0]["user_id"], update_data["tags"],
+                key=("related", video_id)
+            )
         
         # Construir manualmente el objeto de respuesta con los datos actualizados
         # ya que sp_get_video solo devuelve videos activos
@@ -204,7 +356,8 @@ async def update_video(video_id: int, video: VideoUpdate, current_user: dict = D
             "description": update_data.get("description", video_details[0]["description"]),
             "type": update_data.get("type", video_details[0]["type"]),
             "status": new_status,
-            "thumbnail": update_data.get("thumbnail", video_details[0]["thumbnail"]),
+            "thumbnail": thumbnail,
+            "thumbnail_placeholder": placeholder,
             "created_at": video_details[0]["created_at"],
             "tags": update_data.get("tags", [])
         }
@@ -213,32 +366,40 @@ async def update_video(video_id: int, video: VideoUpdate, current_user: dict = D
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
+        if youtube_service.is_duplicate(e):
+            raise youtube_service.duplicate_error(youtube_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al actualizar video: {str(e)}"
         )
 
 @router.delete("/{video_id}", response_model=StandardResponse)
-async def delete_video(video_id: int, current_user: dict = Depends(get_current_user)):
+def delete_video(video_id: int, current_user: dict = Depends(get_current_user)):
     """Elimina (marca como suspendido) un video."""
     try:
-        # Verificar si el video existe
-        video_details = execute_procedure("sp_get_video", [video_id])
-        if not video_details:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Video no encontrado"
-            )
+        # Comprobación y borrado en una sola transacción
+        with transaction():
+            # Verificar si el video existe
+            video_details = execute_procedure("sp_get_video", [video_id])
+            if not video_details:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Video no encontrado"
+                )
         
-        # Verificar que el usuario sea el propietario del video o un administrador
-        if video_details[0]["user_id"] != current_user["id"] and current_user["role_id"] != 3:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para eliminar este video"
-            )
+            # Verificar que el usuario sea el propietario del video o un administrador
+            if video_details[0]["user_id"] != current_user["id"] and current_user["role_id"] != 3:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="No tienes permiso para eliminar este video"
+                )
         
-        # Eliminar video (marcar como suspendido)
-        execute_procedure("sp_delete_video", [video_id])
+            # Eliminar video (marcar como suspendido)
+            execute_procedure("sp_delete_video", [video_id])
+        shared_cache.invalidate("video")
+        suggest_service.remove_video(video_id)
+        related_service.remove_video(video_id)
+        duplicate_service.remove_video(video_id)
         
         return StandardResponse(message="SUCCESS")
     except Exception as e:
@@ -19,6 +19,7 @@ class AlbumInDB(AlbumBase):
     id: int
     user_id: int
     created_at: datetime
+    thumbnail_placeholder: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -1,4 +1,4 @@
-from typing import TypeVar, Generic, Optional, Any
+from typing import TypeVar, Generic, Optional, Any, List
 from pydantic import BaseModel
 
 T = TypeVar('T')
@@ -10,3 +10,24 @@ class StandardResponse(BaseModel, Generic[T]):
     
     class Config:
         from_attributes = True
+
+class Page(BaseModel, Generic[T]):
+    """Página de resultados de una lista paginada."""
+    items: List[T] = []
+    total: int = 0
+    total_is_estimate: bool = False  # True si el total viene de la estimación de filas de InnoDB
+    page: int = 1
+    page_size: int = 50
+
+class BulkItemResult(BaseModel):
+    """Resultado de un elemento en una operación por lotes."""
+    id: Any
+    status: str  # updated, unchanged, not_found, forbidden, error
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    """Resultado de una operación por lotes."""
+    processed: int = 0
+    updated: int = 0
+    failed: int = 0
+    results: List[BulkItemResult] = []
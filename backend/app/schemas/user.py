@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import List, Optional
+from app.schemas.response import BulkItemResult
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -47,3 +48,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+
+class UserImportResult(BaseModel):
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[BulkItemResult] = []  # id = número de fila en el archivo
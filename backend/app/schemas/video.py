@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 from datetime import datetime
+from app.schemas.response import BulkItemResult
 
 class VideoBase(BaseModel):
     title: str
@@ -27,6 +28,7 @@ class VideoInDB(VideoBase):
     id: int
     user_id: int
     created_at: datetime
+    thumbnail_placeholder: Optional[str] = None  # data URI diminuto mientras carga la miniatura
     creator_username: Optional[str] = None
     
     class Config:
@@ -34,3 +36,35 @@ class VideoInDB(VideoBase):
 
 class VideoResponse(VideoInDB):
     tags: Optional[List[str]] = None
+    views: Optional[int] = None
+    impressions: Optional[int] = None
+
+class ModerationVideoResponse(VideoResponse):
+    report_count: int = 0
+    duplicate_cluster: Optional[int] = None  # grupo de casi duplicados detectado por duplicate_service
+
+class DuplicateClusterResponse(BaseModel):
+    id: int
+    size: int
+    video_ids: List[int]
+    videos: List[VideoResponse] = []  # muestra de los videos activos del grupo
+
+class SuggestionResponse(BaseModel):
+    text: str
+    kind: str  # tag, title, channel
+    score: int
+
+class VideoEvent(BaseModel):
+    video_id: int
+    kind: Literal["view", "impression"] = "view"
+    count: int = Field(1, ge=1, le=1000)
+
+class VideoEventBatch(BaseModel):
+    events: List[VideoEvent] = Field(..., max_length=1000)
+
+class VideoBatchResult(BaseModel):
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    ids: List[int] = []  # IDs creados, en el orden del lote
+    errors: List[BulkItemResult] = []  # id = posición en el lote (desde 0)
@@ -1,19 +1,112 @@
 from fastapi import HTTPException, status
-from app.database import execute_procedure
+from datetime import datetime
+from app.database import execute_batch, execute_procedure, transaction
+from app.schemas.user import UserResponse
+from app.services import moderation_service
 from app.utils.auth import get_password_hash
-from typing import Optional
+from app.utils.pagination import PageParams, build_page, count_cache, fetch_page, page_query, resolve_sort
+from app.utils.data_processor import escape_like, unique_ids, build_bulk_result
+from app.utils.fields import FieldSet
+from app.utils.shared_cache import shared_cache
+from typing import List, Optional, Tuple
 
-def get_all_users():
-    """Obtiene la lista de todos los usuarios."""
+USER_SORTS = {
+    "created_at": "created_at",
+    "username": "username",
+    "last_login": "last_login",
+    "id": "id",
+}
+
+# Sin profile_picture ni password_hash: la lista nunca los devuelve
+USER_FIELDS = FieldSet(UserResponse, {
+    name: name for name in
+    ("id", "username", "email", "first_name", "last_name", "role_id", "status", "last_login", "created_at")
+})
+
+def get_users_page(params: PageParams, status_value: Optional[str] = None, role_id: Optional[int] = None,
+                   q: Optional[str] = None, created_from: Optional[datetime] = None,
+                   created_to: Optional[datetime] = None, fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene una página de usuarios con filtros, orden de la lista blanca y solo los campos pedidos."""
     try:
-        users = execute_procedure("sp_get_users")
-        return users
+        conditions, args = [], []
+        if status_value:
+            conditions.append("status = %s")
+            args.append(status_value)
+        if role_id is not None:
+            conditions.append("role_id = %s")
+            args.append(role_id)
+        if q:
+            # Búsqueda por prefijo para poder usar los índices únicos de username y email
+            conditions.append("(username LIKE %s OR email LIKE %s)")
+            args.extend([f"{escape_like(q)}%", f"{escape_like(q)}%"])
+        if created_from:
+            conditions.append("created_at >= %s")
+            args.append(created_from)
+        if created_to:
+            conditions.append("created_at < %s")
+            args.append(created_to)
+
+        order_by = resolve_sort(params, USER_SORTS, "created_at", "id")
+        users = fetch_page(USER_FIELDS.select(fields), "user", conditions, args, order_by, params)
+        total = count_cache.count("user", "user", conditions, args)
+        return build_page(users, total, params)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener usuarios: {str(e)}"
         )
 
+def get_overview(page_size: int):
+    """
+    Primera página de usuarios, de videos activos para moderación y de reportes pendientes.
+
+    Las tres páginas y los totales filtrados que no estén en caché se piden en un solo
+    lote de consultas (una ida y vuelta). El total de usuarios, sin filtros, sale de la
+    caché o de la estimación de InnoDB como en la lista de usuarios.
+    """
+    try:
+        params = PageParams(page=1, page_size=page_size, sort=None, order="desc")
+        # (clave, tabla, FROM del total, condiciones, argumentos, consulta de la página)
+        lists = [
+            ("users", "user", "user", [], [],
+             page_query(USER_FIELDS.select(), "user", [], [],
+                        resolve_sort(params, USER_SORTS, "created_at", "id"), params)),
+            ("videos", "video", "video v", ["v.status = %s"], ["activo"],
+             page_query(moderation_service.VIDEO_FIELDS.select(), moderation_service.VIDEO_PAGE_FROM,
+                        ["v.status = %s"], ["activo"],
+                        resolve_sort(params, moderation_service.VIDEO_SORTS,
+                                     moderation_service.DEFAULT_VIDEO_SORT, "v.id"), params)),
+            ("reports", "report", "report r", ["r.status = %s"], ["pendiente"],
+             page_query(moderation_service.REPORT_FIELDS.select(), moderation_service.REPORT_PAGE_FROM,
+                        ["r.status = %s"], ["pendiente"],
+                        resolve_sort(params, moderation_service.REPORT_SORTS,
+                                     moderation_service.DEFAULT_REPORT_SORT, "r.id"), params)),
+        ]
+        statements = [page for *_, page in lists]
+        missing_totals = [
+            entry for entry in lists
+            if entry[3] and count_cache.cached(entry[1], entry[2], entry[3], entry[4]) is None
+        ]
+        statements += [(count_cache.count_query(entry[2], entry[3]), entry[4]) for entry in missing_totals]
+
+        results = execute_batch(statements)
+        for (_, table, from_clause, conditions, args, _), rows in zip(missing_totals, results[len(lists):]):
+            count_cache.store(table, from_clause, conditions, args, (int(rows[0]["total"]), False))
+
+        return {
+            key: build_page(items, count_cache.count(table, from_clause, conditions, args), params)
+            for (key, table, from_clause, conditions, args, _), items in zip(lists, results)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener el resumen de administración: {str(e)}"
+        )
+
 def change_user_role(user_id: int, role_id: int):
     """Cambia el rol de un usuario."""
     try:
@@ -27,6 +120,7 @@ def change_user_role(user_id: int, role_id: int):
         
         # Cambiar rol
         execute_procedure("sp_change_role", [user_id, role_id])
+        count_cache.invalidate("user")
         
         # Obtener los detalles actualizados
         updated_user = execute_procedure("sp_get_user_details_by_id", [user_id])
@@ -59,6 +153,7 @@ def change_user_status(user_id: int, status_value: str):
         
         # Cambiar estado
         execute_procedure("sp_change_status", [user_id, status_value])
+        count_cache.invalidate("user")
         
         # Obtener los detalles actualizados
         updated_user = execute_procedure("sp_get_user_details_by_id", [user_id])
@@ -71,6 +166,51 @@ def change_user_status(user_id: int, status_value: str):
             detail=f"Error al cambiar estado del usuario: {str(e)}"
         )
 
+def update_users(user_ids: List[int], status_value: Optional[str] = None, role_id: Optional[int] = None):
+    """Cambia el estado y/o el rol de varios usuarios en una sola transacción."""
+    if status_value is None and role_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar un estado o un rol"
+        )
+    try:
+        user_ids = unique_ids(user_ids)
+        results = {}
+        with transaction() as cursor:
+            cursor.execute("SELECT id, role_id, status FROM user WHERE id IN %s FOR UPDATE", [user_ids])
+            current = {row["id"]: row for row in cursor.fetchall()}
+
+            for user_id in user_ids:
+                user = current.get(user_id)
+                if user is None:
+                    results[user_id] = {"id": user_id, "status": "not_found", "detail": "Usuario no encontrado"}
+                elif status_value is not None and user["role_id"] == 3:
+                    results[user_id] = {
+                        "id": user_id, "status": "forbidden",
+                        "detail": "No se puede cambiar el estado de un administrador"
+                    }
+                elif ((status_value is None or user["status"] == status_value)
+                      and (role_id is None or user["role_id"] == role_id)):
+                    results[user_id] = {"id": user_id, "status": "unchanged"}
+                else:
+                    results[user_id] = {"id": user_id, "status": "updated"}
+
+            to_update = [user_id for user_id, result in results.items() if result["status"] == "updated"]
+            if to_update and status_value is not None:
+                cursor.execute("UPDATE user SET status = %s WHERE id IN %s", [status_value, to_update])
+            if to_update and role_id is not None:
+                cursor.execute("UPDATE user SET role_id = %s WHERE id IN %s", [role_id, to_update])
+
+        count_cache.invalidate("user")
+        return build_bulk_result([results[user_id] for user_id in user_ids])
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al actualizar usuarios: {str(e)}"
+        )
+
 def delete_user(user_id: int):
     """Elimina un usuario del sistema."""
     try:
@@ -91,6 +231,7 @@ def delete_user(user_id: int):
         
         # Eliminar usuario (en este caso, marcar como suspendido)
         execute_procedure("sp_change_status", [user_id, "suspendido"])
+        count_cache.invalidate("user")
         
         return {"message": "Usuario eliminado correctamente"}
     except Exception as e:
@@ -117,6 +258,7 @@ def reset_user_password(user_id: int, new_password: str):
         
         # Actualizar contraseu00f1a
         execute_procedure("sp_update_password_hash", [user_id, new_password_hash])
+        shared_cache.invalidate("user")
         
         return {"message": "Contraseu00f1a restablecida correctamente"}
     except Exception as e:
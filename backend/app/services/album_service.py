@@ -1,11 +1,32 @@
 from fastapi import HTTPException, status
-from app.database import execute_procedure
-from app.schemas.album import AlbumCreate, AlbumUpdate
+from typing import Optional, Tuple
+from app.database import execute_procedure, execute_query, transaction
+from app.schemas.album import AlbumCreate, AlbumUpdate, AlbumResponse
 from app.schemas.response import StandardResponse
+from app.services import thumbnail_service, video_list_service
+from app.utils.fields import FieldSet
 
-def get_albums_by_user(user_id: int):
-    """Obtiene todos los álbumes de un usuario específico."""
+ALBUM_FIELDS = FieldSet(AlbumResponse, {
+    "id": "a.id",
+    "user_id": "a.user_id",
+    "title": "a.title",
+    "description": "a.description",
+    "thumbnail": "a.thumbnail",
+    "thumbnail_placeholder": "a.thumbnail_placeholder",
+    "created_at": "a.created_at",
+    "video_count": """IFNULL((SELECT COUNT(*) FROM album_video_map avm
+            JOIN video v ON avm.video_id = v.id
+            WHERE avm.album_id = a.id AND v.status = 'activo'), 0)""",
+})
+
+def get_albums_by_user(user_id: int, fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene todos los álbumes de un usuario específico, con todos los campos o solo los pedidos."""
     try:
+        if fields is not None:
+            return execute_query(
+                f"SELECT {ALBUM_FIELDS.select(fields)} FROM album a WHERE a.user_id = %s AND a.status = 'activo'",
+                [user_id]
+            )
         albums = execute_procedure("sp_get_album_by_user_id", [user_id])
         return albums
     except Exception as e:
@@ -35,26 +56,33 @@ def get_album_by_id(album_id: int):
 def create_album(user_id: int, album: AlbumCreate):
     """Crea un nuevo álbum."""
     try:
-        execute_procedure("sp_create_album", [user_id, album.title])
+        # La miniatura se procesa antes de abrir la transacción
+        thumbnail, placeholder = thumbnail_service.derive(album.thumbnail)
+
+        # Creación y actualización de datos en una sola transacción
+        with transaction():
+            execute_procedure("sp_create_album", [user_id, album.title])
         
-        # Obtener el álbum recién creado (asumimos que es el último creado por el usuario)
-        albums = get_albums_by_user(user_id)
-        if not albums:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error al crear álbum"
-            )
+            # Obtener el álbum recién creado (asumimos que es el último creado por el usuario)
+            albums = get_albums_by_user(user_id)
+            if not albums:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error al crear álbum"
+                )
         
-        # Actualizar descripción y thumbnail si se proporcionaron
-        if album.description or album.thumbnail:
-            latest_album = albums[-1]  # El último álbum creado
-            execute_procedure(
-                "sp_update_album",
-                [latest_album["id"], album.title, album.description or "", album.thumbnail or ""]
-            )
-            return get_album_by_id(latest_album["id"])
+            # Actualizar descripción y thumbnail si se proporcionaron
+            if album.description or album.thumbnail:
+                latest_album = albums[-1]  # El último álbum creado
+                execute_procedure(
+                    "sp_update_album",
+                    [latest_album["id"], album.title, album.description or "", thumbnail or "", placeholder]
+                )
+                return get_album_by_id(latest_album["id"])
         
-        return albums[-1]
+            return albums[-1]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -75,12 +103,14 @@ def update_album(album_id: int, album: AlbumUpdate, user_id: int):
         # Preparar datos para actualizar
         title = album.title if album.title is not None else current_album["title"]
         description = album.description if album.description is not None else current_album["description"]
-        thumbnail = album.thumbnail if album.thumbnail is not None else current_album["thumbnail"]
+        thumbnail, placeholder = current_album["thumbnail"], current_album.get("thumbnail_placeholder")
+        if album.thumbnail is not None:
+            thumbnail, placeholder = thumbnail_service.derive(album.thumbnail)
         
         # Actualizar álbum
         execute_procedure(
             "sp_update_album",
-            [album_id, title, description, thumbnail]
+            [album_id, title, description, thumbnail, placeholder]
         )
         
         # Obtener los detalles actualizados
@@ -159,10 +189,10 @@ def remove_video_from_album(album_id: int, video_id: int, user_id: int):
             detail=f"Error al quitar video del álbum: {str(e)}"
         )
 
-def get_videos_by_album(album_id: int):
-    """Obtiene todos los videos de un álbum."""
+def get_videos_by_album(album_id: int, fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene todos los videos de un álbum, con todos los campos o solo los pedidos."""
     try:
-        videos = execute_procedure("sp_get_videos_by_album_id", [album_id])
+        videos = video_list_service.get_videos_by_album(album_id, fields)
         return videos
     except Exception as e:
         raise HTTPException(
@@ -5,6 +5,7 @@ from passlib.context import CryptContext
 from app.config import settings
 from app.schemas.user import UserCreate, UserResponse, TokenData
 from app.database import execute_procedure
+from app.utils.task_queue import background_queue
 
 # Configuración de seguridad
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -44,8 +45,15 @@ def authenticate_user(username: str, password: str):
         if not password_match:
             return False
         
-        # Actualizar último inicio de sesión
-        execute_procedure("sp_update_last_login", [user["id"], datetime.now(timezone.utc)])
+        # Actualizar último inicio de sesión en segundo plano (solo cuenta la última escritura por usuario)
+        last_login = [user["id"], datetime.now(timezone.utc)]
+        if not background_queue.enqueue(
+            execute_procedure, "sp_update_last_login", last_login,
+            key=("last_login", user["id"])
+        ):
+            # Cola llena o detenida: escribirlo aquí para no perder el inicio de sesión
+            print(f"Cola en segundo plano no disponible; actualizando last_login de {username} directamente")
+            execute_procedure("sp_update_last_login", last_login)
         
         return user
     except Exception as e:
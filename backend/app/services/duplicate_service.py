@@ -0,0 +1,390 @@
+import json
+import threading
+import time
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from app.config import settings
+from app.database import execute_procedure
+from app.utils.data_processor import process_video_data
+from app.utils.minhash import band_keys, estimated_similarity, make_permutations, shingle_hashes, signatures
+from app.utils.pagination import PageParams, build_page
+
+if settings.DUPLICATE_NUM_PERM % settings.DUPLICATE_BANDS:
+    raise ValueError("DUPLICATE_NUM_PERM debe ser múltiplo de DUPLICATE_BANDS")
+
+_A, _B = make_permutations(settings.DUPLICATE_NUM_PERM)
+_MULTIPLIERS = make_permutations(settings.DUPLICATE_NUM_PERM // settings.DUPLICATE_BANDS, seed=2)[0]
+_EMPTY_SIGNATURE = np.iinfo(np.uint32).max
+
+CLUSTER_SORTS = ("size", "id")
+
+# Snapshot de la última reconstrucción: firmas y, por banda, claves ordenadas para searchsorted
+_snapshot = {
+    "video_ids": np.zeros(0, dtype=np.int64),
+    "signatures": np.zeros((0, settings.DUPLICATE_NUM_PERM), dtype=np.uint32),
+    "keys": np.zeros((settings.DUPLICATE_BANDS, 0), dtype=np.uint64),
+    "rows": np.zeros((settings.DUPLICATE_BANDS, 0), dtype=np.int64),
+    "built_at": None,
+}
+# Cambios desde el snapshot: videos indexados después (con sus cubos) y filas del snapshot obsoletas
+_recent: Dict[int, Tuple[np.ndarray, np.ndarray, int]] = {}  # video -> (firma, claves, secuencia)
+_buckets: Dict[Tuple[int, int], Set[int]] = {}  # (banda, clave) -> videos recientes
+_stale: Dict[int, int] = {}  # video -> secuencia
+# Grupos de casi duplicados: el id de cada grupo es su menor id de video al reconstruir, y se
+# conserva en los cambios incrementales para no reetiquetar a todos sus miembros (aunque ese
+# video salga del grupo). Los grupos creados después toman ids nuevos de `_next_cluster_id`
+_cluster_of: Dict[int, int] = {}
+_clusters: Dict[int, Set[int]] = {}
+_next_cluster_id = 1
+_sequence = 0
+_lock = threading.Lock()
+_stop = threading.Event()
+_refresh_requested = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def document_signatures(videos: List[dict]) -> np.ndarray:
+    """Firmas MinHash de título, descripción y etiquetas de varios videos a la vez."""
+    return signatures(
+        [shingle_hashes(_document(video), settings.DUPLICATE_SHINGLE_SIZE) for video in videos], _A, _B
+    )
+
+
+def rebuild():
+    """
+    Reconstruye el índice LSH y los grupos de casi duplicados desde la base de datos.
+
+    Los pares candidatos son videos consecutivos dentro del mismo cubo de alguna banda
+    (así un cubo de n copias aporta n-1 pares, no n²); los que superan el umbral de
+    similitud estimada se unen en componentes conexas.
+    """
+    global _next_cluster_id
+    with _lock:
+        started = _sequence
+    videos = process_video_data(execute_procedure("sp_get_video_index_data"))
+
+    signature_rows = np.empty((len(videos), settings.DUPLICATE_NUM_PERM), dtype=np.uint32)
+    batch_size = settings.DUPLICATE_BATCH_SIZE
+    for start in range(0, len(videos), batch_size):
+        if _stop.is_set():
+            return
+        signature_rows[start:start + batch_size] = document_signatures(videos[start:start + batch_size])
+    video_ids = np.array([video["id"] for video in videos], dtype=np.int64)
+
+    # Los videos sin texto no se indexan: todas sus firmas coinciden
+    indexed = np.flatnonzero((signature_rows != _EMPTY_SIGNATURE).any(axis=1))
+    keys = band_keys(signature_rows[indexed], settings.DUPLICATE_BANDS, _MULTIPLIERS).T
+    order = np.argsort(keys, axis=1, kind="stable")
+    sorted_keys = np.take_along_axis(keys, order, axis=1)
+    sorted_rows = indexed[order]
+    clusters = _find_clusters(sorted_keys, sorted_rows, signature_rows, video_ids)
+
+    with _lock:
+        _snapshot.update(
+            video_ids=video_ids, signatures=signature_rows, keys=sorted_keys, rows=sorted_rows,
+            built_at=time.time()
+        )
+        # Se conservan los cambios posteriores al inicio de la lectura y se aplican encima
+        recent = {video_id: entry for video_id, entry in _recent.items() if entry[2] > started}
+        stale = {video_id: sequence for video_id, sequence in _stale.items() if sequence > started}
+        _recent.clear()
+        _buckets.clear()
+        _stale.clear()
+        _stale.update(stale)
+        _cluster_of.clear()
+        _clusters.clear()
+        for members in clusters:
+            _set_cluster(members)
+        # Por encima de cualquier id de video del snapshot, que son los ids de sus grupos
+        _next_cluster_id = max(_next_cluster_id, int(video_ids.max()) + 1 if len(video_ids) else 1)
+        for video_id in stale:
+            _detach(video_id)
+        for video_id, (signature, video_keys, sequence) in recent.items():
+            _add_recent(video_id, signature, video_keys, sequence)
+            _assign(video_id, _matches(video_id, signature, video_keys))
+
+
+def index_video(video_id: int, title: str, description: Optional[str], tags: Optional[List[str]] = None) -> Optional[int]:
+    """Indexa un video creado o editado y devuelve el grupo de casi duplicados al que pertenece."""
+    return index_videos([{"id": video_id, "title": title, "description": description, "tags": tags}])[0]
+
+
+def index_videos(videos: List[dict]) -> List[Optional[int]]:
+    """
+    Indexa varios videos (firmas calculadas en bloque) y devuelve el grupo de cada uno.
+
+    Cada video se compara con el snapshot (una búsqueda binaria por banda) y con los
+    indexados después; si se parece a alguno se une a su grupo o se crea uno nuevo.
+    """
+    global _sequence
+    signature_rows = document_signatures(videos)
+    all_keys = band_keys(signature_rows, settings.DUPLICATE_BANDS, _MULTIPLIERS)
+    clusters = []
+    with _lock:
+        for video, signature, video_keys in zip(videos, signature_rows, all_keys):
+            _sequence += 1
+            video_id = video["id"]
+            _remove_recent(video_id)
+            _stale[video_id] = _sequence
+            _detach(video_id)
+            if (signature == _EMPTY_SIGNATURE).all():
+                clusters.append(None)
+                continue
+            _add_recent(video_id, signature, video_keys, _sequence)
+            _assign(video_id, _matches(video_id, signature, video_keys))
+            clusters.append(_cluster_of.get(video_id))
+        pending = len(_recent)
+    # Los recientes se buscan en un diccionario: se consolidan en el snapshot si crecen demasiado
+    if pending > settings.DUPLICATE_MAX_RECENT:
+        _refresh_requested.set()
+    return clusters
+
+
+def refresh_video(video_id: int):
+    """Reindexa un video editado con sus datos actuales (o lo quita si ya no está activo)."""
+    videos = process_video_data(execute_procedure("sp_get_video_by_id", [video_id]))
+    if videos:
+        index_videos(videos)
+    else:
+        remove_video(video_id)
+
+
+def remove_video(video_id: int):
+    """Quita un video eliminado o suspendido del índice y de su grupo."""
+    global _sequence
+    with _lock:
+        _sequence += 1
+        _remove_recent(video_id)
+        _stale[video_id] = _sequence
+        _detach(video_id)
+
+
+def get_clusters(video_ids: List[int]) -> Dict[int, int]:
+    """Grupo de casi duplicados de los videos que pertenecen a uno."""
+    with _lock:
+        return {video_id: _cluster_of[video_id] for video_id in video_ids if video_id in _cluster_of}
+
+
+def get_clusters_page(params: PageParams):
+    """
+    Página de grupos de casi duplicados, por defecto los más grandes primero.
+
+    Cada grupo incluye todos sus ids (para suspenderlos con /admin/videos/bulk-suspend) y
+    una muestra de sus videos activos.
+    """
+    key = params.sort or "size"
+    if key not in CLUSTER_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campo de orden no permitido: {key}. Opciones: {', '.join(CLUSTER_SORTS)}"
+        )
+    with _lock:
+        clusters = [(cluster_id, sorted(members)) for cluster_id, members in _clusters.items()]
+    clusters.sort(key=(lambda item: (len(item[1]), item[0])) if key == "size" else (lambda item: item[0]),
+                  reverse=params.order == "desc")
+    selected = clusters[params.offset:params.offset + params.page_size]
+
+    sample_ids = [video_id for _, members in selected for video_id in members[:settings.DUPLICATE_CLUSTER_SAMPLE]]
+    try:
+        videos = process_video_data(
+            execute_procedure("sp_get_videos_by_ids", [json.dumps(sample_ids)])
+        ) if sample_ids else []
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener videos duplicados: {str(e)}"
+        )
+    by_id = {video["id"]: video for video in videos}
+    items = [
+        {
+            "id": cluster_id,
+            "size": len(members),
+            "video_ids": members,
+            "videos": [by_id[video_id] for video_id in members[:settings.DUPLICATE_CLUSTER_SAMPLE] if video_id in by_id],
+        }
+        for cluster_id, members in selected
+    ]
+    return build_page(items, (len(clusters), False), params)
+
+
+def get_metrics():
+    """Tamaño del índice y de los grupos detectados."""
+    with _lock:
+        return {
+            "indexed": int(_snapshot["rows"].shape[1]),
+            "recent": len(_recent),
+            "stale": len(_stale),
+            "clusters": len(_clusters),
+            "clustered_videos": len(_cluster_of),
+            "built_at": _snapshot["built_at"],
+        }
+
+
+def start_background_refresh():
+    """Arranca el job que construye el índice y lo reconstruye periódicamente."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    _refresh_requested.set()
+    _worker = threading.Thread(target=_run, name="duplicate-refresh", daemon=True)
+    _worker.start()
+
+
+def stop_background_refresh():
+    """Detiene el job de reconstrucción."""
+    _stop.set()
+    _refresh_requested.set()
+    if _worker is not None:
+        _worker.join(timeout=5)
+
+
+def _run():
+    while not _stop.is_set():
+        _refresh_requested.wait(timeout=settings.DUPLICATE_REFRESH_SECONDS)
+        if _stop.is_set():
+            return
+        _refresh_requested.clear()
+        try:
+            rebuild()
+        except Exception as e:
+            print(f"Error al reconstruir el índice de duplicados: {e}")
+        _stop.wait(timeout=settings.DUPLICATE_MIN_REBUILD_INTERVAL_SECONDS)
+
+
+def _document(video: dict) -> str:
+    tags = " ".join(sorted(str(tag) for tag in video.get("tags") or []))
+    return f"{video.get('title') or ''} {video.get('description') or ''} {tags}"
+
+
+def _find_clusters(sorted_keys: np.ndarray, sorted_rows: np.ndarray, signature_rows: np.ndarray,
+                   video_ids: np.ndarray) -> List[Set[int]]:
+    """Grupos (ids de video) de las componentes conexas de pares consecutivos similares."""
+    left, right = [], []
+    for band in range(sorted_keys.shape[0]):
+        same = np.flatnonzero(sorted_keys[band, 1:] == sorted_keys[band, :-1])
+        left.append(sorted_rows[band, same])
+        right.append(sorted_rows[band, same + 1])
+    left, right = np.concatenate(left), np.concatenate(right)
+    if len(left) == 0:
+        return []
+    # Un mismo par puede repetirse en varias bandas
+    n = len(video_ids)
+    pairs = np.unique(np.minimum(left, right) * n + np.maximum(left, right))
+    left, right = pairs // n, pairs % n
+
+    similar = np.zeros(len(pairs), dtype=bool)
+    step = max(1, 4_000_000 // settings.DUPLICATE_NUM_PERM)
+    for start in range(0, len(pairs), step):
+        chunk = slice(start, start + step)
+        similar[chunk] = (
+            (signature_rows[left[chunk]] == signature_rows[right[chunk]]).mean(axis=1) >= settings.DUPLICATE_THRESHOLD
+        )
+    left, right = left[similar], right[similar]
+    if len(left) == 0:
+        return []
+
+    graph = sparse.coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    rows = np.unique(np.concatenate([left, right]))
+    groups: Dict[int, Set[int]] = {}
+    for row in rows:
+        groups.setdefault(int(labels[row]), set()).add(int(video_ids[row]))
+    return [members for members in groups.values() if len(members) >= 2]
+
+
+def _matches(video_id: int, signature: np.ndarray, video_keys: np.ndarray) -> List[int]:
+    """Videos indexados con similitud estimada por encima del umbral (con el lock tomado)."""
+    limit = settings.DUPLICATE_MAX_CANDIDATES
+    rows = []
+    for band, key in enumerate(video_keys):
+        band_keys_sorted = _snapshot["keys"][band]
+        start = np.searchsorted(band_keys_sorted, key, side="left")
+        end = np.searchsorted(band_keys_sorted, key, side="right")
+        # En un cubo enorme (una oleada de copias) basta con unos pocos para unirse al grupo
+        rows.append(_snapshot["rows"][band, start:min(end, start + limit)])
+    matches = set()
+    rows = np.unique(np.concatenate(rows))
+    if len(rows):
+        similarity = estimated_similarity(signature, _snapshot["signatures"][rows])
+        matches.update(
+            int(other) for other in _snapshot["video_ids"][rows[similarity >= settings.DUPLICATE_THRESHOLD]]
+            if other not in _stale
+        )
+
+    candidates = set()
+    for band, key in enumerate(video_keys):
+        candidates.update(islice(_buckets.get((band, int(key)), ()), limit))
+    candidates.discard(video_id)
+    if candidates:
+        candidates = list(candidates)
+        similarity = estimated_similarity(signature, np.stack([_recent[other][0] for other in candidates]))
+        matches.update(other for other, value in zip(candidates, similarity) if value >= settings.DUPLICATE_THRESHOLD)
+    matches.discard(video_id)
+    return list(matches)
+
+
+def _add_recent(video_id: int, signature: np.ndarray, video_keys: np.ndarray, sequence: int):
+    _recent[video_id] = (signature, video_keys, sequence)
+    for band, key in enumerate(video_keys):
+        _buckets.setdefault((band, int(key)), set()).add(video_id)
+
+
+def _remove_recent(video_id: int):
+    previous = _recent.pop(video_id, None)
+    if previous is None:
+        return
+    for band, key in enumerate(previous[1]):
+        bucket = _buckets.get((band, int(key)))
+        if bucket is not None:
+            bucket.discard(video_id)
+            if not bucket:
+                del _buckets[(band, int(key))]
+
+
+def _assign(video_id: int, matches: List[int]):
+    """Une el video y sus coincidencias en un grupo; los grupos menores se vuelcan en el mayor."""
+    global _next_cluster_id
+    if not matches:
+        return
+    groups = {_cluster_of[other] for other in matches if other in _cluster_of}
+    if groups:
+        target = max(groups, key=lambda cluster_id: len(_clusters[cluster_id]))
+    else:
+        # El menor id de video puede ser todavía el id de un grupo del que ya salió
+        target = _next_cluster_id
+        _next_cluster_id += 1
+        _clusters[target] = set()
+    members = _clusters[target]
+    for cluster_id in groups - {target}:
+        for other in _clusters.pop(cluster_id):
+            members.add(other)
+            _cluster_of[other] = target
+    for other in (video_id, *matches):
+        if other not in members:
+            members.add(other)
+            _cluster_of[other] = target
+
+
+def _detach(video_id: int):
+    """Saca un video de su grupo; un grupo que se queda con uno solo desaparece."""
+    cluster_id = _cluster_of.pop(video_id, None)
+    if cluster_id is None:
+        return
+    members = _clusters[cluster_id]
+    members.discard(video_id)
+    if len(members) < 2:
+        for other in _clusters.pop(cluster_id):
+            _cluster_of.pop(other, None)
+
+
+def _set_cluster(members: Set[int]):
+    cluster_id = min(members)
+    _clusters[cluster_id] = members
+    for video_id in members:
+        _cluster_of[video_id] = cluster_id
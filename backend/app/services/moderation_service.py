@@ -1,13 +1,97 @@
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
-from app.database import execute_procedure
+from app.database import execute_procedure, execute_query, transaction
+from app.services import suggest_service, related_service, duplicate_service
+from app.schemas.report import ReportResponse
+from app.schemas.video import ModerationVideoResponse
+from app.services.video_list_service import VIDEO_COLUMNS
+from app.utils.data_processor import escape_like, unique_ids, build_bulk_result
+from app.utils.fields import FieldSet
+from app.utils.pagination import PageParams, build_page, count_cache, fetch_page, resolve_sort
 
-def get_all_videos():
-    """Obtiene la lista de todos los videos para moderación."""
+_REPORT_COUNT = "(SELECT COUNT(*) FROM report r WHERE r.video_id = v.id AND r.status = 'pendiente')"
+
+VIDEO_SORTS = {
+    "created_at": "v.created_at",
+    "title": "v.title",
+    # Expresión completa: el alias solo existe si report_count está entre los campos pedidos
+    "report_count": (_REPORT_COUNT, "v.created_at"),
+    "id": "v.id",
+}
+
+REPORT_SORTS = {
+    "pending": ("r.status = 'pendiente'", "r.created_at"),
+    "created_at": "r.created_at",
+    "resolved_at": "r.resolved_at",
+    "id": "r.id",
+}
+
+# Orden por defecto del panel: primero los videos más reportados y los reportes pendientes
+DEFAULT_VIDEO_SORT = "report_count"
+DEFAULT_REPORT_SORT = "pending"
+
+# Campos de la lista de moderación: los de las listas públicas sin etiquetas, más creador y reportes
+VIDEO_FIELDS = FieldSet(ModerationVideoResponse, {
+    **{name: column for name, column in VIDEO_COLUMNS.items() if name != "tags"},
+    "creator_username": "COALESCE(u.username, 'Usuario eliminado')",
+    "report_count": _REPORT_COUNT,
+})
+VIDEO_PAGE_FROM = "video v LEFT JOIN user u ON v.user_id = u.id"
+
+REPORT_FIELDS = FieldSet(ReportResponse, {
+    "id": "r.id",
+    "video_id": "r.video_id",
+    "user_id": "r.user_id",
+    "reason": "r.reason",
+    "description": "r.description",
+    "status": "r.status",
+    "created_at": "r.created_at",
+    "resolved_at": "r.resolved_at",
+    "video_title": "v.title",
+    "reporter_username": "u.username",
+})
+REPORT_PAGE_FROM = "report r JOIN video v ON r.video_id = v.id JOIN user u ON r.user_id = u.id"
+
+def get_videos_page(params: PageParams, status_value: Optional[str] = "activo", video_type: Optional[str] = None,
+                    user_id: Optional[int] = None, q: Optional[str] = None, has_reports: Optional[bool] = None,
+                    created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                    fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene una página de videos para moderación con filtros, orden de la lista blanca y solo los campos pedidos."""
     try:
-        videos = execute_procedure("sp_get_all_videos_for_moderation")
-        return videos
+        conditions, args = [], []
+        if status_value:
+            conditions.append("v.status = %s")
+            args.append(status_value)
+        if video_type:
+            conditions.append("v.type = %s")
+            args.append(video_type)
+        if user_id is not None:
+            conditions.append("v.user_id = %s")
+            args.append(user_id)
+        if q:
+            conditions.append("v.title LIKE %s")
+            args.append(f"{escape_like(q)}%")
+        if has_reports is not None:
+            exists = "EXISTS (SELECT 1 FROM report r WHERE r.video_id = v.id AND r.status = 'pendiente')"
+            conditions.append(exists if has_reports else f"NOT {exists}")
+        if created_from:
+            conditions.append("v.created_at >= %s")
+            args.append(created_from)
+        if created_to:
+            conditions.append("v.created_at < %s")
+            args.append(created_to)
+
+        order_by = resolve_sort(params, VIDEO_SORTS, DEFAULT_VIDEO_SORT, "v.id")
+        videos = fetch_page(VIDEO_FIELDS.select(fields), VIDEO_PAGE_FROM, conditions, args, order_by, params)
+        # Marca de los videos que el índice LSH agrupó como casi duplicados
+        clusters = duplicate_service.get_clusters([video["id"] for video in videos])
+        for video in videos:
+            video["duplicate_cluster"] = clusters.get(video["id"])
+        total = count_cache.count("video", "video v", conditions, args)
+        return build_page(videos, total, params)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -27,6 +111,10 @@ def delete_video(video_id: int):
         
         # Marcar el video como eliminado por incumplimiento
         execute_procedure("sp_delete_video_by_admin", [video_id, "suspendido"])
+        suggest_service.remove_video(video_id)
+        related_service.remove_video(video_id)
+        duplicate_service.remove_video(video_id)
+        count_cache.invalidate("video", "report")
         
         return {"message": "Video eliminado correctamente por incumplimiento"}
     except Exception as e:
@@ -37,17 +125,53 @@ def delete_video(video_id: int):
             detail=f"Error al eliminar video: {str(e)}"
         )
 
-def get_all_reports():
-    """Obtiene la lista de todos los reportes de abuso."""
+def get_reports_page(params: PageParams, status_value: Optional[str] = None, video_id: Optional[int] = None,
+                     reporter_id: Optional[int] = None, q: Optional[str] = None,
+                     created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                     fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene una página de reportes de abuso con filtros, orden de la lista blanca y solo los campos pedidos."""
     try:
-        reports = execute_procedure("sp_get_all_reports")
-        return reports
+        conditions, args = [], []
+        if status_value:
+            conditions.append("r.status = %s")
+            args.append(status_value)
+        if video_id is not None:
+            conditions.append("r.video_id = %s")
+            args.append(video_id)
+        if reporter_id is not None:
+            conditions.append("r.user_id = %s")
+            args.append(reporter_id)
+        if q:
+            conditions.append("r.reason LIKE %s")
+            args.append(f"{escape_like(q)}%")
+        if created_from:
+            conditions.append("r.created_at >= %s")
+            args.append(created_from)
+        if created_to:
+            conditions.append("r.created_at < %s")
+            args.append(created_to)
+
+        order_by = resolve_sort(params, REPORT_SORTS, DEFAULT_REPORT_SORT, "r.id")
+        reports = fetch_page(REPORT_FIELDS.select(fields), REPORT_PAGE_FROM, conditions, args, order_by, params)
+        total = count_cache.count("report", "report r", conditions, args)
+        return build_page(reports, total, params)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener reportes: {str(e)}"
         )
 
+def get_user_reports(user_id: int, fields: Optional[Tuple[str, ...]] = None):
+    """Obtiene los reportes creados por un usuario, con todos los campos o solo los pedidos."""
+    if fields is None:
+        return execute_procedure("sp_get_user_reports", [user_id])
+    return execute_query(
+        f"SELECT {REPORT_FIELDS.select(fields)} FROM {REPORT_PAGE_FROM} WHERE r.user_id = %s ORDER BY r.created_at DESC",
+        [user_id]
+    )
+
 def resolve_report(report_id: int):
     """Marca un reporte como resuelto."""
     try:
@@ -61,6 +185,7 @@ def resolve_report(report_id: int):
         
         # Marcar el reporte como resuelto
         execute_procedure("sp_resolve_report", [report_id])
+        count_cache.invalidate("report")
         
         # Obtener el reporte actualizado
         updated_report = execute_procedure("sp_get_report", [report_id])
@@ -72,3 +197,75 @@ def resolve_report(report_id: int):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al resolver reporte: {str(e)}"
         )
+
+def suspend_videos(video_ids: List[int]):
+    """Suspende varios videos y resuelve sus reportes pendientes en una sola transacción."""
+    try:
+        video_ids = unique_ids(video_ids)
+        with transaction() as cursor:
+            cursor.execute("SELECT id, status FROM video WHERE id IN %s FOR UPDATE", [video_ids])
+            current = {row["id"]: row["status"] for row in cursor.fetchall()}
+            to_suspend = [video_id for video_id in video_ids if current.get(video_id) not in (None, "suspendido")]
+            if to_suspend:
+                cursor.execute("UPDATE video SET status = 'suspendido' WHERE id IN %s", [to_suspend])
+                cursor.execute(
+                    """UPDATE report SET status = 'resuelto', resolved_at = CURRENT_TIMESTAMP
+                       WHERE video_id IN %s AND status = 'pendiente'""",
+                    [to_suspend]
+                )
+
+        # Invalidar una sola vez por lote
+        for video_id in to_suspend:
+            suggest_service.remove_video(video_id)
+            related_service.remove_video(video_id)
+            duplicate_service.remove_video(video_id)
+        count_cache.invalidate("video", "report")
+
+        results = []
+        for video_id in video_ids:
+            if video_id not in current:
+                results.append({"id": video_id, "status": "not_found", "detail": "Video no encontrado"})
+            elif video_id in to_suspend:
+                results.append({"id": video_id, "status": "updated"})
+            else:
+                results.append({"id": video_id, "status": "unchanged", "detail": "El video ya estaba suspendido"})
+        return build_bulk_result(results)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al suspender videos: {str(e)}"
+        )
+
+def resolve_reports(report_ids: List[int]):
+    """Marca varios reportes como resueltos en una sola transacción."""
+    try:
+        report_ids = unique_ids(report_ids)
+        with transaction() as cursor:
+            cursor.execute("SELECT id, status FROM report WHERE id IN %s FOR UPDATE", [report_ids])
+            current = {row["id"]: row["status"] for row in cursor.fetchall()}
+            to_resolve = [report_id for report_id in report_ids if current.get(report_id) == "pendiente"]
+            if to_resolve:
+                cursor.execute(
+                    "UPDATE report SET status = 'resuelto', resolved_at = CURRENT_TIMESTAMP WHERE id IN %s",
+                    [to_resolve]
+                )
+        count_cache.invalidate("report")
+
+        results = []
+        for report_id in report_ids:
+            if report_id not in current:
+                results.append({"id": report_id, "status": "not_found", "detail": "Reporte no encontrado"})
+            elif report_id in to_resolve:
+                results.append({"id": report_id, "status": "updated"})
+            else:
+                results.append({"id": report_id, "status": "unchanged", "detail": "El reporte ya estaba resuelto"})
+        return build_bulk_result(results)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al resolver reportes: {str(e)}"
+        )
@@ -2,6 +2,7 @@ from fastapi import HTTPException, status
 from app.database import execute_procedure
 from app.schemas.user import UserUpdateProfile
 from app.utils.auth import get_password_hash, verify_password
+from app.utils.shared_cache import shared_cache
 from typing import Optional
 
 def get_profile(user_id: int):
@@ -52,6 +53,7 @@ def update_profile(user_id: int, profile_data: UserUpdateProfile):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=result[0]["message"]
             )
+        shared_cache.invalidate("user")
         # Obtener los detalles actualizados
         return get_profile(user_id)
     except Exception as e:
@@ -70,7 +72,7 @@ def update_profile_picture(user_id: int, profile_picture: str):
         
         # Actualizar foto de perfil
         execute_procedure("sp_update_profile_picture", [user_id, profile_picture])
-
+        shared_cache.invalidate("user")
         
         # Obtener los detalles actualizados
         return get_profile(user_id)
@@ -107,6 +109,7 @@ def change_password(user_id: int, current_password: str, new_password: str):
         
         # Actualizar contraseu00f1a
         execute_procedure("sp_update_password_hash", [user_id, new_password_hash])
+        shared_cache.invalidate("user")
         
         return {"message": "Contraseu00f1a actualizada correctamente"}
     except Exception as e:
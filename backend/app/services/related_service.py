@@ -0,0 +1,181 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from app.config import settings
+from app.database import execute_procedure
+from app.utils.data_processor import process_video_data
+from app.utils.tag_similarity import build_tag_matrix, top_k_neighbours, vectorize
+
+# Snapshot de la matriz video×etiqueta y de los vecinos precalculados
+_state = {
+    "matrix_t": None,
+    "idf": None,
+    "video_ids": None,
+    "user_ids": None,
+    "rows": {},
+    "vocabulary": {},
+}
+_neighbours: Dict[int, List[dict]] = {}
+_lock = threading.Lock()
+_stop = threading.Event()
+_refresh_requested = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def rebuild():
+    """Reconstruye la matriz desde la base de datos y recalcula los vecinos de todos los videos."""
+    videos = process_video_data(execute_procedure("sp_get_video_index_data"))
+
+    vocabulary: Dict[str, int] = {}
+    video_rows, tag_cols = [], []
+    for row, video in enumerate(videos):
+        for tag in set(video.get("tags") or []):
+            video_rows.append(row)
+            tag_cols.append(vocabulary.setdefault(str(tag), len(vocabulary)))
+
+    video_ids = np.array([video["id"] for video in videos], dtype=np.int64)
+    user_ids = np.array([video["user_id"] for video in videos], dtype=np.int64)
+    matrix, idf = build_tag_matrix(
+        np.array(video_rows, dtype=np.int64), np.array(tag_cols, dtype=np.int64),
+        len(videos), len(vocabulary), settings.RELATED_MAX_TAG_DF, settings.RELATED_MIN_DF_ABS
+    )
+    matrix_t = matrix.T.tocsr()
+
+    neighbours: Dict[int, List[dict]] = {}
+    batch_size = settings.RELATED_BATCH_SIZE
+    for start in range(0, len(videos), batch_size):
+        if _stop.is_set():
+            return
+        rows = np.arange(start, min(start + batch_size, len(videos)))
+        batch = top_k_neighbours(
+            matrix[rows], matrix_t, user_ids[rows], user_ids,
+            settings.RELATED_TOP_K, settings.RELATED_CREATOR_BOOST, query_rows=rows
+        )
+        for row, found in zip(rows, batch):
+            neighbours[int(video_ids[row])] = _to_entries(found, video_ids)
+
+    with _lock:
+        _state.update(
+            matrix_t=matrix_t,
+            idf=idf,
+            video_ids=video_ids,
+            user_ids=user_ids,
+            rows={int(video_id): row for row, video_id in enumerate(video_ids)},
+            vocabulary=vocabulary,
+        )
+        _neighbours.clear()
+        _neighbours.update(neighbours)
+
+
+def refresh_video(video_id: int, user_id: int, tags: List[str]):
+    """
+    Recalcula los vecinos de un video creado o editado contra la matriz actual.
+
+    Además lo inserta en las listas de sus nuevos vecinos (la similitud es simétrica), con
+    un coste acotado por `RELATED_TOP_K`; los videos que no están entre sus vecinos se
+    ponen al día en la reconstrucción periódica. Solo se solicita una reconstrucción
+    inmediata cuando el video trae etiquetas que aún no están en el vocabulario.
+    """
+    with _lock:
+        matrix_t, idf = _state["matrix_t"], _state["idf"]
+        video_ids, user_ids = _state["video_ids"], _state["user_ids"]
+        vocabulary = _state["vocabulary"]
+        self_row = _state["rows"].get(video_id, -1)
+    if matrix_t is None:
+        return
+
+    tags = {str(tag) for tag in tags or []}
+    if not tags <= vocabulary.keys():
+        _refresh_requested.set()
+
+    cols = [vocabulary[tag] for tag in tags if tag in vocabulary]
+    found = top_k_neighbours(
+        vectorize(cols, idf), matrix_t, np.array([user_id]), user_ids,
+        settings.RELATED_TOP_K, settings.RELATED_CREATOR_BOOST,
+        query_rows=np.array([self_row])
+    )[0]
+    entries = _to_entries(found, video_ids)
+    with _lock:
+        _neighbours[video_id] = entries
+        for entry in entries:
+            _insert_entry(_neighbours.setdefault(entry["id"], []), video_id, entry["score"])
+
+
+def remove_video(video_id: int):
+    """Descarta los vecinos de un video eliminado o suspendido."""
+    # Las listas de otros videos que lo incluyen se filtran al leer (sp_get_videos_by_ids
+    # solo devuelve videos activos) y se limpian en la siguiente reconstrucción
+    with _lock:
+        _neighbours.pop(video_id, None)
+
+
+def get_related_videos(video_id: int, k: Optional[int] = None):
+    """Obtiene los videos relacionados precalculados para un video."""
+    k = min(k or settings.RELATED_TOP_K, settings.RELATED_TOP_K)
+    with _lock:
+        entries = list(_neighbours.get(video_id, []))[:k]
+    if not entries:
+        return []
+
+    try:
+        videos = process_video_data(
+            execute_procedure("sp_get_videos_by_ids", [json.dumps([entry["id"] for entry in entries])])
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener videos relacionados: {str(e)}"
+        )
+
+    # Conservar el orden por puntuación
+    by_id = {video["id"]: video for video in videos}
+    return [by_id[entry["id"]] for entry in entries if entry["id"] in by_id]
+
+
+def start_background_refresh():
+    """Arranca el job que precalcula los vecinos y los refresca periódicamente."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    _refresh_requested.set()
+    _worker = threading.Thread(target=_run, name="related-refresh", daemon=True)
+    _worker.start()
+
+
+def stop_background_refresh():
+    """Detiene el job de precálculo."""
+    _stop.set()
+    _refresh_requested.set()
+    if _worker is not None:
+        _worker.join(timeout=5)
+
+
+def _run():
+    while not _stop.is_set():
+        _refresh_requested.wait(timeout=settings.RELATED_REFRESH_SECONDS)
+        if _stop.is_set():
+            return
+        _refresh_requested.clear()
+        try:
+            rebuild()
+        except Exception as e:
+            print(f"Error al recalcular videos relacionados: {e}")
+        # Agrupar las ediciones recientes en la siguiente reconstrucción
+        _stop.wait(timeout=settings.RELATED_MIN_REBUILD_INTERVAL_SECONDS)
+
+
+def _insert_entry(entries: List[dict], video_id: int, score: float):
+    """Coloca `video_id` con su puntuación en una lista de vecinos ordenada, sin pasar de top-k."""
+    entries[:] = [entry for entry in entries if entry["id"] != video_id]
+    position = next((i for i, entry in enumerate(entries) if entry["score"] < score), len(entries))
+    if position < settings.RELATED_TOP_K:
+        entries.insert(position, {"id": video_id, "score": score})
+        del entries[settings.RELATED_TOP_K:]
+
+
+def _to_entries(found, video_ids) -> List[dict]:
+    return [{"id": int(video_ids[row]), "score": round(score, 4)} for row, score in found]
@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.database import execute_procedure
+from app.utils.data_processor import process_video_data
+from app.utils.prefix_trie import PrefixTrie
+from app.utils.shared_cache import shared_cache
+
+# Tries de sugerencias: etiquetas por uso, títulos por número de videos, canales por número de videos
+_tags = PrefixTrie(top_k=settings.SUGGEST_MAX_RESULTS, max_depth=50)
+_titles = PrefixTrie(top_k=settings.SUGGEST_MAX_RESULTS, max_depth=24)
+_channels = PrefixTrie(top_k=settings.SUGGEST_MAX_RESULTS, max_depth=50)
+
+# Estado indexado por video para poder aplicar actualizaciones incrementales
+_videos: Dict[int, dict] = {}
+_usernames: Dict[int, str] = {}
+_lock = threading.Lock()
+_loaded = False
+_stop = threading.Event()
+_worker: Optional[threading.Thread] = None
+
+
+def load_index():
+    """Construye los tries de sugerencias a partir de los videos activos."""
+    global _loaded
+    videos = process_video_data(execute_procedure("sp_get_video_index_data"))
+
+    tag_counts: Dict[str, int] = {}
+    title_counts: Dict[str, int] = {}
+    channel_counts: Dict[str, int] = {}
+    indexed: Dict[int, dict] = {}
+    usernames: Dict[int, str] = {}
+
+    for video in videos:
+        entry = _make_entry(video["user_id"], video["title"], video.get("tags"))
+        indexed[video["id"]] = entry
+        title_counts[entry["title"]] = title_counts.get(entry["title"], 0) + 1
+        for tag in entry["tags"]:
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        if video.get("creator_username"):
+            usernames[video["user_id"]] = video["creator_username"]
+            channel_counts[video["creator_username"]] = channel_counts.get(video["creator_username"], 0) + 1
+
+    with _lock:
+        _tags.build(tag_counts.items())
+        _titles.build(title_counts.items())
+        _channels.build(channel_counts.items())
+        _videos.clear()
+        _videos.update(indexed)
+        _usernames.clear()
+        _usernames.update(usernames)
+        _loaded = True
+
+
+def start_background_refresh():
+    """Arranca el job que carga el índice y lo mantiene al día con el resto de workers."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    _worker = threading.Thread(target=_run, name="suggest-refresh", daemon=True)
+    _worker.start()
+
+
+def stop_background_refresh():
+    """Detiene el job de recarga."""
+    _stop.set()
+    if _worker is not None:
+        _worker.join(timeout=5)
+
+
+def index_video(video_id: int, user_id: int, title: str, tags: Optional[List[str]] = None,
+                creator_username: Optional[str] = None):
+    """Indexa (o reindexa) un video creado o actualizado."""
+    shared_cache.invalidate("suggest")
+    if not _loaded:
+        return
+    with _lock:
+        _remove_entry(video_id)
+        if creator_username:
+            _usernames[user_id] = creator_username
+        entry = _make_entry(user_id, title, tags)
+        _videos[video_id] = entry
+        _titles.add(entry["title"])
+        for tag in entry["tags"]:
+            _tags.add(tag)
+        if user_id in _usernames:
+            _channels.add(_usernames[user_id])
+
+
+def update_video(video_id: int, title: Optional[str] = None, tags: Optional[List[str]] = None):
+    """Aplica los cambios de título o etiquetas de un video ya indexado."""
+    shared_cache.invalidate("suggest")
+    if not _loaded:
+        return
+    with _lock:
+        current = _videos.get(video_id)
+    if current is None:
+        return
+    index_video(
+        video_id,
+        current["user_id"],
+        title if title is not None else current["title"],
+        tags if tags is not None else current["tags"],
+    )
+
+
+def remove_video(video_id: int):
+    """Quita un video eliminado o suspendido del índice."""
+    shared_cache.invalidate("suggest")
+    if not _loaded:
+        return
+    with _lock:
+        _remove_entry(video_id)
+
+
+def suggest(prefix: str, k: Optional[int] = None):
+    """Devuelve las sugerencias para un prefijo, ordenadas por popularidad."""
+    # Mientras el job en segundo plano construye el índice no hay sugerencias
+    if not _loaded:
+        return []
+
+    k = min(k or settings.SUGGEST_MAX_RESULTS, settings.SUGGEST_MAX_RESULTS)
+    suggestions = []
+    for kind, trie in (("tag", _tags), ("title", _titles), ("channel", _channels)):
+        suggestions.extend(
+            {"text": text, "kind": kind, "score": score}
+            for text, score in trie.search(prefix, k)
+        )
+    suggestions.sort(key=lambda item: (-item["score"], item["text"]))
+    return suggestions[:k]
+
+
+def _run():
+    # Los cambios hechos en otros workers solo se ven aquí a través de la versión compartida
+    # "suggest" (no "video", que cambia con cada volcado de vistas); sin caché compartida
+    # queda la recarga periódica
+    loaded_version, loaded_at = None, 0.0
+    while not _stop.is_set():
+        version = shared_cache.version("suggest")
+        if version != loaded_version or time.monotonic() - loaded_at >= settings.SUGGEST_REFRESH_SECONDS:
+            try:
+                load_index()
+                loaded_version, loaded_at = version, time.monotonic()
+            except Exception as e:
+                print(f"Error al cargar sugerencias: {e}")
+        _stop.wait(timeout=settings.SUGGEST_SYNC_SECONDS)
+
+
+def _make_entry(user_id: int, title: str, tags: Optional[List[str]]) -> dict:
+    return {
+        "user_id": user_id,
+        "title": title,
+        # Las etiquetas numéricas son IDs, no nombres sugeribles
+        "tags": sorted({str(tag) for tag in (tags or []) if not str(tag).isdigit()}),
+    }
+
+
+def _remove_entry(video_id: int):
+    previous = _videos.pop(video_id, None)
+    if previous is None:
+        return
+    _titles.add(previous["title"], -1)
+    for tag in previous["tags"]:
+        _tags.add(tag, -1)
+    if previous["user_id"] in _usernames:
+        _channels.add(_usernames[previous["user_id"]], -1)
@@ -0,0 +1,261 @@
+import base64
+import binascii
+import hashlib
+import io
+import json
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.config import settings
+from app.database import execute_query, execute_update
+from app.utils.shared_cache import shared_cache
+
+# Prefijo de las URLs que guarda la base de datos en lugar de la imagen
+URL_PREFIX = "/thumbnails/"
+# Cabeceras de los derivados: el nombre es el hash del contenido, nunca cambian
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+WIDTHS = sorted({int(width) for width in settings.THUMBNAIL_WIDTHS.split(",") if width.strip()})
+
+_DATA_URI = re.compile(r"^data:image/[\w.+-]+;base64,", re.IGNORECASE)
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Pool de procesos para decodificar y redimensionar imágenes sin bloquear a los workers."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS or os.cpu_count())
+    return _render_pool
+
+
+def shutdown_render_pool():
+    """Libera los procesos del pool de miniaturas."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True, cancel_futures=True)
+        _render_pool = None
+
+
+def derive(value: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Convierte el valor recibido en el campo thumbnail en (url, marcador de posición).
+
+    Un data URI se decodifica y se guarda como derivados WebP en disco, direccionados
+    por el SHA-256 de la imagen original: subir dos veces la misma imagen no repite el
+    trabajo. Una URL propia (/thumbnails/...) conserva su marcador y cualquier otro
+    enlace se guarda tal cual, sin marcador.
+    """
+    result = derive_many([value])[0]
+    if isinstance(result, HTTPException):
+        raise result
+    return result
+
+
+def derive_many(values: List[Optional[str]]) -> List[Union[Tuple[Optional[str], Optional[str]], HTTPException]]:
+    """Como `derive` para varios valores a la vez; los errores se devuelven en su posición."""
+    results: list = [None] * len(values)
+    pending: Dict[str, List[int]] = {}  # hash -> posiciones con esa imagen
+    images: Dict[str, bytes] = {}
+    for position, value in enumerate(values):
+        if not value:
+            results[position] = (None, None)
+            continue
+        digest = digest_from_url(value)
+        if digest is not None:
+            results[position] = (value, _placeholder(digest))
+            continue
+        if not _DATA_URI.match(value):
+            results[position] = (value, None)
+            continue
+        try:
+            data = _decode(value)
+        except HTTPException as e:
+            results[position] = e
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        placeholder = _placeholder(digest)
+        if placeholder is not None:
+            results[position] = (f"{URL_PREFIX}{digest}.webp", placeholder)
+        else:
+            pending.setdefault(digest, []).append(position)
+            images[digest] = data
+
+    # Cada imagen distinta se procesa una sola vez, todas en paralelo en el pool
+    futures = {
+        digest: get_render_pool().submit(
+            render, data, _directory(digest), digest, WIDTHS, settings.THUMBNAIL_QUALITY,
+            settings.THUMBNAIL_PLACEHOLDER_WIDTH, settings.THUMBNAIL_MAX_PIXELS
+        )
+        for digest, data in images.items()
+    }
+    for digest, future in futures.items():
+        try:
+            outcome = (f"{URL_PREFIX}{digest}.webp", future.result())
+        except ValueError as e:
+            outcome = HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Miniatura inválida: {str(e)}"
+            )
+        for position in pending[digest]:
+            results[position] = outcome
+    return results
+
+
+def render(data: bytes, directory: str, digest: str, widths: List[int], quality: int,
+           placeholder_width: int, max_pixels: int) -> str:
+    """Escribe los derivados WebP de una imagen y devuelve su marcador (se ejecuta en el pool)."""
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with warnings.catch_warnings():
+            # Por encima de max_pixels se rechaza en lugar de solo avisar
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            with Image.open(io.BytesIO(data)) as original:
+                image = ImageOps.exif_transpose(original)
+    except UnidentifiedImageError:
+        raise ValueError("formato de imagen no reconocido")
+    except (OSError, Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        # Errores de la imagen recibida (los de disco, al escribir, no se convierten)
+        raise ValueError(str(e))
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    # Anchos configurados menores que el original y el original limitado al mayor: sin ampliar
+    targets = sorted({width for width in widths if width < image.width} | {min(image.width, max(widths))})
+    os.makedirs(directory, exist_ok=True)
+    for width in targets:
+        resized = image if width == image.width else image.resize(
+            (width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        _write(os.path.join(directory, f"{digest}-{width}.webp"),
+               lambda file: resized.save(file, "WEBP", quality=quality, method=4))
+
+    tiny = image.resize(
+        (placeholder_width, max(1, round(image.height * placeholder_width / image.width))),
+        Image.Resampling.BILINEAR, reducing_gap=2.0
+    )
+    buffer = io.BytesIO()
+    tiny.save(buffer, "WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+    # El índice se escribe al final: su presencia indica que los derivados están completos
+    _write(os.path.join(directory, f"{digest}.json"),
+           lambda file: file.write(json.dumps({"widths": targets, "placeholder": placeholder}).encode()))
+    return placeholder
+
+
+def resolve_file(name: str, width: Optional[int] = None) -> Optional[Tuple[str, int]]:
+    """
+    Ruta y ancho del derivado que corresponde a `<hash>.webp` para el ancho pedido.
+
+    Se sirve el menor derivado de al menos `width` píxeles (o el mayor si ninguno llega);
+    sin ancho, el mayor.
+    """
+    digest = name[:-len(".webp")] if name.endswith(".webp") else None
+    if digest is None or not _DIGEST.match(digest):
+        return None
+    index = _index(digest)
+    if index is None:
+        return None
+    widths = index["widths"]
+    chosen = next((candidate for candidate in widths if width is not None and candidate >= width), widths[-1])
+    return os.path.join(_directory(digest), f"{digest}-{chosen}.webp"), chosen
+
+
+def digest_from_url(value: str) -> Optional[str]:
+    """Hash de una URL de miniatura propia, o None si es otro valor."""
+    if not value.startswith(URL_PREFIX) or not value.endswith(".webp"):
+        return None
+    digest = value[len(URL_PREFIX):-len(".webp")]
+    return digest if _DIGEST.match(digest) else None
+
+
+def backfill(batch_size: Optional[int] = None) -> dict:
+    """
+    Convierte las miniaturas guardadas como data URI en videos y álbumes existentes.
+
+    Recorre cada tabla por id en bloques y actualiza cada fila solo si su miniatura no
+    cambió entretanto. Las imágenes que no se pueden decodificar se dejan como están.
+    """
+    batch_size = batch_size or settings.THUMBNAIL_BACKFILL_BATCH_SIZE
+    result = {"video": 0, "album": 0, "failed": 0}
+    for table in ("video", "album"):
+        last_id = 0
+        while True:
+            rows = execute_query(
+                f"SELECT id, thumbnail FROM {table} WHERE id > %s AND thumbnail LIKE 'data:%%' "
+                f"ORDER BY id LIMIT %s",
+                [last_id, batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            for row, outcome in zip(rows, derive_many([row["thumbnail"] for row in rows])):
+                if isinstance(outcome, HTTPException):
+                    print(f"Miniatura de {table} {row['id']} no convertida: {outcome.detail}")
+                    result["failed"] += 1
+                    continue
+                url, placeholder = outcome
+                result[table] += execute_update(
+                    f"UPDATE {table} SET thumbnail = %s, thumbnail_placeholder = %s WHERE id = %s AND thumbnail = %s",
+                    [url, placeholder, row["id"], row["thumbnail"]]
+                )
+    if result["video"]:
+        shared_cache.invalidate("video")
+    print(f"Miniaturas convertidas: {result}")
+    return result
+
+
+def _decode(value: str) -> bytes:
+    try:
+        data = base64.b64decode(value[value.index(",") + 1:], validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Miniatura inválida: base64 mal formado"
+        )
+    if len(data) > settings.THUMBNAIL_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La miniatura no puede superar los {settings.THUMBNAIL_MAX_BYTES} bytes"
+        )
+    return data
+
+
+def _directory(digest: str) -> str:
+    # Un subdirectorio por los dos primeros caracteres del hash para no llenar uno solo
+    return os.path.join(settings.THUMBNAIL_DIR, digest[:2])
+
+
+def _placeholder(digest: str) -> Optional[str]:
+    index = _index(digest)
+    return index["placeholder"] if index is not None else None
+
+
+@lru_cache(maxsize=4096)
+def _cached_index(digest: str) -> dict:
+    with open(os.path.join(_directory(digest), f"{digest}.json"), "rb") as file:
+        return json.load(file)
+
+
+def _index(digest: str) -> Optional[dict]:
+    # El contenido de un hash no cambia: solo se cachean los índices que existen
+    try:
+        return _cached_index(digest)
+    except FileNotFoundError:
+        return None
+
+
+def _write(path: str, write):
+    """Escribe en un temporal y lo renombra: nunca se sirve un archivo a medias."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        write(file)
+    os.replace(temporary, path)
@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import pymysql
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.config import settings
+from app.database import execute_query, transaction
+from app.schemas.user import UserCreate
+from app.utils.auth import get_password_hash
+from app.utils.pagination import count_cache
+
+_INSERT_USER = """INSERT INTO user (username, email, password_hash, first_name, last_name, role_id)
+                  VALUES (%s, %s, %s, %s, %s, %s)"""
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Pool de procesos para calcular hashes bcrypt en paralelo (uno por núcleo por defecto)."""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.IMPORT_HASH_WORKERS or os.cpu_count())
+    return _hash_pool
+
+
+def shutdown_hash_pool():
+    """Libera los procesos del pool de hashing."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=True, cancel_futures=True)
+        _hash_pool = None
+
+
+def import_users(file: BinaryIO, file_format: str):
+    """
+    Importa usuarios desde un archivo CSV o NDJSON.
+
+    Las filas se validan a medida que se leen y se procesan en bloques: los hashes de
+    contraseña se calculan en paralelo en un pool de procesos y cada bloque se inserta
+    con una sentencia de varias filas. Las filas con errores (validación, duplicados en
+    el archivo o en la base de datos) se informan sin detener la importación.
+    """
+    result = {"processed": 0, "created": 0, "failed": 0, "errors": []}
+    seen_usernames, seen_emails = set(), set()
+
+    try:
+        chunk: List[Tuple[int, UserCreate]] = []
+        for row_number, row in _read_rows(file, file_format):
+            result["processed"] += 1
+            user = _validate_row(row_number, row, result)
+            if user is None:
+                continue
+
+            username, email = user.username.lower(), user.email.lower()
+            if username in seen_usernames or email in seen_emails:
+                _add_error(result, row_number, "Username o email repetido en el archivo")
+                continue
+            seen_usernames.add(username)
+            seen_emails.add(email)
+
+            chunk.append((row_number, user))
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                _import_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            _import_chunk(chunk, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al importar usuarios: {str(e)}"
+        )
+    finally:
+        if result["created"]:
+            count_cache.invalidate("user")
+
+    return result
+
+
+def _read_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, dict]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                # Las celdas vacías se tratan como ausentes
+                yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, "")}
+            return
+
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, {"__error__": f"JSON inválido: {e.msg}"}
+    finally:
+        # No cerrar el archivo subido: lo gestiona FastAPI
+        text.detach()
+
+
+def _validate_row(row_number: int, row: dict, result: dict) -> Optional[UserCreate]:
+    if not isinstance(row, dict):
+        _add_error(result, row_number, "Cada fila debe ser un objeto")
+        return None
+    if "__error__" in row:
+        _add_error(result, row_number, row["__error__"])
+        return None
+    try:
+        user = UserCreate(**row)
+    except ValidationError as e:
+        details = "; ".join(f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors())
+        _add_error(result, row_number, details)
+        return None
+    if user.role_id not in (1, 2, 3):
+        _add_error(result, row_number, f"role_id inválido: {user.role_id}")
+        return None
+    return user
+
+
+def _import_chunk(chunk: List[Tuple[int, UserCreate]], result: dict):
+    # Descartar los que ya existen con una consulta por columna para todo el bloque
+    usernames = [user.username for _, user in chunk]
+    emails = [user.email for _, user in chunk]
+    existing_usernames = {
+        row["username"].lower()
+        for row in execute_query("SELECT username FROM user WHERE username IN %s", [usernames])
+    }
+    existing_emails = {
+        row["email"].lower()
+        for row in execute_query("SELECT email FROM user WHERE email IN %s", [emails])
+    }
+
+    pending = []
+    for row_number, user in chunk:
+        if user.username.lower() in existing_usernames:
+            _add_error(result, row_number, f"El username '{user.username}' ya existe")
+        elif user.email.lower() in existing_emails:
+            _add_error(result, row_number, f"El email '{user.email}' ya existe")
+        else:
+            pending.append((row_number, user))
+    if not pending:
+        return
+
+    hashes = list(get_hash_pool().map(
+        get_password_hash,
+        [user.password for _, user in pending],
+        chunksize=max(1, len(pending) // (4 * (settings.IMPORT_HASH_WORKERS or os.cpu_count())))
+    ))
+    rows = [
+        (user.username, user.email, password_hash, user.first_name, user.last_name, user.role_id)
+        for (_, user), password_hash in zip(pending, hashes)
+    ]
+
+    try:
+        # executemany agrupa los VALUES en sentencias INSERT de varias filas
+        with transaction() as cursor:
+            cursor.executemany(_INSERT_USER, rows)
+        result["created"] += len(rows)
+    except pymysql.err.IntegrityError:
+        # Otro proceso insertó un duplicado entre la comprobación y la inserción:
+        # reintentar fila a fila para atribuir el error a la fila concreta
+        for (row_number, _), values in zip(pending, rows):
+            try:
+                with transaction() as cursor:
+                    cursor.execute(_INSERT_USER, values)
+                result["created"] += 1
+            except pymysql.err.IntegrityError as e:
+                _add_error(result, row_number, f"Usuario duplicado: {e.args[-1]}")
+
+
+def _add_error(result: dict, row_number: int, detail: str):
+    result["failed"] += 1
+    if len(result["errors"]) < settings.IMPORT_MAX_REPORTED_ERRORS:
+        result["errors"].append({"id": row_number, "status": "error", "detail": detail})
@@ -0,0 +1,268 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.config import settings
+from app.database import transaction
+from app.schemas.video import VideoCreate
+from app.services import suggest_service, related_service, thumbnail_service, youtube_service, duplicate_service
+from app.utils.pagination import count_cache
+from app.utils.task_queue import background_queue
+
+_VIDEO_COLUMNS = "(user_id, title, youtube_link, youtube_id, description, type, status, thumbnail, thumbnail_placeholder)"
+_VIDEO_PLACEHOLDERS = "(%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+_VIDEO_TYPES = ("en_vivo", "grabado")
+_TAG_ID = re.compile(r"^[0-9]+$")
+
+
+def create_videos(raw_items: List[dict], current_user: dict):
+    """
+    Crea un lote de videos.
+
+    Las etiquetas de todo el lote se resuelven de una vez (consulta de existentes y alta
+    de las nuevas) y los videos y sus etiquetas se insertan con sentencias de varias filas
+    en una transacción. Las miniaturas se procesan en paralelo antes de abrirla. Los
+    elementos inválidos y los videos de YouTube ya registrados (o repetidos en el lote)
+    se informan sin detener el resto.
+
+    Args:
+        raw_items: Videos del lote con los campos de VideoCreate
+        current_user: Usuario autenticado; solo un administrador puede crear videos de otros
+
+    Returns:
+        dict con processed, created, failed, ids (en el orden del lote) y errors
+    """
+    if len(raw_items) > settings.VIDEO_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El lote no puede superar los {settings.VIDEO_BATCH_MAX_ITEMS} videos"
+        )
+    result = {"processed": len(raw_items), "created": 0, "failed": 0, "ids": [], "errors": []}
+
+    valid = []
+    for position, item in enumerate(raw_items):
+        try:
+            video = VideoCreate(**item) if isinstance(item, dict) else VideoCreate.model_validate(item)
+        except ValidationError as e:
+            _add_error(result, position, "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            continue
+        error = _check_video(video, current_user)
+        if error:
+            _add_error(result, position, error)
+        else:
+            valid.append((position, video, _normalize_tags(video.tags)))
+    valid = _derive_thumbnails(_dedupe_youtube_ids(valid, result), result)
+    if not valid:
+        return result
+
+    try:
+        with transaction() as cursor:
+            tag_ids, tag_names = _resolve_tags(cursor, [tag for _, _, tags, _, _ in valid for tag in tags])
+
+            ids = []
+            chunk_size = settings.VIDEO_BATCH_CHUNK_SIZE
+            for start in range(0, len(valid), chunk_size):
+                ids.extend(_insert_videos(cursor, [
+                    (video, youtube_id, placeholder)
+                    for _, video, _, youtube_id, placeholder in valid[start:start + chunk_size]
+                ]))
+
+            tag_rows = {
+                (video_id, tag_ids[_tag_key(tag)])
+                for video_id, (_, _, tags, _, _) in zip(ids, valid)
+                for tag in tags
+            }
+            if tag_rows:
+                cursor.executemany(
+                    "INSERT IGNORE INTO video_tag_map (video_id, tag_id) VALUES (%s, %s)",
+                    sorted(tag_rows)
+                )
+    except HTTPException:
+        raise
+    except Exception as e:
+        if youtube_service.is_duplicate(e):
+            # Otra petición registró uno de los videos después de la comprobación
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Uno de los videos de YouTube del lote se registró mientras se procesaba"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al crear videos: {str(e)}"
+        )
+
+    result["created"] = len(ids)
+    result["ids"] = ids
+    count_cache.invalidate("video")
+    # Firmas MinHash de todo el lote en una sola operación
+    duplicate_service.index_videos([
+        {"id": video_id, "title": video.title, "description": video.description, "tags": tags}
+        for video_id, (_, video, tags, _, _) in zip(ids, valid)
+    ])
+
+    for video_id, (_, video, tags, _, _) in zip(ids, valid):
+        names = [tag_names[tag_ids[_tag_key(tag)]] for tag in tags]
+        suggest_service.index_video(
+            video_id, video.user_id, video.title, names,
+            current_user["username"] if current_user["id"] == video.user_id else None
+        )
+        background_queue.enqueue(
+            related_service.refresh_video, video_id, video.user_id, names,
+            key=("related", video_id)
+        )
+    return result
+
+
+def _dedupe_youtube_ids(valid: List[tuple], result: dict) -> List[tuple]:
+    """
+    Añade a cada elemento el ID de YouTube de su enlace.
+
+    Se descartan los enlaces no reconocidos, las repeticiones dentro del lote y los videos
+    ya registrados (una sola consulta por el índice único para todo el lote).
+    """
+    first_position: Dict[str, int] = {}
+    identified = []
+    for position, video, tags in valid:
+        youtube_id = youtube_service.extract_video_id(video.youtube_link)
+        if youtube_id is None:
+            _add_error(result, position, "Enlace de YouTube no reconocido")
+        elif youtube_id in first_position:
+            _add_error(result, position, f"Video de YouTube repetido en el lote (elemento {first_position[youtube_id]})")
+        else:
+            first_position[youtube_id] = position
+            identified.append((position, video, tags, youtube_id))
+
+    existing = youtube_service.find_videos(list(first_position))
+    unique = []
+    for position, video, tags, youtube_id in identified:
+        if youtube_id in existing:
+            _add_error(result, position, youtube_service.duplicate_error(youtube_id, existing[youtube_id]).detail)
+        else:
+            unique.append((position, video, tags, youtube_id))
+    return unique
+
+
+def _derive_thumbnails(valid: List[tuple], result: dict) -> List[tuple]:
+    """Sustituye las miniaturas por la URL de sus derivados y añade el marcador a cada elemento."""
+    derived = []
+    outcomes = thumbnail_service.derive_many([video.thumbnail for _, video, _, _ in valid])
+    for (position, video, tags, youtube_id), outcome in zip(valid, outcomes):
+        if isinstance(outcome, HTTPException):
+            _add_error(result, position, outcome.detail)
+            continue
+        video.thumbnail, placeholder = outcome
+        derived.append((position, video, tags, youtube_id, placeholder))
+    return derived
+
+
+def _check_video(video: VideoCreate, current_user: dict):
+    if video.user_id != current_user["id"] and current_user["role_id"] != 3:
+        return "No tienes permiso para crear videos de otro usuario"
+    if video.type not in _VIDEO_TYPES:
+        return f"Tipo de video inválido: {video.type}"
+    if len(video.title) > 200:
+        return "El título no puede superar los 200 caracteres"
+    for tag in _normalize_tags(video.tags):
+        if not _TAG_ID.match(tag) and len(tag) > 50:
+            return f"Etiqueta demasiado larga: {tag[:50]}..."
+    return None
+
+
+def _normalize_tags(tags) -> List[str]:
+    # Mismo criterio que sp_create_video: los valores numéricos son IDs y el resto nombres
+    normalized = []
+    for tag in tags:
+        value = str(tag).strip()
+        if value and _tag_key(value) not in {_tag_key(t) for t in normalized}:
+            normalized.append(value)
+    return normalized
+
+
+def _tag_key(tag: str):
+    return ("id", int(tag)) if _TAG_ID.match(tag) else ("name", _fold(tag))
+
+
+def _fold(name: str) -> str:
+    # Aproxima la colación de video_tag.name (sin distinguir mayúsculas ni acentos):
+    # "Musica" y "Música" son la misma etiqueta
+    name = unicodedata.normalize("NFKD", name.casefold())
+    return "".join(char for char in name if not unicodedata.combining(char))
+
+
+def _resolve_tags(cursor, tags: List[str]) -> Tuple[Dict[tuple, int], Dict[int, str]]:
+    """Devuelve {clave de etiqueta: id} y {id: nombre}, creando las etiquetas que falten."""
+    wanted_ids = {int(tag) for tag in tags if _TAG_ID.match(tag)}
+    wanted_names = {_fold(tag): tag for tag in tags if not _TAG_ID.match(tag)}
+    tag_ids: Dict[tuple, int] = {}
+    tag_names: Dict[int, str] = {}
+
+    if wanted_ids:
+        cursor.execute("SELECT id, name FROM video_tag WHERE id IN %s", [list(wanted_ids)])
+        found = {row["id"]: row["name"] for row in cursor.fetchall()}
+        missing = sorted(wanted_ids - found.keys())
+        if missing:
+            cursor.executemany(
+                "INSERT IGNORE INTO video_tag (id, name, status) VALUES (%s, %s, 'activo')",
+                [(tag_id, f"Tag {tag_id}") for tag_id in missing]
+            )
+            found.update({tag_id: f"Tag {tag_id}" for tag_id in missing})
+        for tag_id, name in found.items():
+            tag_ids[("id", tag_id)] = tag_id
+            tag_names[tag_id] = name
+
+    if wanted_names:
+        def store(key: str, row: dict):
+            tag_ids[("name", key)] = row["id"]
+            tag_names[row["id"]] = row["name"]
+
+        def missing():
+            return [name for key, name in wanted_names.items() if ("name", key) not in tag_ids]
+
+        def lookup(names: List[str]):
+            cursor.execute("SELECT id, name FROM video_tag WHERE name IN %s", [names])
+            for row in cursor.fetchall():
+                key = _fold(row["name"])
+                if key in wanted_names:
+                    store(key, row)
+
+        lookup(list(wanted_names.values()))
+        if missing():
+            # INSERT IGNORE tolera que otra petición cree la misma etiqueta a la vez
+            cursor.executemany("INSERT IGNORE INTO video_tag (name, status) VALUES (%s, 'activo')", missing())
+            lookup(missing())
+        # Si la colación iguala nombres que _fold no (p. ej. ligaduras), la fila existente
+        # se busca por separado con la comparación de la base de datos
+        for name in missing():
+            cursor.execute("SELECT id, name FROM video_tag WHERE name = %s", [name])
+            row = cursor.fetchone()
+            if row is None:
+                raise ValueError(f"No se pudo resolver la etiqueta {name}")
+            store(_fold(name), row)
+
+    return tag_ids, tag_names
+
+
+def _insert_videos(cursor, videos: List[Tuple[VideoCreate, str, Optional[str]]]) -> List[int]:
+    """Inserta un bloque de (video, ID de YouTube, marcador de la miniatura) y devuelve sus IDs en el mismo orden."""
+    rows = [
+        (video.user_id, video.title, video.youtube_link, youtube_id, video.description, video.type, 'activo',
+         video.thumbnail, placeholder)
+        for video, youtube_id, placeholder in videos
+    ]
+    cursor.execute(
+        f"INSERT INTO video {_VIDEO_COLUMNS} VALUES {', '.join([_VIDEO_PLACEHOLDERS] * len(rows))}",
+        [value for row in rows for value in row]
+    )
+    # LAST_INSERT_ID() es el ID de la primera fila y el resto son consecutivos: un INSERT
+    # simple (número de filas conocido) reserva sus IDs de una vez en cualquier
+    # innodb_autoinc_lock_mode, también en el 2 por defecto de MySQL 8
+    return list(range(cursor.lastrowid, cursor.lastrowid + len(rows)))
+
+
+def _add_error(result: dict, position: int, detail: str):
+    result["failed"] += 1
+    result["errors"].append({"id": position, "status": "error", "detail": detail})
@@ -0,0 +1,72 @@
+from typing import List, Optional, Sequence, Tuple
+
+from app.database import execute_procedure, execute_query
+from app.schemas.video import VideoResponse
+from app.utils.data_processor import process_video_data
+from app.utils.fields import FieldSet
+
+# Campos de las listas públicas de videos y su columna (alias `v`), como en los procedimientos
+VIDEO_COLUMNS = {
+    "id": "v.id",
+    "user_id": "v.user_id",
+    "title": "v.title",
+    "youtube_link": "v.youtube_link",
+    "description": "v.description",
+    "type": "v.type",
+    "status": "v.status",
+    "thumbnail": "v.thumbnail",
+    "thumbnail_placeholder": "v.thumbnail_placeholder",
+    "created_at": "v.created_at",
+    "tags": """(SELECT JSON_ARRAYAGG(vt.name)
+            FROM video_tag_map vtm
+            JOIN video_tag vt ON vtm.tag_id = vt.id
+            WHERE vtm.video_id = v.id AND vt.status = 'activo')""",
+}
+
+# Listas que se consultan al pedirlas: la proyección se hace en el SELECT
+VIDEO_FIELDS = FieldSet(VideoResponse, VIDEO_COLUMNS)
+# Listas servidas desde la caché compartida o desde índices en memoria: se proyectan las filas
+CACHED_VIDEO_FIELDS = FieldSet(VideoResponse)
+
+
+def select_videos(conditions: Sequence[str], args: Sequence, fields: Tuple[str, ...],
+                  from_clause: str = "video v", order_by: Optional[str] = "v.created_at DESC") -> List[dict]:
+    """Videos que cumplen las condiciones, leyendo solo las columnas de los campos pedidos."""
+    query = f"SELECT {VIDEO_FIELDS.select(fields)} FROM {from_clause} WHERE {' AND '.join(conditions)}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return process_video_data(execute_query(query, list(args)))
+
+
+def get_videos_by_user(user_id: int, fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    """Videos activos de un usuario (sp_get_videos_by_user o solo los campos pedidos)."""
+    if fields is None:
+        return process_video_data(execute_procedure("sp_get_videos_by_user", [user_id]))
+    return select_videos(["v.status = 'activo'", "v.user_id = %s"], [user_id], fields)
+
+
+def search_videos(q: str, fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    """Búsqueda por título, canal, descripción o etiqueta (sp_search_videos o solo los campos pedidos)."""
+    if fields is None:
+        return process_video_data(execute_procedure("sp_search_videos", [q]))
+    # Mismo criterio que sp_search_videos; EXISTS en lugar de LEFT JOIN + GROUP BY
+    pattern = f"%{q}%"
+    return select_videos(
+        ["v.status = 'activo'",
+         """(v.title LIKE %s OR u.username LIKE %s OR v.description LIKE %s OR EXISTS (
+                SELECT 1 FROM video_tag_map vtm JOIN video_tag vt ON vtm.tag_id = vt.id
+                WHERE vtm.video_id = v.id AND vt.name LIKE %s))"""],
+        [pattern, pattern, pattern, pattern], fields,
+        from_clause="video v JOIN user u ON v.user_id = u.id"
+    )
+
+
+def get_videos_by_album(album_id: int, fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    """Videos activos de un álbum (sp_get_videos_by_album_id o solo los campos pedidos)."""
+    if fields is None:
+        return execute_procedure("sp_get_videos_by_album_id", [album_id])
+    return select_videos(
+        ["v.status = 'activo'",
+         "v.id IN (SELECT video_id FROM album_video_map WHERE album_id = %s AND status = 'activo')"],
+        [album_id], fields, order_by=None
+    )
@@ -1,6 +1,7 @@
 from fastapi import HTTPException
 from typing import List
 from app.database import execute_procedure
+from app.services import thumbnail_service, youtube_service
 from app.schemas.video import VideoResponse
 from app.schemas.response import StandardResponse
 
@@ -64,7 +65,10 @@ def update_video(video_id: int, video: VideoUpdate):
     try:
         execute_procedure(
             "sp_update_video",
-            [video_id, video.title, video.youtube_link, video.description, video.type, video.status, video.tags, video.thumbnail]
+            [video_id, video.title, video.youtube_link,
+             youtube_service.require_video_id(video.youtube_link) if video.youtube_link else None,
+             video.description, video.type, video.status, video.tags,
+             *thumbnail_service.derive(video.thumbnail)]
         )
         return StandardResponse(message="SUCCESS")
     except Exception as e:
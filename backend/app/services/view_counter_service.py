@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from typing import Optional
+
+from app.config import settings
+from app.database import execute_procedure
+from app.utils.sharded_counter import ShardedCounter
+from app.utils.shared_cache import shared_cache
+
+VIEW = 0
+IMPRESSION = 1
+_FIELDS = {"view": VIEW, "impression": IMPRESSION}
+
+# Contadores pendientes de volcar: video_id -> [vistas, impresiones]
+_counter = ShardedCounter(shards=settings.VIEW_COUNTER_SHARDS, width=2)
+_flush_requested = threading.Event()
+_stop = threading.Event()
+_flush_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+_metrics = {
+    "flushes": 0,
+    "flush_errors": 0,
+    "flushed_events": 0,
+    "last_flush_at": None,
+    "last_flush_duration_ms": 0.0,
+    "last_flush_rows": 0,
+    "last_error": None,
+}
+
+
+def record(video_id: int, kind: str, count: int = 1):
+    """Registra vistas o impresiones de un video sin escribir en la base de datos."""
+    _counter.add(video_id, _FIELDS[kind], count)
+    if _counter.pending_keys() >= settings.VIEW_COUNTER_FLUSH_THRESHOLD:
+        _flush_requested.set()
+
+
+def flush():
+    """Vuelca los contadores acumulados con upserts por lotes en video_stats."""
+    with _flush_lock:
+        drained = _counter.drain()
+        if not drained:
+            return 0
+
+        started = time.perf_counter()
+        rows = [[video_id, views, impressions] for video_id, (views, impressions) in drained.items()]
+        batch_size = settings.VIEW_COUNTER_BATCH_SIZE
+        flushed = 0
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                execute_procedure("sp_add_video_stats", [json.dumps(batch)])
+                flushed += len(batch)
+        except Exception as e:
+            # Devolver lo no volcado a los contadores para reintentarlo en el siguiente ciclo
+            _counter.merge({row[0]: row[1:] for row in rows[flushed:]})
+            _metrics["flush_errors"] += 1
+            _metrics["last_error"] = str(e)
+            print(f"Error al volcar contadores de vistas: {e}")
+        if flushed:
+            # Los videos cacheados en todos los workers llevan las estadísticas anteriores
+            shared_cache.invalidate("video")
+
+        _metrics["flushes"] += 1
+        _metrics["flushed_events"] += sum(row[1] + row[2] for row in rows[:flushed])
+        _metrics["last_flush_at"] = time.time()
+        _metrics["last_flush_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        _metrics["last_flush_rows"] = flushed
+        return flushed
+
+
+def get_metrics():
+    """Métricas de retraso y volcado de los contadores."""
+    return {
+        **_metrics,
+        "pending_keys": _counter.pending_keys(),
+        "pending_events": _counter.pending_events(),
+        "lag_seconds": round(_counter.oldest_pending_age(), 3),
+    }
+
+
+def start_flusher():
+    """Arranca el hilo que vuelca los contadores por intervalo o por umbral de tamaño."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    _worker = threading.Thread(target=_run, name="view-counter-flush", daemon=True)
+    _worker.start()
+
+
+def stop_flusher():
+    """Detiene el hilo de volcado y hace un último volcado de lo pendiente."""
+    _stop.set()
+    _flush_requested.set()
+    if _worker is not None:
+        _worker.join(timeout=settings.VIEW_COUNTER_FLUSH_SECONDS + 5)
+    flush()
+
+
+def _run():
+    while not _stop.is_set():
+        _flush_requested.wait(timeout=settings.VIEW_COUNTER_FLUSH_SECONDS)
+        _flush_requested.clear()
+        if _stop.is_set():
+            return
+        flush()
@@ -0,0 +1,132 @@
+import re
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pymysql
+from fastapi import HTTPException, status
+from app.config import settings
+from app.database import execute_query, execute_update
+from app.utils.shared_cache import shared_cache
+
+# Los IDs de YouTube tienen 11 caracteres del alfabeto base64 para URLs
+VIDEO_ID_PATTERN = r"^[A-Za-z0-9_-]{11}$"
+
+_VIDEO_ID = re.compile(VIDEO_ID_PATTERN)
+_HOSTS = ("youtube.com", "youtube-nocookie.com")
+# Rutas de youtube.com con el ID como siguiente segmento (/embed/ID, /shorts/ID, /live/ID...)
+_PATH_PREFIXES = ("embed", "v", "e", "shorts", "live")
+_DUPLICATE_ENTRY = 1062
+_UNIQUE_INDEX = "uq_video_youtube_id"
+
+
+def extract_video_id(link: Optional[str]) -> Optional[str]:
+    """
+    ID canónico del video de un enlace de YouTube, o None si no es uno reconocible.
+
+    Acepta watch?v=, youtu.be/, /embed/, /shorts/, /live/ (con o sin esquema, www. o m.)
+    y el ID suelto.
+    """
+    if not link:
+        return None
+    link = link.strip()
+    if _VIDEO_ID.match(link):
+        return link
+    parts = urlsplit(link if "//" in link else f"https://{link}")
+    host = (parts.hostname or "").lower()
+    segments = [segment for segment in parts.path.split("/") if segment]
+
+    candidate = None
+    if host == "youtu.be":
+        candidate = segments[0] if segments else None
+    elif any(host == domain or host.endswith(f".{domain}") for domain in _HOSTS):
+        if segments[:1] == ["watch"]:
+            candidate = parse_qs(parts.query).get("v", [None])[0]
+        elif len(segments) >= 2 and segments[0] in _PATH_PREFIXES:
+            candidate = segments[1]
+    return candidate if candidate and _VIDEO_ID.match(candidate) else None
+
+
+def require_video_id(link: str) -> str:
+    """Como `extract_video_id`, pero un enlace no reconocido es un error 400."""
+    youtube_id = extract_video_id(link)
+    if youtube_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Enlace de YouTube no reconocido: se esperaba una URL de un video o su ID"
+        )
+    return youtube_id
+
+
+def find_video(youtube_id: str) -> Optional[dict]:
+    """Video registrado con ese ID de YouTube (una lectura por el índice único)."""
+    rows = execute_query("SELECT id, user_id, status FROM video WHERE youtube_id = %s", [youtube_id])
+    return rows[0] if rows else None
+
+
+def find_videos(youtube_ids: List[str]) -> Dict[str, int]:
+    """{ID de YouTube: id del video} de los que ya están registrados."""
+    if not youtube_ids:
+        return {}
+    rows = execute_query("SELECT id, youtube_id FROM video WHERE youtube_id IN %s", [list(set(youtube_ids))])
+    return {row["youtube_id"]: row["id"] for row in rows}
+
+
+def is_duplicate(error: Exception) -> bool:
+    """Indica si el error es la violación del índice único de youtube_id."""
+    return (isinstance(error, pymysql.err.IntegrityError) and error.args[0] == _DUPLICATE_ENTRY
+            and _UNIQUE_INDEX in str(error.args[1:]))
+
+
+def duplicate_error(youtube_id: str, video_id: Optional[int] = None) -> HTTPException:
+    """Error 409 para un video de YouTube que ya está registrado."""
+    if video_id is None:
+        existing = find_video(youtube_id)
+        video_id = existing["id"] if existing else None
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"El video de YouTube {youtube_id} ya está registrado" +
+               (f" (video {video_id})" if video_id is not None else "")
+    )
+
+
+def backfill(batch_size: Optional[int] = None) -> dict:
+    """
+    Calcula youtube_id en los videos existentes que aún no lo tienen.
+
+    Recorre los videos activos por id en bloques. Los enlaces que no se reconocen y los
+    duplicados de un video anterior se dejan sin ID y se informan para revisarlos. Los
+    suspendidos se omiten: no se distingue si los borró su dueño, que debe poder volver
+    a registrarlos, o la moderación.
+    """
+    batch_size = batch_size or settings.YOUTUBE_BACKFILL_BATCH_SIZE
+    result = {"updated": 0, "unrecognized": 0, "duplicates": 0}
+    last_id = 0
+    while True:
+        rows = execute_query(
+            "SELECT id, youtube_link FROM video WHERE id > %s AND youtube_id IS NULL AND status = 'activo' "
+            "ORDER BY id LIMIT %s",
+            [last_id, batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        for row in rows:
+            youtube_id = extract_video_id(row["youtube_link"])
+            if youtube_id is None:
+                print(f"Video {row['id']} sin ID de YouTube reconocible: {row['youtube_link'][:100]}")
+                result["unrecognized"] += 1
+                continue
+            try:
+                result["updated"] += execute_update(
+                    "UPDATE video SET youtube_id = %s WHERE id = %s AND youtube_id IS NULL",
+                    [youtube_id, row["id"]]
+                )
+            except pymysql.err.IntegrityError as e:
+                if not is_duplicate(e):
+                    raise
+                print(f"Video {row['id']} duplicado de {youtube_id}: se deja sin ID")
+                result["duplicates"] += 1
+    if result["updated"]:
+        shared_cache.invalidate("video")
+    print(f"IDs de YouTube calculados: {result}")
+    return result
@@ -6,7 +6,8 @@ from passlib.context import CryptContext
 from app.config import settings
 from app.schemas.user import TokenData
 from app.services import auth_service
-from app.database import execute_procedure
+from app.database import execute_procedure, workload
+from app.utils.shared_cache import shared_cache
 from typing import List, Optional
 
 # Configuración de seguridad
@@ -32,7 +33,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(token: str = Depends(oauth2_scheme)):
     """Obtiene el usuario actual a partir del token JWT."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,9 +53,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
-    # Obtener el usuario de la base de datos por ID
+    # Obtener el usuario por ID (cacheado entre workers; se invalida al modificar usuarios)
     try:
-        user = execute_procedure("sp_get_user_details_by_id", [user_id])
+        with workload("auth"):
+            user = shared_cache.get_or_load(
+                "user", ("details", user_id),
+                lambda: execute_procedure("sp_get_user_details_by_id", [user_id])
+            )
         if not user:
             raise credentials_exception
         return user[0]
@@ -54,3 +54,28 @@ def process_single_video_data(video: Dict[str, Any]) -> Dict[str, Any]:
             pass
     
     return processed_video
+
+def escape_like(value: str) -> str:
+    """Escapa los comodines de LIKE para buscar el texto literal."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def unique_ids(ids: List[int]) -> List[int]:
+    """Elimina IDs repetidos conservando el orden original."""
+    return list(dict.fromkeys(ids))
+
+def build_bulk_result(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Resume el resultado de una operación por lotes.
+    
+    Args:
+        results: Resultado por elemento con las claves id, status y opcionalmente detail
+        
+    Returns:
+        Diccionario con totales por estado y el detalle de cada elemento
+    """
+    return {
+        "processed": len(results),
+        "updated": sum(1 for result in results if result["status"] == "updated"),
+        "failed": sum(1 for result in results if result["status"] not in ("updated", "unchanged")),
+        "results": results,
+    }
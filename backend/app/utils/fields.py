@@ -0,0 +1,80 @@
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+from app.schemas.response import StandardResponse
+
+
+class FieldSet:
+    """
+    Campos que un cliente puede pedir con `fields=` en una lista (sparse fieldsets).
+
+    `columns` traduce cada campo público a su expresión SQL para proyectar en la propia
+    consulta; sin `columns` se aceptan todos los campos del modelo y la proyección se hace
+    sobre filas ya cargadas (listas servidas desde caché). Los campos de `required` se
+    incluyen siempre.
+    """
+
+    def __init__(self, model: Type[BaseModel], columns: Optional[Dict[str, str]] = None,
+                 required: Sequence[str] = ("id",)):
+        self.model = model
+        self.columns = columns
+        self.names = tuple(columns) if columns is not None else tuple(model.model_fields)
+        self.required = tuple(required)
+
+        def param(fields: Optional[str] = Query(
+            None, description=f"Campos a devolver separados por comas: {', '.join(self.names)}"
+        )) -> Optional[Tuple[str, ...]]:
+            return self.parse(fields)
+
+        # Dependencia de FastAPI: None = todos los campos
+        self.param = param
+
+    def parse(self, value: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Valida la lista pedida y la devuelve en el orden del modelo, o None si no se pidió."""
+        if value is None or not value.strip():
+            return None
+        wanted = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = wanted - set(self.names)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos no permitidos: {', '.join(sorted(unknown))}. Opciones: {', '.join(self.names)}"
+            )
+        wanted.update(self.required)
+        return tuple(name for name in self.names if name in wanted)
+
+    def select(self, fields: Optional[Sequence[str]] = None) -> str:
+        """Lista de columnas del SELECT para los campos pedidos (todos si es None)."""
+        columns = ((self.columns[name], name) for name in (fields or self.names))
+        return ", ".join(column if column == name else f"{column} AS {name}" for column, name in columns)
+
+    def respond(self, data, fields: Optional[Tuple[str, ...]], page: bool = False):
+        """
+        Respuesta estándar con un objeto, una lista o una página (`page`) de elementos.
+
+        Con campos pedidos se valida con un modelo reducido y se devuelve una JSONResponse
+        para que FastAPI no la vuelva a validar con el modelo completo de la ruta (que
+        rellenaría los campos omitidos con null).
+        """
+        if fields is None:
+            return StandardResponse(data=data, message="SUCCESS")
+        model = _sparse_model(self.model, fields)
+        if page:
+            projected = {**data, "items": [model.model_validate(item).model_dump(mode="json") for item in data["items"]]}
+        elif isinstance(data, dict):
+            projected = model.model_validate(data).model_dump(mode="json")
+        else:
+            projected = [model.model_validate(item).model_dump(mode="json") for item in data]
+        return JSONResponse({"data": projected, "message": "SUCCESS"})
+
+
+@lru_cache(maxsize=256)
+def _sparse_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Modelo con un subconjunto de los campos de `model` (uno por combinación pedida)."""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
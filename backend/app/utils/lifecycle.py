@@ -0,0 +1,22 @@
+class Lifecycle:
+    """Estado del worker para la comprobación de disponibilidad (/health/ready)."""
+
+    def __init__(self):
+        self.started = False
+        self.draining = False
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining
+
+    def mark_started(self):
+        self.started = True
+        self.draining = False
+
+    def mark_draining(self):
+        """Deja de anunciarse como disponible; las peticiones en curso siguen atendiéndose."""
+        self.draining = True
+
+
+# Estado compartido del proceso: lo actualizan el lifespan y el lanzador (serve.py)
+lifecycle = Lifecycle()
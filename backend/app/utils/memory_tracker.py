@@ -0,0 +1,184 @@
+import os
+import random
+import threading
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from typing import Dict, Optional
+
+from app.config import settings
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BASE_DIR = os.path.dirname(_APP_DIR)
+
+
+class MemoryTracker:
+    """
+    Contabilidad de memoria por ruta con tracemalloc, activable en caliente.
+
+    tracemalloc encarece todas las asignaciones mientras está activo, así que solo se
+    enciende bajo demanda. Con el seguimiento activo se muestrea una fracción de las
+    peticiones, de una en una: se mide el pico de memoria trazada durante la petición
+    (get_traced_memory tras reset_peak) y se comparan instantáneas antes y después para
+    atribuir la memoria que la petición deja retenida a sus líneas de origen.
+
+    Los picos incluyen lo que asignen a la vez otras peticiones concurrentes; con
+    muestreo bajo el sesgo es pequeño y suficiente para fijar presupuestos por ruta.
+    """
+
+    def __init__(self, window: int = 500, top_sites: int = 10, frames: int = 10):
+        self.window = window
+        self.top_sites = top_sites
+        self.frames = frames
+        self.sample_rate = 0.0
+        self._peaks: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._sites: Dict[str, Counter] = defaultdict(Counter)
+        self._sampling = threading.Lock()
+        self._lock = threading.Lock()
+        self._sampled = 0
+        self._skipped_busy = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and tracemalloc.is_tracing()
+
+    def start(self, sample_rate: float):
+        """Activa tracemalloc y el muestreo de peticiones."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.sample_rate = sample_rate
+
+    def stop(self):
+        """Desactiva el seguimiento y libera las trazas (los percentiles se conservan)."""
+        self.sample_rate = 0.0
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        with self._lock:
+            self._peaks.clear()
+            self._sites.clear()
+            self._sampled = self._skipped_busy = 0
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def begin(self) -> Optional[tuple]:
+        """Empieza a medir una petición; devuelve None si ya hay otra en medición."""
+        if not self._sampling.acquire(blocking=False):
+            self._skipped_busy += 1
+            return None
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+        except RuntimeError:
+            # Se desactivó entre should_sample y begin (p. ej. PUT /admin/memory)
+            self._sampling.release()
+            return None
+        return before, current
+
+    def end(self, route: str, token: tuple):
+        """Termina la medición de una petición iniciada con `begin`."""
+        try:
+            if not tracemalloc.is_tracing():
+                return  # Se desactivó durante la petición
+            before, baseline = token
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            self._sampling.release()
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "traceback")
+        with self._lock:
+            self._sampled += 1
+            self._peaks[route].append(max(0, peak - baseline))
+            sites = self._sites[route]
+            for stat in diff:
+                if stat.size_diff > 0:
+                    sites[_call_site(stat.traceback)] += stat.size_diff
+
+    def get_metrics(self):
+        """Percentiles de pico por ruta y líneas que más memoria retienen."""
+        with self._lock:
+            routes = {}
+            for route, peaks in self._peaks.items():
+                values = sorted(peaks)
+                routes[route] = {
+                    "samples": len(values),
+                    "peak_p50_kb": round(_percentile(values, 0.50) / 1024, 1),
+                    "peak_p95_kb": round(_percentile(values, 0.95) / 1024, 1),
+                    "peak_p99_kb": round(_percentile(values, 0.99) / 1024, 1),
+                    "peak_max_kb": round(values[-1] / 1024, 1),
+                    "top_retained_sites": [
+                        {"site": site, "kb": round(size / 1024, 1)}
+                        for site, size in self._sites[route].most_common(self.top_sites)
+                    ],
+                }
+            current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "sampled_requests": self._sampled,
+                "skipped_busy": self._skipped_busy,
+                "traced_current_kb": round(current / 1024, 1),
+                "traced_peak_kb": round(peak / 1024, 1),
+                "routes": routes,
+            }
+
+
+def _call_site(traceback) -> str:
+    """Línea de la aplicación más cercana a la asignación (o la propia asignación si no hay)."""
+    frames = list(traceback)
+    # tracemalloc ordena los frames del más antiguo al más reciente
+    frame = next((f for f in reversed(frames) if f.filename.startswith(_APP_DIR)), frames[-1])
+    filename = frame.filename
+    if filename.startswith(_BASE_DIR):
+        filename = os.path.relpath(filename, _BASE_DIR)
+    return f"{filename}:{frame.lineno}"
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class MemoryTrackingMiddleware:
+    """Middleware ASGI que mide las peticiones muestreadas por `memory_tracker`."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not memory_tracker.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        token = memory_tracker.begin()
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            memory_tracker.end(self._route(scope), token)
+
+    def _route(self, scope) -> str:
+        # El router deja en el scope el endpoint que atendió la petición
+        endpoint = scope.get("endpoint")
+        if endpoint is not None and endpoint not in self._routes and "app" in scope:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = route.path
+                    break
+        return f"{scope['method']} {self._routes.get(endpoint, '(sin ruta)')}"
+
+
+# Instancia compartida; se activa con MEMORY_TRACKING_SAMPLE_RATE o desde /admin/memory
+memory_tracker = MemoryTracker(
+    window=settings.MEMORY_TRACKING_WINDOW,
+    top_sites=settings.MEMORY_TRACKING_TOP_SITES,
+    frames=settings.MEMORY_TRACKING_FRAMES,
+)
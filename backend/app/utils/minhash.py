@@ -0,0 +1,102 @@
+import re
+import unicodedata
+from typing import List, Tuple
+
+import numpy as np
+
+_SEPARATORS = re.compile(r"[\W_]+")
+# Finalizador de MurmurHash3 (64 bits) para mezclar los hashes polinómicos de los shingles
+_FMIX_1 = np.uint64(0xFF51AFD7ED558CCD)
+_FMIX_2 = np.uint64(0xC4CEB9FE1A85EC53)
+_SHIFT = np.uint64(33)
+_BASE = np.uint64(0x100000001B3)
+_EMPTY = np.zeros(0, dtype=np.uint32)
+
+
+def normalize(text: str) -> str:
+    """Minúsculas sin acentos, con signos y espacios colapsados en un solo espacio."""
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+def shingle_hashes(text: str, k: int = 5) -> np.ndarray:
+    """
+    Hashes de 32 bits (únicos) de los k-gramas de caracteres del texto normalizado.
+
+    Todos los k-gramas se hashean a la vez (Horner sobre los bytes desplazados): pequeñas
+    ediciones (una palabra, un número, espacios) solo cambian los k-gramas que las tocan.
+    """
+    data = np.frombuffer(normalize(text).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if len(data) == 0:
+        return _EMPTY
+    k = min(k, len(data))
+    count = len(data) - k + 1
+    hashes = data[:count].copy()
+    for offset in range(1, k):
+        hashes *= _BASE  # desbordamiento módulo 2^64 intencionado
+        hashes += data[offset:offset + count]
+    hashes ^= hashes >> _SHIFT
+    hashes *= _FMIX_1
+    hashes ^= hashes >> _SHIFT
+    hashes *= _FMIX_2
+    hashes ^= hashes >> _SHIFT
+    return np.unique((hashes >> np.uint64(32)).astype(np.uint32))
+
+
+def make_permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Coeficientes (a impares, b) de las funciones multiply-shift que simulan las permutaciones."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def signatures(shingle_sets: List[np.ndarray], a: np.ndarray, b: np.ndarray,
+               max_cells: int = 262_144) -> np.ndarray:
+    """
+    Firmas MinHash (una fila uint32 por documento) de varios conjuntos de shingles.
+
+    Los shingles de varios documentos se procesan en una sola operación de matriz
+    (shingles × permutaciones) y el mínimo de cada documento se obtiene con
+    `np.minimum.reduceat`. `max_cells` limita el tamaño de esa matriz por bloque: bloques
+    que caben en la caché del procesador son varias veces más rápidos que uno enorme. Un
+    documento sin shingles tiene todos los valores al máximo y no coincide con ninguno.
+    """
+    num_perm = len(a)
+    result = np.full((len(shingle_sets), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    max_rows = max(1, max_cells // num_perm)
+
+    start = 0
+    while start < len(shingle_sets):
+        end, rows = start, 0
+        while end < len(shingle_sets) and (end == start or rows + len(shingle_sets[end]) <= max_rows):
+            rows += len(shingle_sets[end])
+            end += 1
+        documents = [i for i in range(start, end) if len(shingle_sets[i])]
+        if documents:
+            hashes = np.concatenate([shingle_sets[i] for i in documents]).astype(np.uint64)
+            offsets = np.cumsum([0] + [len(shingle_sets[i]) for i in documents[:-1]])
+            values = np.multiply(hashes[:, None], a[None, :])
+            values += b
+            values >>= np.uint64(32)
+            result[documents] = np.minimum.reduceat(values, offsets, axis=0)
+        start = end
+    return result
+
+
+def band_keys(signature_rows: np.ndarray, bands: int, multipliers: np.ndarray) -> np.ndarray:
+    """
+    Clave de cada banda LSH (n × bands, uint64): dos firmas caen en el mismo cubo de una
+    banda si coinciden todos sus valores en ella.
+    """
+    n, num_perm = signature_rows.shape
+    grouped = signature_rows.reshape(n, bands, num_perm // bands).astype(np.uint64)
+    return (grouped * multipliers[None, None, :]).sum(axis=2, dtype=np.uint64)
+
+
+def estimated_similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Similitud de Jaccard estimada: fracción de valores de la firma que coinciden."""
+    return (others == signature[None, :]).mean(axis=1)
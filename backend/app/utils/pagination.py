@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, Query, status
+from app.config import settings
+from app.database import execute_query
+from app.utils.shared_cache import shared_cache
+
+
+class PageParams:
+    """Dependencia con los parámetros comunes de paginación y orden."""
+
+    def __init__(
+        self,
+        page: int = Query(1, ge=1, description="Número de página (desde 1)"),
+        page_size: int = Query(settings.ADMIN_DEFAULT_PAGE_SIZE, ge=1, le=settings.ADMIN_MAX_PAGE_SIZE,
+                               description="Elementos por página"),
+        sort: Optional[str] = Query(None, description="Campo de ordenación"),
+        order: str = Query("desc", pattern="^(asc|desc)$", description="Dirección: asc o desc"),
+    ):
+        self.page = page
+        self.page_size = page_size
+        self.sort = sort
+        self.order = order
+
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.page_size
+
+
+def resolve_sort(params: PageParams, allowed: Dict[str, Union[str, Tuple[str, ...]]], default: str,
+                 tiebreaker: str) -> str:
+    """
+    Traduce el campo de orden pedido a una cláusula ORDER BY segura.
+
+    Solo se aceptan claves de la lista blanca `allowed` (clave pública -> columna SQL, o
+    tupla de columnas que se ordenan en la misma dirección), así que nunca se interpola
+    texto del cliente en la consulta.
+    """
+    key = params.sort or default
+    if key not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campo de orden no permitido: {key}. Opciones: {', '.join(sorted(allowed))}"
+        )
+    direction = "ASC" if params.order == "asc" else "DESC"
+    columns = allowed[key] if isinstance(allowed[key], tuple) else (allowed[key],)
+    return ", ".join(f"{column} {direction}" for column in (*columns, tiebreaker))
+
+
+def page_query(columns: str, from_clause: str, conditions: Sequence[str], args: Sequence,
+               order_by: str, params: PageParams) -> Tuple[str, list]:
+    """Consulta paginada (SQL y parámetros) con los filtros ya validados."""
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {columns} FROM {from_clause}{where} ORDER BY {order_by} LIMIT %s OFFSET %s"
+    return query, [*args, params.page_size, params.offset]
+
+
+def fetch_page(columns: str, from_clause: str, conditions: Sequence[str], args: Sequence,
+               order_by: str, params: PageParams) -> List[dict]:
+    """Ejecuta la consulta paginada con los filtros ya validados."""
+    return execute_query(*page_query(columns, from_clause, conditions, args, order_by, params))
+
+
+def build_page(items: List[dict], total: Tuple[int, bool], params: PageParams) -> dict:
+    """Arma la respuesta paginada."""
+    count, is_estimate = total
+    return {
+        "items": items,
+        "total": count,
+        "total_is_estimate": is_estimate,
+        "page": params.page,
+        "page_size": params.page_size,
+    }
+
+
+class CountCache:
+    """
+    Totales aproximados para las listas paginadas.
+
+    Los COUNT(*) filtrados se cachean durante `ttl` segundos. Cada combinación de
+    búsqueda y filtros es una entrada, así que se guardan como mucho `max_entries`
+    (se descartan las menos usadas). Sin filtros y con tablas grandes se usa la
+    estimación de filas de InnoDB (information_schema.TABLES), que no recorre la tabla.
+
+    Cada total guarda la versión de su tabla en `shared_cache`: al invalidar una tabla
+    en un worker, los totales cacheados en los demás dejan de ser válidos.
+    """
+
+    def __init__(self, ttl: float, exact_threshold: int, max_entries: int = 1024):
+        self.ttl = ttl
+        self.exact_threshold = exact_threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, int, Tuple[int, bool]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, table: str, from_clause: str, conditions: Sequence[str], args: Sequence) -> Tuple[int, bool]:
+        """Devuelve (total, es_estimación) para una consulta filtrada."""
+        cached = self.cached(table, from_clause, conditions, args)
+        if cached is not None:
+            return cached
+
+        # Versión previa a la consulta: si se invalida mientras tanto, el total nace caducado
+        version = shared_cache.version(table)
+        result = None
+        if not conditions:
+            estimate = self._estimate_rows(table)
+            if estimate >= self.exact_threshold:
+                result = (estimate, True)
+        if result is None:
+            rows = execute_query(self.count_query(from_clause, conditions), list(args))
+            result = (int(rows[0]["total"]), False)
+
+        self.store(table, from_clause, conditions, args, result, version)
+        return result
+
+    def cached(self, table: str, from_clause: str, conditions: Sequence[str],
+               args: Sequence) -> Optional[Tuple[int, bool]]:
+        """Total cacheado y vigente, o None."""
+        key = self._key(table, from_clause, conditions, args)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        if cached[1] == shared_cache.version(table):
+            return cached[2]
+        return None
+
+    def store(self, table: str, from_clause: str, conditions: Sequence[str], args: Sequence,
+              result: Tuple[int, bool], version: Optional[int] = None):
+        """Guarda un total calculado fuera de `count` (p. ej. dentro de un lote de consultas)."""
+        if version is None:
+            version = shared_cache.version(table)
+        key = self._key(table, from_clause, conditions, args)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def count_query(from_clause: str, conditions: Sequence[str]) -> str:
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"SELECT COUNT(*) AS total FROM {from_clause}{where}"
+
+    @staticmethod
+    def _key(table: str, from_clause: str, conditions: Sequence[str], args: Sequence) -> tuple:
+        return table, from_clause, tuple(conditions), tuple(str(arg) for arg in args)
+
+    def invalidate(self, *tables: str):
+        """Descarta los totales cacheados de las tablas indicadas, también en los demás workers."""
+        shared_cache.invalidate(*tables)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in tables]:
+                del self._entries[key]
+
+    @staticmethod
+    def _estimate_rows(table: str) -> int:
+        rows = execute_query(
+            "SELECT TABLE_ROWS AS total FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [table]
+        )
+        return int(rows[0]["total"] or 0) if rows else 0
+
+
+# Caché compartida de totales de las listas de administración
+count_cache = CountCache(
+    ttl=settings.ADMIN_COUNT_CACHE_SECONDS,
+    exact_threshold=settings.ADMIN_EXACT_COUNT_THRESHOLD,
+    max_entries=settings.ADMIN_COUNT_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class _TrieNode:
+    __slots__ = ("children", "bucket", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Términos que terminan en este nodo (o que lo superan si se alcanzó la profundidad máxima)
+        self.bucket: Optional[Dict[str, Tuple[str, int]]] = None
+        # Mejores términos del subárbol ordenados por puntuación descendente: (score, texto)
+        self.top: List[Tuple[int, str]] = []
+
+
+class PrefixTrie:
+    """
+    Trie de prefijos con los top-k de cada subárbol precalculados.
+
+    Cada nodo guarda los mejores términos de su subárbol, de modo que una búsqueda por
+    prefijo cuesta O(len(prefijo)) sin recorrer el subárbol. Los términos más largos que
+    `max_depth` se agrupan en el nodo de esa profundidad para acotar la memoria.
+    """
+
+    def __init__(self, top_k: int = 10, max_depth: int = 24):
+        self.top_k = top_k
+        self.max_depth = max_depth
+        self._root = _TrieNode()
+        self._scores: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def normalize(term: str) -> str:
+        """Normaliza un término para indexarlo y buscarlo."""
+        return " ".join(term.lower().split())
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, term: str) -> int:
+        """Devuelve la puntuación actual de un término (0 si no está indexado)."""
+        return self._scores.get(self.normalize(term), 0)
+
+    def build(self, items: Iterable[Tuple[str, int]]):
+        """Reemplaza el contenido del trie con los pares (término, puntuación) dados."""
+        root = _TrieNode()
+        scores: Dict[str, int] = {}
+        for term, score in items:
+            key = self.normalize(term)
+            if not key:
+                continue
+            display, previous = self._find_entry(root, key)
+            total = previous + score
+            if total <= 0:
+                continue
+            self._path(root, key, create=True)[-1].bucket[key] = (display or term.strip(), total)
+            scores[key] = total
+
+        self._rebuild_tops(root)
+        with self._lock:
+            self._root = root
+            self._scores = scores
+
+    def add(self, term: str, delta: int = 1):
+        """Suma `delta` a la puntuación de un término; lo elimina si llega a 0."""
+        key = self.normalize(term)
+        if not key or delta == 0:
+            return
+        with self._lock:
+            total = self._scores.get(key, 0) + delta
+            path = self._path(self._root, key, create=total > 0)
+            if not path:
+                return
+            leaf = path[-1]
+            if total > 0:
+                display = leaf.bucket.get(key, (term.strip(), 0))[0]
+                leaf.bucket[key] = (display, total)
+                self._scores[key] = total
+            else:
+                leaf.bucket.pop(key, None)
+                self._scores.pop(key, None)
+
+            # Recalcular los top-k desde la hoja hasta la raíz
+            for node in reversed(path):
+                node.top = self._merge_top(node)
+
+    def remove(self, term: str):
+        """Elimina un término del trie."""
+        self.add(term, -self.score(term))
+
+    def search(self, prefix: str, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Devuelve hasta k pares (término, puntuación) que empiezan por el prefijo."""
+        key = self.normalize(prefix)
+        k = min(k or self.top_k, self.top_k)
+        with self._lock:
+            node = self._root
+            for char in key[:self.max_depth]:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+
+            if len(key) <= self.max_depth:
+                return [(text, score) for score, text in node.top[:k]]
+
+            # El prefijo supera la profundidad del trie: filtrar el bucket del nodo
+            matches = [
+                (display, score)
+                for term, (display, score) in (node.bucket or {}).items()
+                if term.startswith(key)
+            ]
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return matches[:k]
+
+    def _path(self, root: _TrieNode, key: str, create: bool) -> List[_TrieNode]:
+        path = [root]
+        node = root
+        for char in key[:self.max_depth]:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return []
+                child = node.children[char] = _TrieNode()
+            path.append(child)
+            node = child
+        if node.bucket is None:
+            if not create:
+                return []
+            node.bucket = {}
+        return path
+
+    def _find_entry(self, root: _TrieNode, key: str) -> Tuple[Optional[str], int]:
+        path = self._path(root, key, create=False)
+        if not path:
+            return None, 0
+        return path[-1].bucket.get(key, (None, 0))
+
+    def _merge_top(self, node: _TrieNode) -> List[Tuple[int, str]]:
+        candidates = [(score, display) for display, score in (node.bucket or {}).values()]
+        for child in node.children.values():
+            candidates.extend(child.top)
+        candidates.sort(key=lambda item: (-item[0], item[1]))
+        return candidates[:self.top_k]
+
+    def _rebuild_tops(self, root: _TrieNode):
+        # Recorrido en postorden iterativo para no depender de la recursión
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                node.top = self._merge_top(node)
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children.values())
@@ -0,0 +1,125 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Hojas de pila de hilos en espera (sin CPU): se descartan salvo que se pidan
+_IDLE_LEAVES = {
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("selectors", "select"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+    ("asyncio.base_events", "_run_once"),
+}
+
+
+class SamplingProfiler:
+    """
+    Profiler estadístico por muestreo de pilas de todos los hilos del proceso.
+
+    Un hilo propio lee `sys._current_frames()` cada `interval` segundos mientras está
+    activo; no instala hooks de trazado, así que fuera de una sesión no tiene coste y
+    durante ella el coste es proporcional a la frecuencia de muestreo. Las pilas se
+    agregan en formato "collapsed" (frame;frame;frame cuenta), compatible con
+    flamegraph.pl, speedscope o inferno.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128, include_idle: bool = False,
+                 route_names: Optional[Dict[object, str]] = None):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.include_idle = include_idle
+        # code object del endpoint -> "METHOD /ruta", para atribuir cada muestra a su ruta
+        self.route_names = route_names or {}
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._labels: Dict[object, Tuple[str, str, str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def collapsed(self) -> str:
+        """Pilas agregadas en formato collapsed, de la más frecuente a la menos."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        own = threading.get_ident()
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(names.get(ident, f"thread-{ident}"), frame)
+            self.samples += 1
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay < 0:
+                # Si el muestreo se retrasa no se intenta recuperar: se baja la frecuencia
+                next_sample = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _sample(self, thread_name: str, frame):
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            frames.append(frame.f_code if frame.f_code in self._labels else self._label(frame))
+            frame = frame.f_back
+        if not frames:
+            return
+        leaf = self._labels[frames[0]]
+        if not self.include_idle and (leaf[0], leaf[1]) in _IDLE_LEAVES:
+            return
+
+        route = None
+        stack = []
+        for code in reversed(frames):
+            module, function, label = self._labels[code]
+            if route is None:
+                route = self.route_names.get(code)
+            stack.append(label)
+        self.stacks[(thread_name, route or "(sin ruta)", *stack)] += 1
+
+    def _label(self, frame):
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        # Capa de la aplicación a la que pertenece el frame, visible en el flamegraph
+        if module.startswith("app.routes."):
+            layer = "[ruta] "
+        elif module.startswith("app.services."):
+            layer = "[servicio] "
+        elif module == "app.database":
+            layer = "[bd] "
+        else:
+            layer = ""
+        self._labels[code] = (module, code.co_name, f"{layer}{module}:{code.co_name}")
+        return code
+
+
+def route_names(app) -> Dict[object, str]:
+    """Mapa code object del endpoint -> "METHOD /ruta" de las rutas de la aplicación."""
+    names = {}
+    for route in app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is not None:
+            methods = ",".join(sorted(getattr(route, "methods", None) or [])) or "WS"
+            names[code] = f"{methods} {route.path}"
+    return names
+
+
+# Solo una sesión a la vez: dos profilers muestreando duplicarían el coste y las muestras
+session_lock = threading.Lock()
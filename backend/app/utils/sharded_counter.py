@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class _Shard:
+    __slots__ = ("lock", "counts", "events", "oldest")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[object, List[int]] = {}
+        self.events = 0
+        self.oldest: Optional[float] = None
+
+
+class ShardedCounter:
+    """
+    Contadores en memoria repartidos en shards con su propio lock.
+
+    Cada clave acumula un vector de `width` contadores. Repartir las claves entre
+    shards evita que todos los hilos compitan por un único lock al registrar eventos.
+    """
+
+    def __init__(self, shards: int = 16, width: int = 1):
+        self.width = width
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def add(self, key, field: int = 0, amount: int = 1):
+        """Suma `amount` al contador `field` de una clave."""
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            values = shard.counts.get(key)
+            if values is None:
+                values = shard.counts[key] = [0] * self.width
+            values[field] += amount
+            shard.events += amount
+            if shard.oldest is None:
+                shard.oldest = time.monotonic()
+
+    def merge(self, counts: Dict[object, List[int]]):
+        """Vuelve a sumar contadores drenados (por ejemplo, tras un volcado fallido)."""
+        for key, values in counts.items():
+            for field, amount in enumerate(values):
+                if amount:
+                    self.add(key, field, amount)
+
+    def drain(self) -> Dict[object, List[int]]:
+        """Extrae y reinicia todos los contadores acumulados."""
+        drained: Dict[object, List[int]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                counts = shard.counts
+                shard.counts, shard.events, shard.oldest = {}, 0, None
+            drained.update(counts)
+        return drained
+
+    def pending_keys(self) -> int:
+        """Número de claves con contadores pendientes de volcar."""
+        return sum(len(shard.counts) for shard in self._shards)
+
+    def pending_events(self) -> int:
+        """Número de eventos acumulados desde el último volcado."""
+        return sum(shard.events for shard in self._shards)
+
+    def oldest_pending_age(self) -> float:
+        """Segundos desde el evento pendiente más antiguo (0 si no hay pendientes)."""
+        oldest = [shard.oldest for shard in self._shards if shard.oldest is not None]
+        return time.monotonic() - min(oldest) if oldest else 0.0
@@ -0,0 +1,308 @@
+import atexit
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Variable de entorno con la ruta del segmento: los workers la heredan del proceso que lo crea
+_ENV_PATH = "STREAM_BOX_SHARED_CACHE"
+
+# Colecciones con contador de versión propio (el orden fija su posición en el segmento);
+# "sticky" guarda los clientes que deben leer del primario tras escribir (ReplicaRouter) y
+# "suggest" solo avisa a los workers de que recarguen el índice de sugerencias
+COLLECTIONS = ("user", "video", "report", "sticky", "suggest")
+
+_MAGIC = b"SBXCACH1"
+_LAYOUT = struct.Struct("<8sII")
+_VERSION = struct.Struct("<Q")
+_VERSIONS_OFFSET = 64
+_MAX_COLLECTIONS = 16
+_TABLE_OFFSET = _VERSIONS_OFFSET + _MAX_COLLECTIONS * _VERSION.size
+# seq, hash de la clave, caducidad, versión, colección, flags, longitud del contenido
+_SLOT = struct.Struct("<QQdQHHI")
+_SLOT_FIELDS = struct.Struct("<QdQHHI")
+_PROBES = 4
+_COMPRESSED = 1
+_COMPRESS_MIN_BYTES = 1024
+
+_MISS = object()
+
+
+class SharedCache:
+    """
+    Caché clave-valor en un segmento de memoria compartida por todos los workers.
+
+    El segmento es un archivo mapeado con mmap (en /dev/shm si existe) que contiene
+    contadores de versión por colección y una tabla hash de tamaño fijo: cada ranura
+    guarda el valor serializado con pickle, la versión de su colección al cargarlo y
+    su caducidad. Invalidar una colección solo incrementa su versión, así que una
+    escritura en un worker descarta las entradas de esa colección en todos.
+
+    Las lecturas no toman ningún lock: cada ranura lleva un número de secuencia
+    (seqlock) que el escritor deja impar mientras la modifica, y el lector descarta
+    lo leído si la secuencia era impar o cambió durante la copia. Las escrituras se
+    serializan con un lock de archivo (flock) entre procesos y un lock entre hilos.
+    flock pertenece a la descripción de archivo abierta, que los hijos de fork
+    comparten con el padre: cada proceso reabre el archivo para tener su propio lock.
+    """
+
+    def __init__(self, path: Optional[str] = None, slots: int = 4096, slot_bytes: int = 16384,
+                 ttl: float = 30.0, enabled: bool = True):
+        self.ttl = ttl
+        self.path = None
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._file = None
+        self._lock_file = None
+        self._buffer = None
+        self._thread_lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ("hits", "misses", "stale", "expired", "busy", "stores", "too_large", "invalidations"), 0
+        )
+        if enabled:
+            self._open(path)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            path=os.environ.get(_ENV_PATH),
+            slots=settings.SHARED_CACHE_SLOTS,
+            slot_bytes=settings.SHARED_CACHE_SLOT_BYTES,
+            ttl=settings.SHARED_CACHE_TTL_SECONDS,
+            enabled=settings.SHARED_CACHE_ENABLED,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._buffer is not None
+
+    def _open(self, path: Optional[str]):
+        if path and os.path.exists(path):
+            # Segmento creado por el proceso padre: se adopta su geometría
+            self._file = open(path, "r+b")
+            if hasattr(os, "getuid") and os.fstat(self._file.fileno()).st_uid != os.getuid():
+                self._file.close()
+                raise RuntimeError(f"{path} pertenece a otro usuario: no se adopta como caché compartida")
+            magic, self.slots, self.slot_bytes = _LAYOUT.unpack(self._file.read(_LAYOUT.size))
+            if magic != _MAGIC:
+                raise RuntimeError(f"{path} no es un segmento de caché compartida")
+        else:
+            # Contiene filas de usuarios y claves derivadas de los tokens: solo lo lee su
+            # dueño (mkstemp lo crea con permisos 0600 y un nombre que no existía)
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            fd, path = tempfile.mkstemp(prefix=f"stream-box-cache-{os.getpid()}-", dir=directory)
+            self._file = os.fdopen(fd, "w+b")
+            self._file.write(_LAYOUT.pack(_MAGIC, self.slots, self.slot_bytes))
+            self._file.truncate(_TABLE_OFFSET + self.slots * self.slot_bytes)
+            self._file.flush()
+            os.environ[_ENV_PATH] = path
+            atexit.register(self._unlink, os.getpid())
+        self.path = path
+        self._buffer = mmap.mmap(self._file.fileno(), _TABLE_OFFSET + self.slots * self.slot_bytes)
+        self._lock_file = self._file
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # El lock entre hilos puede haberse copiado tomado por un hilo que no existe en el hijo
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(self.path, "r+b")
+
+    def _unlink(self, pid: int):
+        # Los procesos hijos creados con fork heredan el atexit: solo borra el creador
+        if os.getpid() == pid:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def version(self, collection: str) -> int:
+        """Versión actual de una colección (cambia con cada invalidación)."""
+        if self._buffer is None:
+            return 0
+        return _VERSION.unpack_from(self._buffer, _version_offset(collection))[0]
+
+    def get(self, collection: str, key, default=None):
+        """Valor vigente de `key` en la colección, o `default` si no está, caducó o se invalidó."""
+        value = self._lookup(collection, key)
+        return default if value is _MISS else value
+
+    def get_or_load(self, collection: str, key, loader: Callable, ttl: Optional[float] = None):
+        """Devuelve el valor cacheado o lo calcula con `loader` y lo guarda para todos los workers."""
+        value = self._lookup(collection, key)
+        if value is not _MISS:
+            return value
+        # La versión se lee antes de cargar: si alguien invalida mientras tanto, no se guarda
+        version = self.version(collection)
+        value = loader()
+        self.set(collection, key, value, version=version, ttl=ttl)
+        return value
+
+    def set(self, collection: str, key, value, version: Optional[int] = None, ttl: Optional[float] = None) -> bool:
+        """Guarda un valor; con `version`, solo si la colección no se ha invalidado desde entonces."""
+        if self._buffer is None:
+            return False
+        key_hash, key_bytes = _hash_key(collection, key)
+        payload, flags = pickle.dumps((key_bytes, value), pickle.HIGHEST_PROTOCOL), 0
+        if len(payload) >= _COMPRESS_MIN_BYTES:
+            compressed = zlib.compress(payload, 1)
+            if len(compressed) < len(payload):
+                payload, flags = compressed, _COMPRESSED
+        if len(payload) > self.slot_bytes - _SLOT.size:
+            self._stats["too_large"] += 1
+            return False
+
+        collection_index = COLLECTIONS.index(collection)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._write_lock():
+            current = self.version(collection)
+            if version is not None and version != current:
+                return False
+            offset = self._choose_slot(key_hash)
+            # Secuencia impar mientras se escribe (ya lo es si un worker murió a medias)
+            seq = (_VERSION.unpack_from(self._buffer, offset)[0] + 1) | 1
+            _VERSION.pack_into(self._buffer, offset, seq)
+            _SLOT_FIELDS.pack_into(self._buffer, offset + _VERSION.size,
+                                   key_hash, expires, current, collection_index, flags, len(payload))
+            start = offset + _SLOT.size
+            self._buffer[start:start + len(payload)] = payload
+            _VERSION.pack_into(self._buffer, offset, seq + 1)
+        self._stats["stores"] += 1
+        return True
+
+    def invalidate(self, *collections: str):
+        """Descarta en todos los workers las entradas de las colecciones indicadas."""
+        if self._buffer is None:
+            return
+        with self._write_lock():
+            for collection in collections:
+                offset = _version_offset(collection)
+                _VERSION.pack_into(self._buffer, offset, _VERSION.unpack_from(self._buffer, offset)[0] + 1)
+        self._stats["invalidations"] += len(collections)
+
+    def get_metrics(self):
+        """Aciertos y fallos de este worker, y versiones y ocupación del segmento compartido."""
+        if self._buffer is None:
+            return {"enabled": False}
+        now = time.time()
+        occupied = 0
+        for index in range(self.slots):
+            _, key_hash, expires, *_ = _SLOT.unpack_from(self._buffer, _TABLE_OFFSET + index * self.slot_bytes)
+            occupied += key_hash != 0 and expires > now
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": True,
+            "path": self.path,
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "occupied_slots": occupied,
+            "versions": {collection: self.version(collection) for collection in COLLECTIONS},
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            **self._stats,
+        }
+
+    def _lookup(self, collection: str, key):
+        if self._buffer is None:
+            return _MISS
+        buffer = self._buffer
+        key_hash, key_bytes = _hash_key(collection, key)
+        version = self.version(collection)
+        for offset in self._probe(key_hash):
+            seq, slot_hash, expires, slot_version, _, flags, length = _SLOT.unpack_from(buffer, offset)
+            if slot_hash != key_hash:
+                continue
+            if seq & 1:
+                self._stats["busy"] += 1
+                break
+            if slot_version != version:
+                self._stats["stale"] += 1
+                break
+            if expires < time.time():
+                self._stats["expired"] += 1
+                break
+            start = offset + _SLOT.size
+            payload = buffer[start:start + min(length, self.slot_bytes - _SLOT.size)]
+            if _VERSION.unpack_from(buffer, offset)[0] != seq:
+                # Se reescribió mientras se copiaba
+                self._stats["busy"] += 1
+                break
+            try:
+                if flags & _COMPRESSED:
+                    payload = zlib.decompress(payload)
+                stored_key, value = pickle.loads(payload)
+            except Exception:
+                self._stats["busy"] += 1
+                break
+            if stored_key == key_bytes:
+                self._stats["hits"] += 1
+                return value
+        self._stats["misses"] += 1
+        return _MISS
+
+    def _probe(self, key_hash: int):
+        first = key_hash % self.slots
+        for step in range(min(_PROBES, self.slots)):
+            yield _TABLE_OFFSET + ((first + step) % self.slots) * self.slot_bytes
+
+    def _choose_slot(self, key_hash: int) -> int:
+        """Ranura para escribir: la de la misma clave, una libre o caducada, o la que caduca antes."""
+        now = time.time()
+        victim, victim_expires = None, None
+        for offset in self._probe(key_hash):
+            _, slot_hash, expires, slot_version, collection_index, _, _ = _SLOT.unpack_from(self._buffer, offset)
+            if slot_hash == key_hash or slot_hash == 0 or expires < now:
+                return offset
+            if collection_index < len(COLLECTIONS) and slot_version != self.version(COLLECTIONS[collection_index]):
+                return offset
+            if victim is None or expires < victim_expires:
+                victim, victim_expires = offset, expires
+        return victim
+
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock:
+            lock_file = self._lock_file
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _version_offset(collection: str) -> int:
+    return _VERSIONS_OFFSET + COLLECTIONS.index(collection) * _VERSION.size
+
+
+def _hash_key(collection: str, key) -> tuple:
+    # hash() cambia entre procesos (PYTHONHASHSEED): se usa un hash estable
+    key_bytes = repr((collection, key)).encode()
+    key_hash = int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little") | 1
+    return key_hash, key_bytes
+
+
+# Segmento compartido: lo crea el primer proceso que importa el módulo (el maestro con
+# gunicorn --preload o el padre de serve.py) y los workers lo heredan
+shared_cache = SharedCache.from_settings()
@@ -0,0 +1,101 @@
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+def build_tag_matrix(video_rows: np.ndarray, tag_cols: np.ndarray, n_videos: int, n_tags: int,
+                     max_df: float = 0.01, min_df_abs: int = 500) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """
+    Construye la matriz dispersa video×etiqueta ponderada por IDF y normalizada por filas.
+
+    Args:
+        video_rows: Índice de fila (video) de cada par video-etiqueta
+        tag_cols: Índice de columna (etiqueta) de cada par video-etiqueta
+        n_videos: Número de videos (filas)
+        n_tags: Número de etiquetas (columnas)
+        max_df: Fracción máxima de videos en la que puede aparecer una etiqueta; las más
+            frecuentes apenas discriminan y disparan el coste del producto, así que se descartan
+        min_df_abs: Número de videos por debajo del cual una etiqueta nunca se descarta; sin
+            este mínimo, en catálogos pequeños `max_df` descartaría toda etiqueta compartida
+
+    Returns:
+        Tupla (matriz CSR con filas de norma 1, vector IDF por etiqueta)
+    """
+    pairs = sparse.csr_matrix(
+        (np.ones(len(video_rows), dtype=np.float32), (video_rows, tag_cols)),
+        shape=(n_videos, n_tags),
+    )
+    # Pares repetidos se suman al construir la matriz; se binarizan de nuevo
+    pairs.data[:] = 1.0
+
+    df = np.bincount(pairs.indices, minlength=n_tags).astype(np.float32)
+    idf = np.log((1.0 + n_videos) / (1.0 + df)) + 1.0
+    idf[df > max(min_df_abs, max_df * n_videos)] = 0.0
+
+    matrix = (pairs @ sparse.diags(idf.astype(np.float32))).tocsr()
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags((1.0 / norms).astype(np.float32)) @ matrix
+    return matrix.tocsr(), idf
+
+
+def vectorize(tag_cols: List[int], idf: np.ndarray) -> sparse.csr_matrix:
+    """Construye el vector normalizado de un video con el vocabulario e IDF existentes."""
+    cols = np.unique(np.asarray(tag_cols, dtype=np.int64))
+    weights = idf[cols].astype(np.float32)
+    norm = np.sqrt(float(weights @ weights)) or 1.0
+    return sparse.csr_matrix(
+        (weights / norm, (np.zeros(len(cols), dtype=np.int64), cols)),
+        shape=(1, len(idf)),
+    )
+
+
+def top_k_neighbours(query: sparse.csr_matrix, matrix_t: sparse.csr_matrix, query_users: np.ndarray,
+                     user_ids: np.ndarray, k: int, creator_boost: float = 0.0,
+                     query_rows: np.ndarray = None) -> List[List[Tuple[int, float]]]:
+    """
+    Calcula los k vecinos más similares de cada fila de `query` dentro de la matriz completa.
+
+    La similitud es el coseno entre vectores IDF más `creator_boost` cuando ambos videos
+    son del mismo creador. Solo se consideran candidatos con al menos una etiqueta en común.
+
+    Args:
+        query: Filas a consultar (CSR, normalizadas)
+        matrix_t: Transpuesta de la matriz completa en CSR (índice invertido etiqueta→videos);
+            se precalcula una vez para no transponer en cada consulta
+        query_users: ID de creador de cada fila de `query`
+        user_ids: ID de creador de cada fila de la matriz completa
+        k: Número de vecinos por fila
+        creator_boost: Bonificación para videos del mismo creador
+        query_rows: Fila de la matriz que corresponde a cada consulta, para excluirse a sí misma
+
+    Returns:
+        Para cada fila de `query`, lista de (fila en la matriz, puntuación) ordenada descendente
+    """
+    scores = (query @ matrix_t).tocsr()
+    counts = np.diff(scores.indptr)
+    owner = np.repeat(np.arange(query.shape[0]), counts)
+
+    if creator_boost:
+        same_creator = user_ids[scores.indices] == query_users[owner]
+        scores.data[same_creator] += creator_boost
+    if query_rows is not None:
+        scores.data[scores.indices == query_rows[owner]] = 0.0
+
+    results = []
+    for i in range(query.shape[0]):
+        start, end = scores.indptr[i], scores.indptr[i + 1]
+        data = scores.data[start:end]
+        indices = scores.indices[start:end]
+        if len(data) > k:
+            selected = np.argpartition(-data, k)[:k]
+        else:
+            selected = np.arange(len(data))
+        selected = selected[np.argsort(-data[selected], kind="stable")]
+        results.append([
+            (int(indices[j]), float(data[j])) for j in selected if data[j] > 0
+        ])
+    return results
@@ -0,0 +1,215 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.config import settings
+
+
+class _Job:
+    __slots__ = ("key", "func", "args", "kwargs", "attempts", "sequence")
+
+    def __init__(self, key, func, args, kwargs, sequence: int):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.sequence = sequence
+
+
+class TaskQueue:
+    """
+    Cola de trabajos en segundo plano dentro del proceso.
+
+    - Acotada: `enqueue` devuelve False cuando la cola está llena en lugar de bloquear.
+    - Con coalescencia por clave: si ya hay un trabajo pendiente con la misma clave se
+      reemplaza por el nuevo, así que solo se ejecuta la última escritura. Los trabajos
+      con la misma clave nunca se ejecutan a la vez: uno nuevo espera a que termine el
+      que está en curso, para que una escritura antigua no acabe después que la nueva.
+    - Con reintentos y backoff exponencial para los trabajos que fallan. Un reintento se
+      descarta si entretanto se encoló otro trabajo con su clave (aunque ya se ejecutara).
+    - Drenable: `stop` deja de aceptar trabajos y espera a que se vacíe.
+    """
+
+    def __init__(self, maxsize: int = 10000, workers: int = 2, max_retries: int = 3,
+                 backoff_seconds: float = 0.5, name: str = "background"):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.name = name
+        self._ready: "OrderedDict[object, _Job]" = OrderedDict()
+        self._delayed = []  # heap de (listo_en, secuencia, trabajo)
+        self._sequence = itertools.count()
+        self._latest = {}  # clave -> secuencia del último trabajo encolado con ella
+        self._in_flight = 0
+        self._running = set()  # claves de los trabajos en ejecución
+        self._accepting = False
+        self._threads = []
+        self._condition = threading.Condition()
+        self._metrics = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "executed": 0,
+            "retried": 0,
+            "failed": 0,
+            "superseded": 0,
+        }
+
+    def start(self):
+        """Arranca los hilos trabajadores."""
+        with self._condition:
+            if self._accepting:
+                return
+            self._accepting = True
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def enqueue(self, func: Callable, *args, key=None, **kwargs) -> bool:
+        """
+        Encola `func(*args, **kwargs)` para ejecutarlo en segundo plano.
+
+        Args:
+            func: Función a ejecutar
+            key: Clave de coalescencia; un trabajo pendiente con la misma clave se reemplaza
+
+        Returns:
+            True si el trabajo se encoló, False si la cola está llena o detenida
+        """
+        with self._condition:
+            if not self._accepting:
+                self._metrics["rejected"] += 1
+                return False
+
+            if key is not None and key in self._ready:
+                # Conservar la posición en la cola pero ejecutar solo el último trabajo
+                self._ready[key] = self._new_job(key, func, args, kwargs)
+                self._metrics["coalesced"] += 1
+                return True
+
+            if self._size() >= self.maxsize:
+                self._metrics["rejected"] += 1
+                return False
+
+            job_key = key if key is not None else ("anonymous", next(self._sequence))
+            self._ready[job_key] = self._new_job(job_key, func, args, kwargs)
+            self._metrics["enqueued"] += 1
+            self._condition.notify()
+            return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Deja de aceptar trabajos y espera a que los pendientes terminen."""
+        deadline = time.monotonic() + (timeout if timeout is not None else settings.BACKGROUND_QUEUE_DRAIN_SECONDS)
+        with self._condition:
+            self._accepting = False
+            # Los reintentos en espera se adelantan para drenar la cola antes de salir
+            while self._delayed:
+                _, _, job = heapq.heappop(self._delayed)
+                self._retry(job)
+            self._condition.notify_all()
+            while (self._ready or self._in_flight) and time.monotonic() < deadline:
+                self._condition.wait(timeout=deadline - time.monotonic())
+            pending = len(self._ready)
+            self._ready.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        if pending:
+            print(f"Cola {self.name}: {pending} trabajos descartados al detenerse")
+
+    def get_metrics(self):
+        """Métricas de la cola."""
+        with self._condition:
+            return {
+                **self._metrics,
+                "pending": len(self._ready),
+                "delayed": len(self._delayed),
+                "in_flight": self._in_flight,
+                "maxsize": self.maxsize,
+            }
+
+    def _size(self) -> int:
+        return len(self._ready) + len(self._delayed) + self._in_flight
+
+    def _new_job(self, key, func, args, kwargs) -> _Job:
+        job = _Job(key, func, args, kwargs, next(self._sequence))
+        self._latest[key] = job.sequence
+        return job
+
+    def _retry(self, job: _Job):
+        """Vuelve a poner un trabajo fallido en la cola, salvo que haya uno más reciente con su clave."""
+        if self._latest.get(job.key) != job.sequence:
+            self._metrics["superseded"] += 1
+        elif job.key not in self._ready:
+            self._ready[job.key] = job
+
+    def _finish(self, job: _Job):
+        if self._latest.get(job.key) == job.sequence:
+            del self._latest[job.key]
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, job = heapq.heappop(self._delayed)
+                    self._retry(job)
+                # El primero cuya clave no esté ya en ejecución
+                job = next((job for key, job in self._ready.items() if key not in self._running), None)
+                if job is not None:
+                    del self._ready[job.key]
+                    self._running.add(job.key)
+                    self._in_flight += 1
+                    return job
+                if not self._accepting and not self._delayed and not self._ready:
+                    return None
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._condition.wait(timeout=timeout)
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                job.func(*job.args, **job.kwargs)
+                outcome = "executed"
+            except Exception as e:
+                job.attempts += 1
+                outcome = "retried" if job.attempts <= self.max_retries else "failed"
+                print(f"Cola {self.name}: error en {getattr(job.func, '__name__', job.func)} "
+                      f"(intento {job.attempts}): {e}")
+            with self._condition:
+                self._in_flight -= 1
+                self._running.discard(job.key)
+                self._metrics[outcome] += 1
+                if outcome == "retried" and self._latest.get(job.key) == job.sequence:
+                    if self._accepting:
+                        ready_at = time.monotonic() + self.backoff_seconds * (2 ** (job.attempts - 1))
+                        heapq.heappush(self._delayed, (ready_at, next(self._sequence), job))
+                    else:
+                        # Drenando: reintentar sin esperar el backoff
+                        self._retry(job)
+                else:
+                    if outcome == "retried":
+                        # Ya se encoló un trabajo más reciente con la misma clave: gana ese
+                        self._metrics["superseded"] += 1
+                    self._finish(job)
+                self._condition.notify_all()
+
+
+# Cola compartida para efectos secundarios no críticos de las peticiones
+background_queue = TaskQueue(
+    maxsize=settings.BACKGROUND_QUEUE_MAXSIZE,
+    workers=settings.BACKGROUND_QUEUE_WORKERS,
+    max_retries=settings.BACKGROUND_QUEUE_MAX_RETRIES,
+    backoff_seconds=settings.BACKGROUND_QUEUE_BACKOFF_SECONDS,
+)
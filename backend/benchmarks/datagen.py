@@ -0,0 +1,214 @@
+"""
+Datos sintéticos para las pruebas de rendimiento sobre MySQL.
+
+El volumen se controla con `scale` (número de videos); el resto de tablas se
+dimensiona en proporción. La popularidad de etiquetas y creadores sigue una
+distribución Zipf para que los planes se evalúen con distribuciones sesgadas,
+como en producción.
+"""
+import json
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+BATCH_SIZE = 5000
+# Contraseña de todos los usuarios sintéticos (para los escenarios de login)
+PASSWORD = "benchmark"
+DATABASE_DIR = Path(__file__).resolve().parents[2] / "database"
+WORDS = [
+    "musica", "directo", "tutorial", "python", "gaming", "noticias", "cocina", "viaje",
+    "futbol", "podcast", "ciencia", "historia", "cine", "arte", "fitness", "bitcoin",
+]
+
+
+def dimensions(scale: int) -> dict:
+    """Tamaño de cada tabla para una escala dada."""
+    return {
+        "videos": scale,
+        "users": max(50, scale // 20),
+        "tags": max(50, scale // 100),
+        "albums": max(10, scale // 50),
+        "reports": max(10, scale // 10),
+    }
+
+
+def _zipf_index(rng: random.Random, n: int, a: float = 1.2) -> int:
+    while True:
+        value = int(rng.paretovariate(a))
+        if value <= n:
+            return value - 1
+
+
+def _insert(cursor, query: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(query, batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+
+
+def connect(database=None):
+    """Conexión con la configuración del backend a la base indicada."""
+    from app.config import settings
+
+    return pymysql.connect(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=database,
+        charset='utf8mb4',
+        cursorclass=DictCursor,
+        autocommit=True
+    )
+
+
+def create_database(database: str, scale: int, seed_value: int = 42):
+    """Recrea `database` con el esquema, los procedimientos, las migraciones y datos sintéticos."""
+    from app.config import settings
+
+    if str(DATABASE_DIR) not in sys.path:
+        sys.path.insert(0, str(DATABASE_DIR))
+    import migrate
+
+    if database == settings.DB_NAME:
+        raise SystemExit(f"La base de pruebas no puede ser la de la aplicación ({settings.DB_NAME})")
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            print(f"Cargando esquema y procedimientos en {database}...")
+            for script in ("01-schemes.sql", "03-procedures.sql"):
+                sql = re.sub(r"\bstream_box\b", database, (DATABASE_DIR / "scripts" / script).read_text(encoding="utf-8"))
+                for statement in migrate.split_statements(sql):
+                    cursor.execute(statement)
+            migrate.prepare(cursor)
+            migrate.migrate(cursor, migrate.discover_migrations(), migrate.applied_migrations(cursor))
+        print(f"Generando datos sintéticos (escala {scale})...")
+        seed(connection, scale, seed_value, log=lambda message: print(f"  {message}"))
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE benchmark_meta (scale INT NOT NULL)")
+            cursor.execute("INSERT INTO benchmark_meta (scale) VALUES (%s)", [scale])
+    finally:
+        connection.close()
+
+
+def read_scale(connection) -> int:
+    """Escala con la que se generó la base de pruebas."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT scale FROM benchmark_meta")
+        return cursor.fetchone()["scale"]
+
+
+def seed(connection, scale: int, seed_value: int = 42, log=print):
+    """
+    Llena una base de datos vacía (esquema y procedimientos ya cargados).
+
+    Los IDs son consecutivos desde 1 en todas las tablas, de modo que los llamadores
+    pueden elegir IDs existentes a partir de `dimensions(scale)`. El usuario 1 es
+    administrador y todos comparten la contraseña PASSWORD.
+    """
+    from app.utils.auth import get_password_hash
+
+    rng = random.Random(seed_value)
+    sizes = dimensions(scale)
+    now = datetime.now().replace(microsecond=0)
+    password_hash = get_password_hash(PASSWORD)
+
+    def timestamp():
+        return now - timedelta(seconds=rng.randint(0, 2 * 365 * 24 * 3600))
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        cursor.execute("INSERT IGNORE INTO role (id, name) VALUES (1, 'CREATOR'), (2, 'CONSUMER'), (3, 'ADMIN')")
+
+        log(f"usuarios: {sizes['users']}")
+        _insert(cursor, """INSERT INTO user (id, username, email, password_hash, first_name, last_name,
+                                             role_id, status, last_login, created_at)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""", (
+            (i, f"user{i}", f"user{i}@example.com", password_hash, "Nombre", "Apellido",
+             3 if i == 1 else rng.choice((1, 1, 2, 2, 2)),
+             "suspendido" if i > 1 and rng.random() < 0.02 else "activo", timestamp(), timestamp())
+            for i in range(1, sizes["users"] + 1)
+        ))
+
+        log(f"etiquetas: {sizes['tags']}")
+        _insert(cursor, "INSERT INTO video_tag (id, name, status) VALUES (%s, %s, 'activo')", (
+            (i, f"{rng.choice(WORDS)}-{i}") for i in range(1, sizes["tags"] + 1)
+        ))
+
+        log(f"videos: {sizes['videos']}")
+        _insert(cursor, """INSERT INTO video (id, user_id, title, youtube_link, youtube_id, description, type,
+                                              status, thumbnail, created_at)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""", (
+            (i, _zipf_index(rng, sizes["users"]) + 1,
+             f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+             f"https://www.youtube.com/watch?v={i:011d}", f"{i:011d}",
+             " ".join(rng.choices(WORDS, k=8)),
+             "grabado" if rng.random() < 0.7 else "en_vivo",
+             "suspendido" if rng.random() < 0.05 else "activo",
+             None, timestamp())
+            for i in range(1, sizes["videos"] + 1)
+        ))
+
+        log("etiquetas por video")
+
+        def tag_maps():
+            for video_id in range(1, sizes["videos"] + 1):
+                tags = {_zipf_index(rng, sizes["tags"]) + 1 for _ in range(rng.randint(1, 6))}
+                for tag_id in tags:
+                    yield video_id, tag_id
+
+        _insert(cursor, "INSERT INTO video_tag_map (video_id, tag_id) VALUES (%s, %s)", tag_maps())
+
+        log(f"álbumes: {sizes['albums']}")
+        _insert(cursor, """INSERT INTO album (id, user_id, title, status, description, created_at)
+                           VALUES (%s, %s, %s, 'activo', %s, %s)""", (
+            (i, rng.randint(1, sizes["users"]), f"Álbum {i}", "Descripción", timestamp())
+            for i in range(1, sizes["albums"] + 1)
+        ))
+
+        def album_maps():
+            for album_id in range(1, sizes["albums"] + 1):
+                for video_id in rng.sample(range(1, sizes["videos"] + 1), min(10, sizes["videos"])):
+                    yield album_id, video_id
+
+        _insert(cursor, "INSERT INTO album_video_map (album_id, video_id) VALUES (%s, %s)", album_maps())
+
+        log(f"reportes: {sizes['reports']}")
+        _insert(cursor, """INSERT INTO report (id, video_id, user_id, reason, description, status, created_at)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s)""", (
+            (i, _zipf_index(rng, sizes["videos"]) + 1, rng.randint(1, sizes["users"]),
+             rng.choice(("spam", "contenido inapropiado", "derechos de autor")), "Reporte sintético",
+             "pendiente" if rng.random() < 0.2 else "resuelto", timestamp())
+            for i in range(1, sizes["reports"] + 1)
+        ))
+
+        log("estadísticas de video")
+        _insert(cursor, "INSERT INTO video_stats (video_id, views, impressions) VALUES (%s, %s, %s)", (
+            (i, views, views * rng.randint(2, 20))
+            for i in range(1, sizes["videos"] + 1)
+            if rng.random() < 0.9
+            for views in (int(rng.paretovariate(1.1) * 10),)
+        ))
+
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        # Estadísticas actualizadas para que el optimizador vea la distribución real
+        for table in ("user", "video", "video_tag", "video_tag_map", "album", "album_video_map",
+                      "report", "video_stats"):
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+    return sizes
+
+
+def sample_ids(scale: int, count: int, seed_value: int = 7) -> str:
+    """Lista JSON de IDs de video existentes (para los procedimientos que reciben JSON)."""
+    rng = random.Random(seed_value)
+    return json.dumps(rng.sample(range(1, scale + 1), min(count, scale)))
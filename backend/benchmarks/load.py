@@ -0,0 +1,349 @@
+"""
+Prueba de carga de extremo a extremo sobre la aplicación real (main:app).
+
+Genera (con --setup) un catálogo sintético en una base de datos aparte y lanza una
+mezcla de tráfico: feeds anónimos, búsqueda y sugerencias, ediciones autenticadas de
+perfil y álbumes, y moderación de administración. Informa del throughput y de los
+percentiles p50/p95/p99 por ruta, y puede compararse con un resultado anterior.
+
+Uso:
+    python -m benchmarks.load --setup --scale 20000
+    python -m benchmarks.load --duration 60 --concurrency 32 --output base.json
+    python -m benchmarks.load --compare base.json --output actual.json
+    python -m benchmarks.load --url http://localhost:8000    # servidor ya arrancado con DB_NAME=<base de pruebas>
+
+Sin --url la aplicación se ejecuta en el mismo proceso (httpx + ASGI) contra la base de
+pruebas. Con --url el servidor debe usar la misma base y el mismo SECRET_KEY.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+
+class Context:
+    """Datos de la base de pruebas con los que se construyen las peticiones."""
+
+    def __init__(self, connection, rng: random.Random):
+        from benchmarks import datagen
+        from app.utils.auth import create_access_token
+
+        self.rng = rng
+        self.sizes = datagen.dimensions(datagen.read_scale(connection))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, role_id FROM user WHERE status = 'activo'")
+            users = cursor.fetchall()
+            cursor.execute("""SELECT a.id, a.user_id FROM album a JOIN user u ON u.id = a.user_id
+                              WHERE u.role_id = 1 AND u.status = 'activo' AND a.status = 'activo'""")
+            self.albums = [(row["id"], row["user_id"]) for row in cursor.fetchall()]
+            cursor.execute("SELECT id FROM report WHERE status = 'pendiente'")
+            self.pending_reports = [row["id"] for row in cursor.fetchall()]
+
+        self.users = [row["id"] for row in users]
+        self.admins = [row["id"] for row in users if row["role_id"] == 3]
+        # Tokens firmados directamente: el coste de bcrypt solo se mide en el escenario de login
+        self._tokens = {}
+        self._create_token = create_access_token
+        self.words = datagen.WORDS
+        self.password = datagen.PASSWORD
+
+    def headers(self, user_id: int) -> dict:
+        token = self._tokens.get(user_id)
+        if token is None:
+            token = self._tokens[user_id] = self._create_token({"sub": str(user_id)})
+        return {"Authorization": f"Bearer {token}"}
+
+    def video_id(self) -> int:
+        # Popularidad sesgada: los videos con ID bajo concentran las visitas
+        n = self.sizes["videos"]
+        return min(n, int(self.rng.paretovariate(1.1))) if self.rng.random() < 0.8 else self.rng.randint(1, n)
+
+
+def _feed(path):
+    return lambda ctx: ("GET", path, {})
+
+
+def _video(ctx):
+    return "GET", f"/videos/{ctx.video_id()}", {}
+
+
+def _related(ctx):
+    return "GET", f"/videos/{ctx.video_id()}/related", {}
+
+
+def _suggest(ctx):
+    word = ctx.rng.choice(ctx.words)
+    return "GET", "/videos/suggest", {"params": {"prefix": word[:ctx.rng.randint(1, 4)]}}
+
+
+def _search(ctx):
+    return "GET", "/videos/search", {"params": {"q": ctx.rng.choice(ctx.words)}}
+
+
+def _events(ctx):
+    events = [{"video_id": ctx.video_id(), "kind": ctx.rng.choice(("view", "impression"))} for _ in range(10)]
+    return "POST", "/videos/events", {"json": {"events": events}}
+
+
+def _profile(ctx):
+    return "GET", "/profile/", {"headers": ctx.headers(ctx.rng.choice(ctx.users))}
+
+
+def _profile_edit(ctx):
+    user_id = ctx.rng.choice(ctx.users)
+    body = {"first_name": f"Nombre{ctx.rng.randint(1, 999)}"}
+    return "PUT", "/profile/", {"json": body, "headers": ctx.headers(user_id)}
+
+
+def _albums(ctx):
+    _, user_id = ctx.rng.choice(ctx.albums)
+    return "GET", "/my/albums/", {"headers": ctx.headers(user_id)}
+
+
+def _album_edit(ctx):
+    album_id, user_id = ctx.rng.choice(ctx.albums)
+    body = {"title": f"Álbum {album_id}", "description": f"Editado {ctx.rng.randint(1, 999)}"}
+    return "PUT", f"/my/albums/{album_id}", {"json": body, "headers": ctx.headers(user_id)}
+
+
+def _admin_videos(ctx):
+    params = {"page": ctx.rng.randint(1, 20), "sort": ctx.rng.choice(("created_at", "report_count"))}
+    return "GET", "/admin/videos", {"params": params, "headers": ctx.headers(ctx.admins[0])}
+
+
+def _admin_reports(ctx):
+    params = {"page": ctx.rng.randint(1, 5), "status": "pendiente"}
+    return "GET", "/admin/reports", {"params": params, "headers": ctx.headers(ctx.admins[0])}
+
+
+def _resolve_report(ctx):
+    report_id = ctx.pending_reports.pop() if ctx.pending_reports else ctx.rng.randint(1, ctx.sizes["reports"])
+    return "PUT", f"/admin/reports/{report_id}/resolve", {"headers": ctx.headers(ctx.admins[0])}
+
+
+def _login(ctx):
+    body = {"username": f"user{ctx.rng.choice(ctx.users)}", "password": ctx.password}
+    return "POST", "/auth/login", {"json": body}
+
+
+# (ruta, peso, constructor de la petición)
+SCENARIOS = [
+    ("GET /videos/", 6, _feed("/videos/")),
+    ("GET /videos/?sort=popular", 3, _feed("/videos/?sort=popular")),
+    ("GET /videos/live", 2, _feed("/videos/live")),
+    ("GET /videos/{id}", 20, _video),
+    ("GET /videos/{id}/related", 10, _related),
+    ("GET /videos/suggest", 15, _suggest),
+    ("GET /videos/search", 6, _search),
+    ("POST /videos/events", 15, _events),
+    ("GET /profile/", 5, _profile),
+    ("PUT /profile/", 2, _profile_edit),
+    ("GET /my/albums/", 4, _albums),
+    ("PUT /my/albums/{id}", 2, _album_edit),
+    ("GET /admin/videos", 2, _admin_videos),
+    ("GET /admin/reports", 2, _admin_reports),
+    ("PUT /admin/reports/{id}/resolve", 1, _resolve_report),
+    ("POST /auth/login", 1, _login),
+]
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(client: httpx.AsyncClient, ctx: Context, scenarios, duration: float, warmup: float,
+                   concurrency: int):
+    """Ejecuta la mezcla de tráfico y devuelve latencias y errores por ruta."""
+    names = [name for name, _, _ in scenarios]
+    weights = [weight for _, weight, _ in scenarios]
+    builders = {name: builder for name, _, builder in scenarios}
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    statuses = defaultdict(lambda: defaultdict(int))
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def worker():
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                return
+            name = ctx.rng.choices(names, weights)[0]
+            method, path, kwargs = builders[name](ctx)
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            elapsed_ms = (time.perf_counter() - request_started) * 1000
+            if request_started < measure_from:
+                continue
+            latencies[name].append(elapsed_ms)
+            statuses[name][status] += 1
+            if status == 0 or status >= 500:
+                errors[name] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    measured = time.perf_counter() - measure_from
+    return latencies, errors, statuses, measured
+
+
+def build_report(latencies, errors, statuses, measured: float, meta: dict) -> dict:
+    routes = {}
+    all_latencies = []
+    for name, values in latencies.items():
+        values.sort()
+        all_latencies.extend(values)
+        routes[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "statuses": {str(code): count for code, count in sorted(statuses[name].items())},
+            "throughput_rps": round(len(values) / measured, 2),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "max_ms": round(values[-1], 2),
+        }
+    all_latencies.sort()
+    total = {
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(all_latencies) / measured, 2),
+        "p50_ms": round(percentile(all_latencies, 0.50), 2),
+        "p95_ms": round(percentile(all_latencies, 0.95), 2),
+        "p99_ms": round(percentile(all_latencies, 0.99), 2),
+    }
+    return {"meta": {**meta, "measured_seconds": round(measured, 2)}, "routes": routes, "total": total}
+
+
+def print_report(report: dict):
+    header = f"{'ruta':36} {'peticiones':>10} {'errores':>8} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = sorted(report["routes"].items(), key=lambda item: -item[1]["requests"])
+    for name, stats in rows + [("TOTAL", report["total"])]:
+        print(f"{name:36} {stats['requests']:>10} {stats['errors']:>8} {stats['throughput_rps']:>9.1f} "
+              f"{stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms")
+
+
+def compare(baseline: dict, current: dict, tolerance: float, min_delta_ms: float):
+    """Compara dos resultados; devuelve la lista de regresiones."""
+    regressions = []
+    print(f"\nComparación con la línea base (tolerancia {tolerance:.0%}):")
+    print(f"{'ruta':36} {'p95 base':>10} {'p95 actual':>11} {'Δ':>8} {'req/s base':>11} {'req/s actual':>12}")
+    routes = sorted(set(baseline["routes"]) | set(current["routes"]))
+    for name in routes + ["TOTAL"]:
+        before = baseline["total"] if name == "TOTAL" else baseline["routes"].get(name)
+        after = current["total"] if name == "TOTAL" else current["routes"].get(name)
+        if before is None or after is None:
+            print(f"{name:36} {'(solo en uno de los dos resultados)':>40}")
+            continue
+        delta = (after["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        print(f"{name:36} {before['p95_ms']:>8.1f}ms {after['p95_ms']:>9.1f}ms {delta:>+8.0%} "
+              f"{before['throughput_rps']:>11.1f} {after['throughput_rps']:>12.1f}")
+        if delta > tolerance and after["p95_ms"] - before["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {after['p95_ms']:.1f} ms")
+        error_rate_before = before["errors"] / max(before["requests"], 1)
+        error_rate_after = after["errors"] / max(after["requests"], 1)
+        if error_rate_after > error_rate_before + 0.01:
+            regressions.append(f"{name}: errores {error_rate_before:.1%} -> {error_rate_after:.1%}")
+    before_rps, after_rps = baseline["total"]["throughput_rps"], current["total"]["throughput_rps"]
+    if before_rps and after_rps < before_rps * (1 - tolerance):
+        regressions.append(f"throughput total {before_rps:.1f} -> {after_rps:.1f} req/s")
+    return regressions
+
+
+async def main_async(args, database: str):
+    from benchmarks import datagen
+
+    rng = random.Random(args.seed)
+    connection = datagen.connect(database)
+    try:
+        ctx = Context(connection, rng)
+    finally:
+        connection.close()
+
+    scenarios = [s for s in SCENARIOS if not args.only or any(token in s[0] for token in args.only)]
+    meta = {
+        "database": database,
+        "scale": ctx.sizes["videos"],
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "target": args.url or "in-process",
+    }
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            results = await run_load(client, ctx, scenarios, args.duration, args.warmup, args.concurrency)
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        # ASGITransport no emite eventos lifespan: se ejecuta el lifespan de la app a mano
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                         timeout=args.timeout) as client:
+                results = await run_load(client, ctx, scenarios, args.duration, args.warmup, args.concurrency)
+    return build_report(*results, meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Base de pruebas (por defecto <DB_NAME>_bench)")
+    parser.add_argument("--setup", action="store_true", help="Recrea y llena la base de pruebas")
+    parser.add_argument("--scale", type=int, default=20_000, help="Número de videos sintéticos (con --setup)")
+    parser.add_argument("--url", help="URL de un servidor ya arrancado (por defecto, en el mismo proceso)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de medición")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Segundos de calentamiento sin medir")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--only", action="append", help="Solo las rutas que contengan este texto")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Guarda el resultado en JSON")
+    parser.add_argument("--compare", help="Resultado JSON anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Empeoramiento relativo tolerado")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Diferencia mínima de p95 para considerar una regresión")
+    args = parser.parse_args()
+    args.database = args.database or f"{os.getenv('DB_NAME', 'stream_box')}_bench"
+
+    from app.config import settings
+    from benchmarks import datagen
+
+    if args.setup:
+        datagen.create_database(args.database, args.scale, args.seed)
+    # Las conexiones leen settings.DB_NAME en cada llamada: apuntar la app a la base de pruebas
+    settings.DB_NAME = args.database
+
+    report = asyncio.run(main_async(args, args.database))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado guardado en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegresiones:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\nSin regresiones")
+
+
+if __name__ == "__main__":
+    main()
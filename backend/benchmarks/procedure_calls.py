@@ -0,0 +1,100 @@
+"""
+Compara `cursor.callproc` con la ejecución directa de `CALL` (app.database.call_procedure)
+en los procedimientos más llamados de la API.
+
+Para cada procedimiento mide la latencia por llamada sobre la misma conexión y las
+sentencias que recibe el servidor por llamada (variable de sesión `Questions`), que
+con callproc incluyen el `SET @_proc_N=...` previo al `CALL`.
+
+Uso:
+    python -m benchmarks.procedure_calls --setup --scale 20000
+    python -m benchmarks.procedure_calls --iterations 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+HOT_PROCEDURES = ("sp_get_user_details_by_id", "sp_get_video")
+
+
+def _questions(cursor) -> int:
+    cursor.execute("SHOW SESSION STATUS LIKE 'Questions'")
+    return int(cursor.fetchone()["Value"])
+
+
+def _run_callproc(cursor, procedure_name, params):
+    cursor.callproc(procedure_name, params)
+    cursor.fetchall()
+    # callproc deja pendiente el estado del CALL; se descarta como haría cursor.close()
+    while cursor.nextset():
+        pass
+
+
+def measure(connection, procedure_name: str, ids, iterations: int, direct: bool):
+    """Latencias (ms) y sentencias por llamada de un modo de ejecución."""
+    from app.database import call_procedure
+
+    timings = []
+    with connection.cursor() as cursor:
+        before = _questions(cursor)
+        for i in range(iterations):
+            params = [ids[i % len(ids)]]
+            started = time.perf_counter()
+            if direct:
+                call_procedure(cursor, procedure_name, params)
+            else:
+                _run_callproc(cursor, procedure_name, params)
+            timings.append((time.perf_counter() - started) * 1000)
+        # La propia consulta SHOW cuenta como una sentencia
+        statements = (_questions(cursor) - before - 1) / iterations
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "statements": statements,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Base de pruebas (por defecto <DB_NAME>_bench)")
+    parser.add_argument("--setup", action="store_true", help="Recrea y llena la base de pruebas")
+    parser.add_argument("--scale", type=int, default=20_000, help="Número de videos sintéticos (con --setup)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    args.database = args.database or f"{os.getenv('DB_NAME', 'stream_box')}_bench"
+
+    from benchmarks import datagen
+
+    if args.setup:
+        datagen.create_database(args.database, args.scale, args.seed)
+
+    connection = datagen.connect(args.database)
+    try:
+        sizes = datagen.dimensions(datagen.read_scale(connection))
+        rng = random.Random(args.seed)
+        id_ranges = {"sp_get_user_details_by_id": sizes["users"], "sp_get_video": sizes["videos"]}
+
+        print(f"{'procedimiento':28} {'modo':9} {'media ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'sentencias':>10}")
+        for procedure_name in HOT_PROCEDURES:
+            ids = [rng.randint(1, id_ranges[procedure_name]) for _ in range(1000)]
+            # Calentamiento para que ambos modos midan con la caché de InnoDB caliente
+            measure(connection, procedure_name, ids, min(200, args.iterations), direct=True)
+            results = {}
+            for mode, direct in (("callproc", False), ("CALL", True)):
+                results[mode] = measure(connection, procedure_name, ids, args.iterations, direct)
+                r = results[mode]
+                print(f"{procedure_name:28} {mode:9} {r['mean_ms']:9.3f} {r['p50_ms']:8.3f} "
+                      f"{r['p99_ms']:8.3f} {r['statements']:10.1f}")
+            saved = 1 - results["CALL"]["mean_ms"] / results["callproc"]["mean_ms"]
+            print(f"{'':28} ahorro medio {saved:.1%}\n")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Regresiones de planes de ejecución de los procedimientos almacenados.
+
+Carga el esquema, los procedimientos y las migraciones en una base de datos aparte,
+la llena con datos sintéticos y ejecuta EXPLAIN FORMAT=JSON sobre las sentencias de
+cada sp_* que usan los servicios. Comprueba que no haya recorridos completos de las
+tablas grandes, que los feeds no ordenen con filesort y que las filas examinadas
+estimadas no superen un límite, y compara cada plan con la línea base guardada.
+
+Uso:
+    python -m benchmarks.query_plans --setup --scale 100000   # crea y llena la base de pruebas
+    python -m benchmarks.query_plans                          # comprueba y compara con la línea base
+    python -m benchmarks.query_plans --update-baseline        # acepta los planes actuales
+    python -m benchmarks.query_plans --procedure sp_get_videos --verbose
+"""
+import argparse
+import difflib
+import json
+import math
+import re
+import sys
+from pathlib import Path
+
+import pymysql
+
+from app.config import settings
+from benchmarks import datagen
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DATABASE_DIR = BACKEND_DIR.parent / "database"
+SCRIPTS_DIR = DATABASE_DIR / "scripts"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "query_plans_baseline.json"
+
+sys.path.insert(0, str(DATABASE_DIR))
+import migrate  # noqa: E402
+
+# Tablas que crecen con el catálogo: un recorrido completo sobre ellas es una regresión
+LARGE_TABLES = {"user", "video", "video_tag_map", "album", "album_video_map", "report", "video_stats"}
+
+# Feeds ordenados por fecha: deben leerse en el orden de un índice, sin filesort
+NO_FILESORT = {
+    "sp_get_videos", "sp_get_videos_by_type", "sp_get_videos_by_user", "sp_get_user_reports",
+}
+
+# Listados completos: devuelven (casi) toda la tabla, así que no se acotan las filas
+UNBOUNDED = {
+    "sp_get_videos", "sp_get_videos_by_type", "sp_get_videos_popular", "sp_get_video_index_data",
+    "sp_get_all_reports", "sp_get_video_tags", "sp_search_videos",
+}
+
+# Recorridos completos aceptados, con el motivo
+FULL_SCAN_OK = {
+    "sp_search_videos": "LIKE '%término%' no puede usar índices B-tree",
+    "sp_get_video_index_data": "carga todo el catálogo para los índices en memoria",
+    "sp_get_videos_popular": "ordena todo el catálogo por vistas",
+    "sp_get_all_reports": "ordena por una expresión (status = 'pendiente')",
+}
+
+# Búsquedas que deben resolverse con un índice concreto (una conversión de juego de
+# caracteres o colación entre parámetro y columna lo anula)
+REQUIRED_KEYS = {
+    "sp_get_video_by_youtube_id": "uq_video_youtube_id",
+}
+
+SUBQUERY_KEYS = ("select_list_subqueries", "attached_subqueries", "optimized_away_subqueries",
+                 "order_by_subqueries", "having_subqueries", "group_by_subqueries")
+WRAPPER_KEYS = ("ordering_operation", "grouping_operation", "duplicates_removal", "windowing", "buffer_result")
+
+PROCEDURE = re.compile(r"CREATE\s+PROCEDURE\s+(\w+)\s*\((.*?)\)\s*(?:\w+\s*:\s*)?BEGIN\b(.*)\bEND\s*$", re.S | re.I)
+CONTROL = re.compile(
+    r"^\s*(?:(?:IF|ELSEIF|WHILE)\b.*?\b(?:THEN|DO)\b|ELSE\b|END\s+(?:IF|WHILE)\b|BEGIN\b)", re.S | re.I
+)
+COMMENT = re.compile(r"^\s*--[^\n]*\n?")
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+CHAR_TYPE = re.compile(r"^(?:VAR)?CHAR\((\d+)\)(?:\s+CHARACTER\s+SET\s+(\w+))?")
+SQL_KEYWORDS = {"WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "ON", "SET", "ORDER", "GROUP", "LIMIT", "USING", "VALUES"}
+
+
+def used_procedures():
+    """Procedimientos invocados desde el código de la aplicación."""
+    names = set()
+    for path in (BACKEND_DIR / "app").rglob("*.py"):
+        names.update(re.findall(r"[\"'](sp_\w+)[\"']", path.read_text(encoding="utf-8")))
+    return names
+
+
+def parse_procedures():
+    """Devuelve {nombre: (parámetros [(nombre, tipo)], cuerpo)} de 03-procedures.sql."""
+    procedures = {}
+    sql = (SCRIPTS_DIR / "03-procedures.sql").read_text(encoding="utf-8")
+    for statement in migrate.split_statements(sql):
+        match = PROCEDURE.match(statement)
+        if not match:
+            continue
+        name, raw_params, body = match.groups()
+        params = []
+        for param in filter(None, (p.strip() for p in raw_params.split(","))):
+            parts = param.split()
+            if parts[0].upper() in ("IN", "OUT", "INOUT"):
+                parts = parts[1:]
+            params.append((parts[0], " ".join(parts[1:]).upper()))
+        procedures[name] = (params, body)
+    return procedures
+
+
+def extract_statements(body: str):
+    """Sentencias explicables (SELECT/UPDATE/DELETE/INSERT ... SELECT) del cuerpo de un procedimiento."""
+    statements = []
+    for piece in body.split(";"):
+        text = piece
+        while True:
+            stripped = COMMENT.sub("", CONTROL.sub("", text, count=1), count=1)
+            if stripped == text:
+                break
+            text = stripped
+        text = text.strip()
+        keyword = text.split(None, 1)[0].upper() if text else ""
+        if keyword in ("SELECT", "WITH"):
+            if not re.search(r"\bFROM\b", text, re.I):
+                continue  # SELECT de literales o variables
+            text = re.sub(r"\bINTO\s+\w+(?:\s*,\s*\w+)*\s+(?=FROM\b)", "", text, flags=re.I)
+        elif keyword in ("UPDATE", "DELETE"):
+            pass
+        elif keyword == "INSERT" and re.search(r"\bSELECT\b", text, re.I):
+            pass
+        else:
+            continue
+        statements.append(text)
+    return statements
+
+
+def sample_value(procedure: str, name: str, type_: str, sizes: dict, scale: int):
+    """Valor de ejemplo para un parámetro o variable local, a partir de su nombre y tipo."""
+    lowered = name.lower()
+    if lowered == "i":
+        return 0
+    if type_.startswith("JSON"):
+        if "stats" in lowered:
+            return json.dumps([[video_id, 1, 3] for video_id in json.loads(datagen.sample_ids(scale, 50))])
+        if "tags" in lowered:
+            return json.dumps(["musica", "1"])
+        return datagen.sample_ids(scale, 50)
+    if "youtube_id" in lowered:
+        return f"{sizes['videos'] // 2:011d}"
+    if any(token in type_ for token in ("INT", "DECIMAL")) or lowered.endswith("_id"):
+        entity = next((e for e in ("video", "album", "report", "user", "role", "tag") if e in lowered), None)
+        if entity is None:
+            entity = next((e for e in ("album", "report", "video") if e in procedure), "user")
+        return {
+            "video": sizes["videos"] // 2,
+            "album": sizes["albums"] // 2,
+            "report": sizes["reports"] // 2,
+            "user": sizes["users"] // 2,
+            "role": 2,
+            "tag": 1,
+        }[entity]
+    if "TIMESTAMP" in type_ or "DATE" in type_:
+        return "2025-01-01 00:00:00"
+    if "type" in lowered:
+        return "grabado"
+    if "status" in lowered:
+        return "activo"
+    if "username" in lowered:
+        return f"user{sizes['users'] // 2}"
+    if "email" in lowered:
+        return f"user{sizes['users'] // 2}@example.com"
+    if "search" in lowered or "term" in lowered:
+        return "musica"
+    return "x"
+
+
+def bind(statement: str, procedure: str, params, body: str, sizes: dict, scale: int, escape,
+         charset: str = "utf8mb4"):
+    """
+    Sustituye parámetros y variables locales por literales.
+
+    Los de tipo CHAR/VARCHAR se convierten a su juego de caracteres (el declarado o
+    `charset`, el de la base), para que EXPLAIN vea la misma conversión que el procedimiento.
+    """
+    variables = list(params)
+    for match in re.finditer(r"\bDECLARE\s+(\w+)\s+([A-Z]+(?:\(\d+\))?)", body, re.I):
+        variables.append((match.group(1), match.group(2).upper()))
+    for name, type_ in sorted(variables, key=lambda v: -len(v[0])):
+        literal = escape(sample_value(procedure, name, type_, sizes, scale))
+        char_type = CHAR_TYPE.match(type_)
+        if char_type:
+            literal = f"CAST({literal} AS CHAR({char_type.group(1)}) CHARACTER SET {char_type.group(2) or charset})"
+        statement = re.sub(rf"(?<![@\w]){re.escape(name)}\b", lambda _: literal, statement)
+    return re.sub(r"@last_insert_id\b", str(sizes["videos"]), statement)
+
+
+def table_aliases(statement: str):
+    """{alias: tabla} de las tablas referenciadas, ya que EXPLAIN muestra los alias."""
+    aliases = {}
+    for table, alias in TABLE_REFERENCE.findall(statement):
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def _tables(block):
+    """Tablas de un bloque en orden de join, sin entrar en subconsultas."""
+    for key in WRAPPER_KEYS:
+        if key in block:
+            yield from _tables(block[key])
+    if "table" in block:
+        yield block["table"]
+    for entry in block.get("nested_loop", []):
+        yield from _tables(entry)
+
+
+def _subqueries(node):
+    """Subconsultas de un bloque (o de sus tablas), con su query_block."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in SUBQUERY_KEYS:
+                for subquery in value:
+                    yield subquery
+            elif key == "materialized_from_subquery":
+                yield value
+            elif key != "query_block":
+                yield from _subqueries(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _subqueries(item)
+
+
+def summarize(block, executions=1.0, depth=0, out=None):
+    """Resume un query_block: accesos por tabla y filas examinadas estimadas."""
+    out = out if out is not None else {"tables": [], "examined": 0.0, "filesort": False, "temporary": False}
+    if "union_result" in block:
+        for spec in block["union_result"].get("query_specifications", []):
+            summarize(spec["query_block"], executions, depth, out)
+        return out
+
+    for key in WRAPPER_KEYS:
+        operation = block.get(key)
+        if isinstance(operation, dict):
+            out["filesort"] |= bool(operation.get("using_filesort"))
+            out["temporary"] |= bool(operation.get("using_temporary_table"))
+
+    prefix = 1.0
+    for table in _tables(block):
+        per_scan = float(table.get("rows_examined_per_scan", 0) or 0)
+        out["examined"] += executions * per_scan * prefix
+        prefix = float(table.get("rows_produced_per_join", prefix) or 0)
+        out["tables"].append({
+            "depth": depth,
+            "table": table.get("table_name"),
+            "access_type": table.get("access_type"),
+            "key": table.get("key"),
+            "rows": per_scan,
+        })
+
+    for subquery in _subqueries(block):
+        # Las subconsultas dependientes se evalúan una vez por fila del bloque exterior
+        runs = executions * max(prefix, 1.0) if subquery.get("dependent") else executions
+        summarize(subquery["query_block"], runs, depth + 1, out)
+    return out
+
+
+def check(procedure: str, summary: dict, max_rows: int, aliases: dict):
+    """Lista de problemas del plan según las reglas del procedimiento."""
+    problems = []
+    for table in summary["tables"]:
+        name = aliases.get(table["table"], table["table"])
+        if table["access_type"] in ("ALL", "index") and name in LARGE_TABLES and procedure not in FULL_SCAN_OK:
+            problems.append(f"recorrido completo ({table['access_type']}) de {name}")
+    required = REQUIRED_KEYS.get(procedure)
+    if required and not any(table["key"] == required for table in summary["tables"]):
+        problems.append(f"no usa el índice {required}")
+    if procedure in NO_FILESORT and summary["filesort"]:
+        problems.append("filesort en un feed ordenado")
+    if procedure not in UNBOUNDED and summary["examined"] > max_rows:
+        problems.append(f"filas examinadas estimadas {summary['examined']:.0f} > {max_rows}")
+    return problems
+
+
+def _magnitude(value: float) -> str:
+    return "0" if value < 1 else f"1e{int(math.floor(math.log10(value)))}"
+
+
+def render(summary: dict):
+    """Plan normalizado para la línea base (filas redondeadas a su orden de magnitud)."""
+    lines = []
+    for table in summary["tables"]:
+        lines.append(f"{'  ' * table['depth']}{table['table']}: {table['access_type']} "
+                     f"key={table['key']} rows~{_magnitude(table['rows'])}")
+    flags = [flag for flag in ("filesort", "temporary") if summary[flag]]
+    lines.append(f"examined~{_magnitude(summary['examined'])}{' ' + ' '.join(flags) if flags else ''}")
+    return lines
+
+
+def run(database: str, procedures_filter, max_rows: int, verbose: bool):
+    connection = datagen.connect(database)
+    try:
+        scale = datagen.read_scale(connection)
+        sizes = datagen.dimensions(scale)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT @@character_set_database AS charset")
+            charset = cursor.fetchone()["charset"]
+        procedures = parse_procedures()
+        wanted = sorted(used_procedures() & procedures.keys())
+        if procedures_filter:
+            wanted = [name for name in wanted if name in procedures_filter]
+
+        plans, failures = {}, {}
+        for name in wanted:
+            params, body = procedures[name]
+            for index, statement in enumerate(extract_statements(body), start=1):
+                key = f"{name}#{index}"
+                sql = bind(statement, name, params, body, sizes, scale, connection.escape, charset)
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"EXPLAIN FORMAT=JSON {sql}")
+                        plan = json.loads(next(iter(cursor.fetchone().values())))
+                except pymysql.MySQLError as e:
+                    plans[key] = [f"error: {e.args[-1]}"]
+                    failures[key] = [f"EXPLAIN falló: {e.args[-1]}"]
+                    continue
+                summary = summarize(plan["query_block"])
+                plans[key] = render(summary)
+                problems = check(name, summary, max_rows, table_aliases(sql))
+                if problems:
+                    failures[key] = problems
+                status = "FALLA" if problems else "ok"
+                print(f"{status:5} {key:40} examined~{summary['examined']:.0f}")
+                for problem in problems:
+                    print(f"      - {problem}")
+                if verbose and problems:
+                    print(f"      {sql}")
+                    print(json.dumps(plan, indent=2))
+        return scale, plans, failures
+    finally:
+        connection.close()
+
+
+def diff_baseline(baseline: dict, plans: dict):
+    """Diferencias entre la línea base y los planes actuales, en formato unified diff."""
+    def as_text(entries):
+        return [f"{key}\n" + "".join(f"  {line}\n" for line in entries[key]) for key in sorted(entries)]
+
+    keys = set(plans) if baseline.get("filtered") else set(plans) | set(baseline["plans"])
+    previous = {key: baseline["plans"][key] for key in keys if key in baseline["plans"]}
+    return list(difflib.unified_diff(
+        "".join(as_text(previous)).splitlines(keepends=True),
+        "".join(as_text(plans)).splitlines(keepends=True),
+        fromfile="línea base", tofile="actual"
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=f"{settings.DB_NAME}_plans")
+    parser.add_argument("--setup", action="store_true", help="Recrea y llena la base de pruebas")
+    parser.add_argument("--scale", type=int, default=100_000, help="Número de videos sintéticos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--procedure", action="append", help="Limitar a estos procedimientos")
+    parser.add_argument("--max-rows", type=int, default=5000,
+                        help="Máximo de filas examinadas estimadas por sentencia")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Muestra el plan completo de las sentencias con fallos")
+    args = parser.parse_args()
+
+    if args.setup:
+        datagen.create_database(args.database, args.scale, args.seed)
+
+    scale, plans, failures = run(args.database, args.procedure, args.max_rows, args.verbose)
+
+    if args.update_baseline:
+        baseline = {"scale": scale, "plans": plans}
+        if args.baseline.exists() and args.procedure:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+            baseline["plans"].update(plans)
+        args.baseline.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Línea base actualizada: {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline["filtered"] = bool(args.procedure)
+        if baseline["scale"] != scale:
+            print(f"Aviso: la línea base es de escala {baseline['scale']} y la base de pruebas de {scale}")
+        diff = diff_baseline(baseline, plans)
+        if diff:
+            print("\nCambios de plan respecto a la línea base:")
+            sys.stdout.writelines(diff)
+            failures.setdefault("línea base", ["los planes cambiaron"])
+    else:
+        print(f"Sin línea base en {args.baseline}; usa --update-baseline para crearla")
+
+    print(f"\n{len(plans)} sentencias, {len(failures)} con problemas")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark del precálculo de videos relacionados sobre un catálogo sintético.
+
+Uso:
+    python -m benchmarks.related_bench --videos 1000000 --tags 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.tag_similarity import build_tag_matrix, top_k_neighbours, vectorize
+
+
+def generate_catalog(n_videos: int, n_tags: int, n_creators: int, zipf_a: float, seed: int):
+    """Genera pares video-etiqueta con etiquetas de popularidad Zipf."""
+    rng = np.random.default_rng(seed)
+    tags_per_video = rng.integers(1, 9, size=n_videos)
+    video_rows = np.repeat(np.arange(n_videos), tags_per_video)
+    tag_cols = (rng.zipf(zipf_a, size=len(video_rows)) - 1) % n_tags
+    user_ids = rng.integers(0, n_creators, size=n_videos)
+    return video_rows, tag_cols, user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=1_000_000)
+    parser.add_argument("--tags", type=int, default=50_000)
+    parser.add_argument("--creators", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.3)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--max-df", type=float, default=0.01)
+    parser.add_argument("--min-df-abs", type=int, default=500)
+    parser.add_argument("--creator-boost", type=float, default=0.15)
+    parser.add_argument("--sample", type=int, default=0,
+                        help="Calcular solo N filas y extrapolar (0 = todas)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    video_rows, tag_cols, user_ids = generate_catalog(args.videos, args.tags, args.creators, args.zipf, args.seed)
+    print(f"catálogo: {args.videos} videos, {len(video_rows)} pares video-etiqueta "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    started = time.perf_counter()
+    matrix, idf = build_tag_matrix(video_rows, tag_cols, args.videos, args.tags, args.max_df, args.min_df_abs)
+    print(f"matriz: nnz={matrix.nnz}, etiquetas descartadas por max_df={int((idf == 0).sum())} "
+          f"({time.perf_counter() - started:.2f}s)")
+
+    matrix_t = matrix.T.tocsr()
+    total_rows = args.sample or args.videos
+    started = time.perf_counter()
+    for start in range(0, total_rows, args.batch_size):
+        rows = np.arange(start, min(start + args.batch_size, total_rows))
+        top_k_neighbours(matrix[rows], matrix_t, user_ids[rows], user_ids, args.k, args.creator_boost, query_rows=rows)
+    elapsed = time.perf_counter() - started
+    per_video_ms = elapsed / total_rows * 1000
+    print(f"vecinos: {total_rows} videos en {elapsed:.2f}s ({per_video_ms:.3f} ms/video)")
+    if args.sample:
+        print(f"estimado para {args.videos} videos: {per_video_ms * args.videos / 1000:.1f}s")
+
+    # Refresco incremental de un video editado
+    latencies = []
+    rng = np.random.default_rng(args.seed + 1)
+    for _ in range(200):
+        cols = rng.integers(0, args.tags, size=4)
+        started = time.perf_counter()
+        top_k_neighbours(vectorize(cols, idf), matrix_t, np.array([0]), user_ids, args.k, args.creator_boost)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"refresco incremental: p50={latencies[len(latencies) // 2]:.2f} ms "
+          f"p99={latencies[int(len(latencies) * 0.99)]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from app.config import settings
-from app.routes import videos, auth, albums, profile, admin, reports
+from app.database import RequestConnectionMiddleware, replica_router
+from app.routes import videos, auth, albums, profile, admin, reports, health, thumbnails
+from app.services import (related_service, view_counter_service, user_import_service, thumbnail_service,
+                          duplicate_service, suggest_service)
+from app.utils.task_queue import background_queue
+from app.utils.lifecycle import lifecycle
+from app.utils.memory_tracker import MemoryTrackingMiddleware, memory_tracker
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranca y detiene los trabajos en segundo plano de la aplicación."""
+    background_queue.start()
+    replica_router.start()
+    if settings.MEMORY_TRACKING_SAMPLE_RATE > 0:
+        memory_tracker.start(settings.MEMORY_TRACKING_SAMPLE_RATE)
+    suggest_service.start_background_refresh()
+    related_service.start_background_refresh()
+    duplicate_service.start_background_refresh()
+    view_counter_service.start_flusher()
+    lifecycle.mark_started()
+    yield
+    lifecycle.mark_draining()
+    # Volcar los contadores y drenar los trabajos pendientes antes de terminar
+    view_counter_service.stop_flusher()
+    background_queue.stop()
+    suggest_service.stop_background_refresh()
+    related_service.stop_background_refresh()
+    duplicate_service.stop_background_refresh()
+    user_import_service.shutdown_hash_pool()
+    thumbnail_service.shutdown_render_pool()
+    replica_router.stop()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -20,6 +52,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Una conexión por petición, compartida por dependencias y servicios
+app.add_middleware(RequestConnectionMiddleware)
+
+# Contabilidad de memoria por ruta (sin coste mientras está desactivada)
+app.add_middleware(MemoryTrackingMiddleware)
+
 # Incluir rutas de la API
 app.include_router(auth.router)
 app.include_router(videos.router)
@@ -27,6 +65,9 @@ app.include_router(albums.router)
 app.include_router(profile.router)
 app.include_router(admin.router)
 app.include_router(reports.router)
+app.include_router(health.router)
+app.include_router(thumbnails.router)
 
 if __name__ == "__main__":
+    # Solo para desarrollo (un proceso con recarga); en producción usar serve.py
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Lanzador de producción de la API (main.py con reload=True queda para desarrollo).
+
+Uso:
+    python serve.py                          # SERVER_WORKERS procesos (0 = uno por núcleo)
+    python serve.py --workers 8 --port 8000 --max-requests 10000
+
+Con gunicorn disponible (Linux) la aplicación se carga en el proceso maestro antes del
+fork (preload) y los workers se reciclan tras --max-requests peticiones con jitter. Sin
+gunicorn (p. ej. en Windows) se usa el gestor de procesos de uvicorn, que también
+reinicia los workers que terminan.
+
+Parada ordenada con SIGTERM: cada worker pone /health/ready en 503 durante
+--drain-seconds para que el balanceador deje de enviarle tráfico, deja de aceptar
+conexiones, termina las peticiones en curso (hasta --graceful-timeout) y ejecuta el
+cierre del lifespan, que vuelca los contadores y drena la cola de trabajos.
+"""
+import argparse
+import os
+import signal
+import threading
+import warnings
+
+import uvicorn
+
+from app.config import settings
+
+try:
+    from gunicorn.app.base import BaseApplication
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn no funciona en Windows
+    BaseApplication = UvicornWorker = None
+
+
+def event_loop() -> str:
+    try:
+        import uvloop  # noqa: F401
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+
+def http_implementation() -> str:
+    try:
+        import httptools  # noqa: F401
+        return "httptools"
+    except ImportError:
+        return "h11"
+
+
+class DrainingServer(uvicorn.Server):
+    """Servidor uvicorn que, con SIGTERM, deja de anunciarse como disponible antes de cerrar."""
+
+    drain_seconds = 0.0
+
+    def handle_exit(self, sig, frame):
+        from app.utils.lifecycle import lifecycle
+
+        # Ctrl+C, segunda señal o sin espera configurada: cierre normal de uvicorn
+        if sig == signal.SIGINT or self.should_exit or lifecycle.draining or self.drain_seconds <= 0:
+            super().handle_exit(sig, frame)
+            return
+        lifecycle.mark_draining()
+        timer = threading.Timer(self.drain_seconds, super().handle_exit, (sig, frame))
+        timer.daemon = True
+        timer.start()
+
+
+if UvicornWorker is not None:
+    class DrainingWorker(UvicornWorker):
+        """Worker de gunicorn que sirve la aplicación con DrainingServer."""
+
+        drain_seconds = 0.0
+
+        async def _serve(self):
+            self.config.app = self.wsgi
+            server = DrainingServer(config=self.config)
+            server.drain_seconds = self.drain_seconds
+            self._install_sigquit_handler()
+            await server.serve(sockets=self.sockets)
+            if not server.started:
+                from gunicorn.arbiter import Arbiter
+                raise SystemExit(Arbiter.WORKER_BOOT_ERROR)
+
+    class GunicornApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+
+def uvicorn_options(args) -> dict:
+    """Opciones de uvicorn comunes a los dos modos."""
+    return {
+        "loop": event_loop(),
+        "http": http_implementation(),
+        "timeout_keep_alive": args.keepalive,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "limit_concurrency": args.limit_concurrency or None,
+    }
+
+
+def run_gunicorn(args):
+    worker_class = type("DrainingWorker", (DrainingWorker,), {
+        "CONFIG_KWARGS": uvicorn_options(args),
+        "drain_seconds": args.drain_seconds,
+    })
+    GunicornApplication({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": worker_class,
+        "preload_app": True,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "keepalive": args.keepalive,
+        "backlog": args.backlog,
+        # El maestro mata a los workers que no terminan en este plazo: drenaje + peticiones
+        # en curso + cierre del lifespan (vaciado de la cola de trabajos)
+        "graceful_timeout": int(args.drain_seconds + args.graceful_timeout + settings.BACKGROUND_QUEUE_DRAIN_SECONDS) + 5,
+        "accesslog": "-",
+    }).run()
+
+
+def run_uvicorn(args):
+    from uvicorn.supervisors import Multiprocess
+
+    config = uvicorn.Config(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        backlog=args.backlog,
+        limit_max_requests=args.max_requests or None,
+        **uvicorn_options(args),
+    )
+    server = DrainingServer(config=config)
+    server.drain_seconds = args.drain_seconds
+    if args.workers > 1:
+        # Los workers se lanzan con spawn: el segmento de caché compartida se crea aquí y
+        # heredan su ruta por el entorno
+        import app.utils.shared_cache  # noqa: F401
+
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="0 = uno por núcleo")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "uvicorn"), default="auto")
+    parser.add_argument("--max-requests", type=int, default=settings.SERVER_MAX_REQUESTS,
+                        help="Reciclar cada worker tras N peticiones (0 = nunca)")
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVER_MAX_REQUESTS_JITTER,
+                        help="Variación aleatoria de --max-requests para no reciclar todos a la vez (solo gunicorn)")
+    parser.add_argument("--keepalive", type=int, default=settings.SERVER_KEEPALIVE_SECONDS)
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG)
+    parser.add_argument("--limit-concurrency", type=int, default=settings.SERVER_LIMIT_CONCURRENCY,
+                        help="Conexiones simultáneas por worker antes de responder 503 (0 = sin límite)")
+    parser.add_argument("--drain-seconds", type=float, default=settings.SERVER_DRAIN_SECONDS)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    args = parser.parse_args()
+    args.workers = args.workers or os.cpu_count() or 1
+
+    use_gunicorn = args.server == "gunicorn" or (args.server == "auto" and BaseApplication is not None)
+    if use_gunicorn and BaseApplication is None:
+        parser.error("gunicorn no está instalado")
+    print(f"Arrancando {args.workers} workers con {'gunicorn' if use_gunicorn else 'uvicorn'} "
+          f"(bucle {event_loop()}, http {http_implementation()})")
+    if use_gunicorn:
+        run_gunicorn(args)
+    else:
+        run_uvicorn(args)
+
+
+if __name__ == "__main__":
+    main()
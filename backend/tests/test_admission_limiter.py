@@ -0,0 +1,35 @@
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import AdmissionLimiter
+
+
+def test_sync_route_waits_for_a_slot_instead_of_rejecting():
+    limiter = AdmissionLimiter("test", initial=1, minimum=1, maximum=1, latency_threshold=10)
+    release = threading.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        with limiter.admit():
+            release.wait(timeout=5)
+        return "slow"
+
+    @app.get("/fast")
+    def fast():
+        with limiter.admit():
+            return "fast"
+
+    with TestClient(app) as client:
+        holder = threading.Thread(target=client.get, args=("/slow",))
+        holder.start()
+        while limiter.in_flight == 0:
+            pass
+        threading.Timer(0.1, release.set).start()
+        # El hueco está ocupado: la ruta síncrona espera en el threadpool y termina bien
+        assert client.get("/fast").json() == "fast"
+        holder.join()
+
+    assert limiter.get_metrics()["queued"] == 1
@@ -0,0 +1,35 @@
+import pytest
+
+from app.services import duplicate_service
+
+SPAM = "Gana dinero rápido desde casa con este truco secreto que los bancos no quieren que sepas"
+TUTORIAL = "Tutorial de guitarra para principiantes: acordes básicos, rasgueos y primera canción completa"
+
+
+@pytest.fixture(autouse=True)
+def empty_index():
+    for state in (duplicate_service._recent, duplicate_service._buckets, duplicate_service._stale,
+                  duplicate_service._cluster_of, duplicate_service._clusters):
+        state.clear()
+    yield
+
+
+def _index(video_id, title):
+    return duplicate_service.index_video(video_id, title, None)
+
+
+def test_new_cluster_does_not_reuse_live_cluster_id():
+    for video_id in (5, 7, 9):
+        _index(video_id, SPAM)
+    assert _index(8, TUTORIAL) is None
+    spam_cluster = duplicate_service.get_clusters([7])[7]
+
+    # El video 5 pasa a ser copia del 8: su antiguo grupo sigue con el 7 y el 9
+    tutorial_cluster = _index(5, TUTORIAL)
+
+    assert tutorial_cluster != spam_cluster
+    assert duplicate_service.get_clusters([5, 7, 8, 9]) == {
+        5: tutorial_cluster, 8: tutorial_cluster, 7: spam_cluster, 9: spam_cluster
+    }
+    duplicate_service.remove_video(7)
+    assert duplicate_service.get_clusters([5, 7, 8, 9]) == {5: tutorial_cluster, 8: tutorial_cluster}
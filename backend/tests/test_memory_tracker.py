@@ -0,0 +1,21 @@
+import tracemalloc
+
+from app.utils.memory_tracker import MemoryTracker
+
+
+def test_begin_after_tracing_stopped_keeps_sampling_available():
+    tracker = MemoryTracker()
+    tracker.start(1.0)
+    assert tracker.should_sample()
+    tracemalloc.stop()
+
+    assert tracker.begin() is None
+
+    tracker.start(1.0)
+    try:
+        token = tracker.begin()
+        assert token is not None
+        tracker.end("GET /videos", token)
+    finally:
+        tracker.stop()
+    assert tracker.get_metrics()["sampled_requests"] == 1
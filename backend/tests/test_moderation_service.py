@@ -0,0 +1,33 @@
+import pytest
+
+from app.services import moderation_service
+from app.utils.pagination import PageParams
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    orders = []
+
+    def fetch_page(columns, from_clause, conditions, args, order_by, params):
+        orders.append(order_by)
+        return []
+
+    monkeypatch.setattr(moderation_service, "fetch_page", fetch_page)
+    monkeypatch.setattr(moderation_service.count_cache, "count", lambda *args: (0, False))
+    return orders
+
+
+def _params():
+    return PageParams(page=1, page_size=50, sort=None, order="desc")
+
+
+def test_videos_default_to_most_reported_first(captured):
+    moderation_service.get_videos_page(_params())
+
+    assert captured == [f"{moderation_service._REPORT_COUNT} DESC, v.created_at DESC, v.id DESC"]
+
+
+def test_reports_default_to_pending_first(captured):
+    moderation_service.get_reports_page(_params())
+
+    assert captured == ["r.status = 'pendiente' DESC, r.created_at DESC, r.id DESC"]
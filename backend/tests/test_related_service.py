@@ -0,0 +1,21 @@
+from app.services import related_service
+
+
+def test_refresh_with_known_tags_patches_neighbours_without_rebuild(monkeypatch):
+    videos = [
+        {"id": 1, "user_id": 10, "tags": ["gatos", "humor"]},
+        {"id": 2, "user_id": 11, "tags": ["gatos", "humor"]},
+        {"id": 3, "user_id": 12, "tags": ["cocina"]},
+    ]
+    monkeypatch.setattr(related_service, "execute_procedure", lambda name, params=None: videos)
+    related_service.rebuild()
+    related_service._refresh_requested.clear()
+
+    related_service.refresh_video(4, 13, ["gatos", "humor"])
+
+    assert not related_service._refresh_requested.is_set()
+    assert {entry["id"] for entry in related_service._neighbours[4]} == {1, 2}
+    assert 4 in [entry["id"] for entry in related_service._neighbours[1]]
+
+    related_service.refresh_video(5, 13, ["gatos", "nueva"])
+    assert related_service._refresh_requested.is_set()
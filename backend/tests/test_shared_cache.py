@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from app.utils.shared_cache import SharedCache, fcntl
+
+
+@pytest.mark.skipif(fcntl is None or not hasattr(os, "fork"), reason="requiere fork y flock")
+def test_write_lock_excludes_forked_workers():
+    cache = SharedCache(slots=8, slot_bytes=1024)
+    try:
+        with cache._write_lock():
+            pid = os.fork()
+            if pid == 0:
+                # Worker: no debe poder tomar el lock mientras el maestro lo tiene
+                try:
+                    fcntl.flock(cache._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os._exit(0)
+                os._exit(1)
+            _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+    finally:
+        os.remove(cache.path)
@@ -0,0 +1,33 @@
+import time
+
+from app.services import suggest_service
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_index_reloads_when_shared_video_version_changes(monkeypatch):
+    videos = [{"id": 1, "user_id": 10, "title": "Gatos", "tags": ["gatos"], "creator_username": "ana"}]
+    version = [0]
+    monkeypatch.setattr(suggest_service, "execute_procedure", lambda name, params=None: list(videos))
+    monkeypatch.setattr(suggest_service.shared_cache, "version", lambda collection: version[0])
+    monkeypatch.setattr(suggest_service.settings, "SUGGEST_SYNC_SECONDS", 0.01)
+    monkeypatch.setattr(suggest_service, "_loaded", False)
+
+    def texts():
+        return {item["text"] for item in suggest_service.suggest("ga")}
+
+    suggest_service.start_background_refresh()
+    try:
+        assert _wait_for(lambda: texts() == {"gatos", "Gatos"})
+
+        # Otro worker crea un video e invalida la colección "video"
+        videos.append({"id": 2, "user_id": 11, "title": "Galletas", "tags": [], "creator_username": "luis"})
+        version[0] += 1
+        assert _wait_for(lambda: "Galletas" in texts())
+    finally:
+        suggest_service.stop_background_refresh()
@@ -0,0 +1,29 @@
+import numpy as np
+
+from app.utils.tag_similarity import build_tag_matrix, top_k_neighbours
+
+
+def test_small_catalog_keeps_shared_tags():
+    # 10 videos: los pares (0,1), (2,3)... comparten una etiqueta y todos comparten la 5
+    video_rows = np.array([row for row in range(10) for _ in range(2)], dtype=np.int64)
+    tag_cols = np.array([tag for row in range(10) for tag in (row // 2, 5)], dtype=np.int64)
+
+    matrix, idf = build_tag_matrix(video_rows, tag_cols, 10, 6)
+
+    assert (idf > 0).all()
+    neighbours = top_k_neighbours(
+        matrix, matrix.T.tocsr(), np.zeros(10, dtype=np.int64), np.zeros(10, dtype=np.int64), k=3,
+        query_rows=np.arange(10)
+    )
+    assert all(neighbours)
+    assert neighbours[0][0][0] == 1
+
+
+def test_max_df_applies_above_absolute_floor():
+    n_videos = 1000
+    video_rows = np.arange(n_videos, dtype=np.int64)
+    tag_cols = np.zeros(n_videos, dtype=np.int64)
+
+    _, idf = build_tag_matrix(video_rows, tag_cols, n_videos, 1, max_df=0.01, min_df_abs=500)
+
+    assert idf[0] == 0.0
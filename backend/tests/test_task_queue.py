@@ -0,0 +1,30 @@
+import threading
+import time
+
+from app.utils.task_queue import TaskQueue
+
+
+def test_same_key_jobs_never_overlap():
+    queue = TaskQueue(maxsize=10, workers=2, max_retries=0, backoff_seconds=0)
+    started = threading.Event()
+    release = threading.Event()
+    writes = []
+
+    def slow_write(value):
+        started.set()
+        release.wait(timeout=5)
+        writes.append(value)
+
+    queue.start()
+    try:
+        assert queue.enqueue(slow_write, "old", key=("last_login", 1))
+        assert started.wait(timeout=5)
+        assert queue.enqueue(writes.append, "new", key=("last_login", 1))
+        # El segundo trabajador no debe adelantarse al que sigue en curso
+        time.sleep(0.2)
+        assert writes == []
+        release.set()
+    finally:
+        queue.stop()
+
+    assert writes == ["old", "new"]
@@ -0,0 +1,14 @@
+from app.services import view_counter_service
+
+
+def test_flush_invalidates_cached_videos_only_when_rows_were_written(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(view_counter_service, "execute_procedure", lambda name, params=None: [])
+    monkeypatch.setattr(view_counter_service.shared_cache, "invalidate", lambda *names: invalidated.extend(names))
+
+    assert view_counter_service.flush() == 0
+    assert invalidated == []
+
+    view_counter_service.record(1, "view")
+    assert view_counter_service.flush() == 1
+    assert invalidated == ["video"]
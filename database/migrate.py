@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+Aplica las migraciones numeradas de database/migrations sobre la base de datos.
+
+Cada archivo NNNN_descripcion.sql se aplica una sola vez y queda registrado en la
+tabla schema_migrations. Las migraciones deben ser idempotentes (IF NOT EXISTS,
+sp_migration_add_index o sp_migration_add_column) porque MySQL confirma el DDL
+sentencia a sentencia y una migración interrumpida se vuelve a ejecutar completa.
+
+Uso (desde la raíz del repositorio):
+    python database/migrate.py             # aplica las pendientes
+    python database/migrate.py --status    # muestra aplicadas y pendientes
+    python database/migrate.py --target 1  # aplica hasta la versión indicada
+    python database/migrate.py --dry-run   # muestra las sentencias sin ejecutarlas
+
+La conexión usa la misma configuración que el backend (variables DB_* o backend/.env).
+"""
+import argparse
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+
+DATABASE_DIR = Path(__file__).resolve().parent
+MIGRATIONS_DIR = DATABASE_DIR / "migrations"
+sys.path.insert(0, str(DATABASE_DIR.parent / "backend"))
+
+import pymysql  # noqa: E402
+from pymysql.cursors import DictCursor  # noqa: E402
+from app.config import settings  # noqa: E402
+
+MIGRATION_FILE = re.compile(r"^(\d{4})_([\w-]+)\.sql$")
+LOCK_NAME = "stream_box_migrations"
+
+VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    duration_ms INT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Crea un índice solo si no existe: MySQL no admite CREATE INDEX IF NOT EXISTS
+_INDEX_HELPER = """
+CREATE PROCEDURE {name}(
+    IN p_table VARCHAR(64),
+    IN p_index VARCHAR(64),
+    IN p_columns VARCHAR(512)
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND INDEX_NAME = p_index
+    ) THEN
+        SET @migration_sql = CONCAT('CREATE {kind}INDEX `', p_index, '` ON `', p_table, '` (', p_columns, ')');
+        PREPARE migration_stmt FROM @migration_sql;
+        EXECUTE migration_stmt;
+        DEALLOCATE PREPARE migration_stmt;
+    END IF;
+END
+"""
+ADD_INDEX_HELPER = _INDEX_HELPER.format(name="sp_migration_add_index", kind="")
+ADD_UNIQUE_INDEX_HELPER = _INDEX_HELPER.format(name="sp_migration_add_unique_index", kind="UNIQUE ")
+
+# Añade una columna solo si no existe: MySQL no admite ADD COLUMN IF NOT EXISTS
+ADD_COLUMN_HELPER = """
+CREATE PROCEDURE sp_migration_add_column(
+    IN p_table VARCHAR(64),
+    IN p_column VARCHAR(64),
+    IN p_definition VARCHAR(512)
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = p_table AND COLUMN_NAME = p_column
+    ) THEN
+        SET @migration_sql = CONCAT('ALTER TABLE `', p_table, '` ADD COLUMN `', p_column, '` ', p_definition);
+        PREPARE migration_stmt FROM @migration_sql;
+        EXECUTE migration_stmt;
+        DEALLOCATE PREPARE migration_stmt;
+    END IF;
+END
+"""
+
+
+def discover_migrations():
+    """Lista (versión, nombre, ruta) de los archivos de migración ordenados por versión."""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise SystemExit(f"Nombre de migración inválido: {path.name} (se espera NNNN_descripcion.sql)")
+        migrations.append((int(match.group(1)), match.group(2), path))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise SystemExit("Hay migraciones con el mismo número de versión")
+    return migrations
+
+
+def split_statements(sql: str):
+    """Divide un script en sentencias respetando las directivas DELIMITER."""
+    statements, buffer, delimiter = [], [], ";"
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).rstrip()[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    if "\n".join(buffer).strip():
+        statements.append("\n".join(buffer).strip())
+    return statements
+
+
+def connect():
+    return pymysql.connect(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        db=settings.DB_NAME,
+        charset='utf8mb4',
+        cursorclass=DictCursor,
+        autocommit=True
+    )
+
+
+def prepare(cursor):
+    """Crea la tabla de versiones y los procedimientos auxiliares de índices y columnas."""
+    cursor.execute(VERSION_TABLE)
+    cursor.execute("DROP PROCEDURE IF EXISTS sp_migration_add_index")
+    cursor.execute(ADD_INDEX_HELPER)
+    cursor.execute("DROP PROCEDURE IF EXISTS sp_migration_add_unique_index")
+    cursor.execute(ADD_UNIQUE_INDEX_HELPER)
+    cursor.execute("DROP PROCEDURE IF EXISTS sp_migration_add_column")
+    cursor.execute(ADD_COLUMN_HELPER)
+
+
+def applied_migrations(cursor):
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row["version"]: row for row in cursor.fetchall()}
+
+
+def checksum(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def show_status(migrations, applied):
+    for version, name, path in migrations:
+        row = applied.get(version)
+        if row is None:
+            state = "pendiente"
+        elif row["checksum"] != checksum(path):
+            state = f"aplicada {row['applied_at']} (el archivo cambió desde entonces)"
+        else:
+            state = f"aplicada {row['applied_at']}"
+        print(f"{version:04d} {name}: {state}")
+
+
+def migrate(cursor, migrations, applied, target=None, dry_run=False):
+    """Aplica en orden las migraciones pendientes hasta `target` (incluida)."""
+    pending = [
+        migration for migration in migrations
+        if migration[0] not in applied and (target is None or migration[0] <= target)
+    ]
+    for version, name, path in migrations:
+        row = applied.get(version)
+        if row is not None and row["checksum"] != checksum(path):
+            print(f"Aviso: la migración {version:04d} {name} cambió después de aplicarse")
+
+    if not pending:
+        print("La base de datos está al día")
+        return 0
+
+    for version, name, path in pending:
+        statements = split_statements(path.read_text(encoding="utf-8"))
+        print(f"Aplicando {version:04d} {name} ({len(statements)} sentencias)...")
+        if dry_run:
+            for statement in statements:
+                print(f"  {statement};")
+            continue
+
+        started = time.perf_counter()
+        for statement in statements:
+            cursor.execute(statement)
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+            [version, name, checksum(path), duration_ms]
+        )
+        print(f"  {version:04d} aplicada en {duration_ms} ms")
+    return len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica las migraciones de esquema de Stream-Box")
+    parser.add_argument("--status", action="store_true", help="Muestra el estado de cada migración")
+    parser.add_argument("--target", type=int, help="Última versión a aplicar")
+    parser.add_argument("--dry-run", action="store_true", help="Muestra las sentencias sin ejecutarlas")
+    args = parser.parse_args(argv)
+
+    migrations = discover_migrations()
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            # Evitar que dos procesos apliquen migraciones a la vez
+            cursor.execute("SELECT GET_LOCK(%s, 60) AS locked", [LOCK_NAME])
+            if not cursor.fetchone()["locked"]:
+                raise SystemExit("Otra ejecución de migraciones tiene el bloqueo")
+            try:
+                prepare(cursor)
+                applied = applied_migrations(cursor)
+                if args.status:
+                    show_status(migrations, applied)
+                else:
+                    migrate(cursor, migrations, applied, args.target, args.dry_run)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", [LOCK_NAME])
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+-- Índices compuestos para los caminos de acceso de los procedimientos más usados.
+-- Cada índice se crea solo si no existe (sp_migration_add_index), así que la
+-- migración es idempotente también sobre bases creadas con la versión actual de
+-- 01-schemes.sql, que ya incluye algunos de ellos.
+
+-- Listados públicos: WHERE status = 'activo' ORDER BY created_at DESC
+CALL sp_migration_add_index('video', 'idx_video_status_created', 'status, created_at');
+
+-- sp_get_videos_by_type: WHERE status = 'activo' AND type = ? ORDER BY created_at DESC
+CALL sp_migration_add_index('video', 'idx_video_status_type_created', 'status, type, created_at');
+
+-- sp_get_videos_by_user / sp_get_user_videos_count: WHERE user_id = ? AND status = 'activo'
+CALL sp_migration_add_index('video', 'idx_video_user_status_created', 'user_id, status, created_at');
+
+-- Conteo de reportes pendientes por video: WHERE video_id = ? AND status = 'pendiente'
+CALL sp_migration_add_index('report', 'idx_report_video_status', 'video_id, status');
+
+-- Listado de administración y reportes de un usuario ordenados por fecha
+CALL sp_migration_add_index('report', 'idx_report_status_created', 'status, created_at');
+CALL sp_migration_add_index('report', 'idx_report_user_created', 'user_id, created_at');
+
+-- sp_get_videos_by_album_id: la clave primaria (album_id, video_id) ya cubre el join por
+-- album_id; este índice añade status para resolver el filtro sin leer la fila
+CALL sp_migration_add_index('album_video_map', 'idx_album_video_status', 'album_id, status, video_id');
+
+-- Búsqueda inversa de videos por etiqueta (la clave primaria empieza por video_id)
+CALL sp_migration_add_index('video_tag_map', 'idx_video_tag_map_tag', 'tag_id, video_id');
+
+-- sp_get_albums_by_user: WHERE user_id = ? AND status = 'activo'
+CALL sp_migration_add_index('album', 'idx_album_user_status', 'user_id, status');
+
+-- Listado de usuarios de administración filtrado por estado o rol
+CALL sp_migration_add_index('user', 'idx_user_status_created', 'status, created_at');
+CALL sp_migration_add_index('user', 'idx_user_role_created', 'role_id, created_at');
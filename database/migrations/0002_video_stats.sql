@@ -0,0 +1,10 @@
+-- Contadores agregados de vistas e impresiones (volcados por view_counter_service)
+-- para bases creadas antes de que 01-schemes.sql incluyera la tabla.
+CREATE TABLE IF NOT EXISTS video_stats (
+    video_id BIGINT UNSIGNED PRIMARY KEY,
+    views BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    impressions BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (video_id) REFERENCES video(id) ON DELETE CASCADE,
+    INDEX idx_video_stats_views (views)
+);
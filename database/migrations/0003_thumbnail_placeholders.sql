@@ -0,0 +1,5 @@
+-- Marcador de posición (LQIP) de las miniaturas derivadas por thumbnail_service, para
+-- bases creadas antes de que 01-schemes.sql incluyera las columnas. Las miniaturas
+-- guardadas como data URI se convierten después con POST /admin/thumbnails/backfill.
+CALL sp_migration_add_column('video', 'thumbnail_placeholder', 'VARCHAR(1024) NULL AFTER thumbnail');
+CALL sp_migration_add_column('album', 'thumbnail_placeholder', 'VARCHAR(1024) NULL AFTER thumbnail');
@@ -0,0 +1,6 @@
+-- ID canónico de YouTube de cada video (extraído del enlace por youtube_service) con un
+-- índice único: los duplicados se rechazan al insertar y /videos/by-youtube/{id} se
+-- resuelve con una lectura del índice. Las filas existentes quedan con NULL, que el
+-- índice admite repetido, hasta ejecutar POST /admin/videos/youtube-ids/backfill.
+CALL sp_migration_add_column('video', 'youtube_id', 'CHAR(11) CHARACTER SET ascii COLLATE ascii_bin NULL AFTER youtube_link');
+CALL sp_migration_add_unique_index('video', 'uq_video_youtube_id', 'youtube_id');
@@ -22,18 +22,24 @@ CREATE TABLE user (
     role_id INT REFERENCES role(id),
     status VARCHAR(20) DEFAULT 'activo', -- activo, suspendido
     last_login TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_user_status_created (status, created_at),
+    INDEX idx_user_role_created (role_id, created_at)
 );
 CREATE TABLE video (
     id SERIAL PRIMARY KEY,
     user_id INT REFERENCES user(id) ON DELETE CASCADE,
     title VARCHAR(200) NOT NULL,
     youtube_link TEXT NOT NULL,
+    youtube_id CHAR(11) CHARACTER SET ascii COLLATE ascii_bin, -- ID canónico del enlace (distingue mayúsculas); NULL al borrarlo su dueño
     description TEXT,
     type VARCHAR(20) CHECK (type IN ('en_vivo', 'grabado')) NOT NULL,
     status VARCHAR(20) DEFAULT 'activo', -- activo, suspendido
-    thumbnail TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    thumbnail TEXT, -- URL corta (/thumbnails/...) o enlace externo
+    thumbnail_placeholder VARCHAR(1024), -- data URI WebP diminuto (LQIP)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_video_status_created (status, created_at),
+    UNIQUE INDEX uq_video_youtube_id (youtube_id)
 );
 CREATE TABLE video_tag (
     id SERIAL PRIMARY KEY,
@@ -53,6 +59,7 @@ CREATE TABLE album (
     status VARCHAR(20) DEFAULT 'activo', -- activo, suspendido
     description TEXT,
     thumbnail TEXT,
+    thumbnail_placeholder VARCHAR(1024),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 CREATE TABLE album_video_map (
@@ -70,6 +77,15 @@ CREATE TABLE report (
     status VARCHAR(20) NOT NULL DEFAULT 'pendiente',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     resolved_at TIMESTAMP NULL,
+    INDEX idx_report_status_created (status, created_at),
     FOREIGN KEY (video_id) REFERENCES video(id),
     FOREIGN KEY (user_id) REFERENCES user(id)
-);
\ No newline at end of file
+);
+CREATE TABLE video_stats (
+    video_id BIGINT UNSIGNED PRIMARY KEY,
+    views BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    impressions BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (video_id) REFERENCES video(id) ON DELETE CASCADE,
+    INDEX idx_video_stats_views (views)
+);
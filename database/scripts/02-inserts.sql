@@ -14,13 +14,13 @@ VALUES
   ('consumer', 'consumer@stream-box.com', '$2b$12$GGEz9G0HtUXPTSsE.g2HSOZt7xgLH8WxEzQtHqKYtLO629jhkzpP6', 'Consumer_Name', 'Consumer', 2),
   ('testConsumer', 'testConsumer@stream-box.com', '$2b$12$GGEz9G0HtUXPTSsE.g2HSOZt7xgLH8WxEzQtHqKYtLO629jhkzpP6', 'Consumer_Name', 'Consumer', 2);
 
-INSERT INTO video(user_id, title, youtube_link, description, TYPE, thumbnail)
+INSERT INTO video(user_id, title, youtube_link, youtube_id, description, TYPE, thumbnail)
 VALUES
-  (1, 'Video 1', 'https://youtu.be/UNsHu05UVeY?si=SDcLfXVsYO0ZYyvp', 'Description 1', 'grabado', NULL),
-  (1, 'Video 2', 'https://youtu.be/ES60TsyqrAA?si=I7UsX8d5Z0jmviqk', 'Description 2', 'grabado', NULL),
-  (2, 'Video 3', 'https://www.youtube.com/watch?v=O8ldvZVZ_cw', 'Description 3', 'grabado', NULL),
-  (2, 'Video 4', 'https://www.youtube.com/watch?v=g3vbKsbx87I', 'Description 4', 'en_vivo', NULL),
-  (2, 'Video 5', 'https://www.youtube.com/watch?v=jkP1Sw7M2iU', 'Bitcoin', 'en_vivo', NULL);
+  (1, 'Video 1', 'https://youtu.be/UNsHu05UVeY?si=SDcLfXVsYO0ZYyvp', 'UNsHu05UVeY', 'Description 1', 'grabado', NULL),
+  (1, 'Video 2', 'https://youtu.be/ES60TsyqrAA?si=I7UsX8d5Z0jmviqk', 'ES60TsyqrAA', 'Description 2', 'grabado', NULL),
+  (2, 'Video 3', 'https://www.youtube.com/watch?v=O8ldvZVZ_cw', 'O8ldvZVZ_cw', 'Description 3', 'grabado', NULL),
+  (2, 'Video 4', 'https://www.youtube.com/watch?v=g3vbKsbx87I', 'g3vbKsbx87I', 'Description 4', 'en_vivo', NULL),
+  (2, 'Video 5', 'https://www.youtube.com/watch?v=jkP1Sw7M2iU', 'jkP1Sw7M2iU', 'Bitcoin', 'en_vivo', NULL);
 
 INSERT INTO video_tag (name)
 VALUES
@@ -229,10 +229,12 @@ CREATE PROCEDURE sp_create_video(
     IN p_user_id INT,
     IN p_title VARCHAR(200),
     IN p_youtube_link TEXT,
+    IN p_youtube_id CHAR(11) CHARACTER SET ascii,
     IN p_description TEXT,
     IN p_type VARCHAR(20),
     IN p_status VARCHAR(20),
     IN p_thumbnail TEXT,
+    IN p_thumbnail_placeholder VARCHAR(1024),
     IN p_tags JSON
 )
 BEGIN
@@ -241,8 +243,8 @@ BEGIN
     DECLARE tag_value VARCHAR(255);
     DECLARE tag_id INT;
     
-    INSERT INTO video (user_id, title, youtube_link, description, type, status, thumbnail)
-    VALUES (p_user_id, p_title, p_youtube_link, p_description, p_type, p_status, p_thumbnail);
+    INSERT INTO video (user_id, title, youtube_link, youtube_id, description, type, status, thumbnail, thumbnail_placeholder)
+    VALUES (p_user_id, p_title, p_youtube_link, p_youtube_id, p_description, p_type, p_status, p_thumbnail, p_thumbnail_placeholder);
 
     SET @last_insert_id = LAST_INSERT_ID();
     
@@ -280,6 +282,8 @@ BEGIN
         
         SET i = i + 1;
     END WHILE;
+
+    SELECT @last_insert_id AS id;
 END//
 
 DROP PROCEDURE IF EXISTS sp_get_video//
@@ -288,16 +292,29 @@ CREATE PROCEDURE sp_get_video(
     IN p_id INT
 )
 BEGIN
-    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, created_at
+    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, thumbnail_placeholder, created_at
     FROM video
     WHERE id = p_id;
 END//
 
+DROP PROCEDURE IF EXISTS sp_get_video_by_youtube_id//
+
+-- El parámetro usa el juego de caracteres de la columna: con el de la base (utf8mb4) MySQL
+-- convertiría la columna, no usaría el índice único y compararía sin distinguir mayúsculas
+CREATE PROCEDURE sp_get_video_by_youtube_id(
+    IN p_youtube_id CHAR(11) CHARACTER SET ascii
+)
+BEGIN
+    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, thumbnail_placeholder, created_at
+    FROM video
+    WHERE youtube_id = p_youtube_id;
+END//
+
 DROP PROCEDURE IF EXISTS sp_get_videos//
 
 CREATE PROCEDURE sp_get_videos()
 BEGIN
-    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.created_at,
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
@@ -313,7 +330,7 @@ CREATE PROCEDURE sp_get_videos_by_user(
     IN p_user_id INT
 )
 BEGIN
-    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.created_at,
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
@@ -329,7 +346,7 @@ CREATE PROCEDURE sp_get_videos_by_type(
     IN p_type VARCHAR(20)
 )
 BEGIN
-    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.created_at,
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
@@ -345,11 +362,11 @@ CREATE PROCEDURE sp_get_video_by_id(
     IN p_id INT
 )
 BEGIN
-    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, created_at, 
+    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, thumbnail_placeholder, created_at, 
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
-            WHERE vtm.video_id = id AND vt.status = 'activo') AS tags
+            WHERE vtm.video_id = video.id AND vt.status = 'activo') AS tags
     FROM video WHERE id = p_id AND status = 'activo';
 END//
 
@@ -359,11 +376,11 @@ CREATE PROCEDURE sp_get_video_by_user_id(
     IN p_user_id INT
 )
 BEGIN
-    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, created_at,
+    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, thumbnail_placeholder, created_at,
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
-            WHERE vtm.video_id = id AND vt.status = 'activo') AS tags
+            WHERE vtm.video_id = video.id AND vt.status = 'activo') AS tags
     FROM video WHERE user_id = p_user_id AND status = 'activo';
 END//
 
@@ -373,11 +390,13 @@ CREATE PROCEDURE sp_update_video(
     IN p_id INT,
     IN p_title VARCHAR(200),
     IN p_youtube_link TEXT,
+    IN p_youtube_id CHAR(11) CHARACTER SET ascii,
     IN p_description TEXT,
     IN p_type VARCHAR(20),
     IN p_status VARCHAR(20),
     IN p_tags JSON,
-    IN p_thumbnail TEXT
+    IN p_thumbnail TEXT,
+    IN p_thumbnail_placeholder VARCHAR(1024)
 )
 sp_update_video:BEGIN
     DECLARE i INT DEFAULT 0;
@@ -388,10 +407,12 @@ sp_update_video:BEGIN
     UPDATE video
     SET title = p_title,
         youtube_link = p_youtube_link,
+        youtube_id = COALESCE(p_youtube_id, youtube_id), -- NULL = enlace sin cambios
         description = p_description,
         type = p_type,
         status = 'activo',
-        thumbnail = p_thumbnail
+        thumbnail = p_thumbnail,
+        thumbnail_placeholder = p_thumbnail_placeholder
     WHERE id = p_id;
 
     -- Eliminar las asociaciones de etiquetas existentes
@@ -445,7 +466,9 @@ CREATE PROCEDURE sp_delete_video(
     IN p_id INT
 )
 BEGIN
-    UPDATE video SET status = 'suspendido' WHERE id = p_id;
+    -- Se libera el ID de YouTube para que pueda volver a registrarse; las suspensiones de
+    -- moderación (sp_delete_video_by_admin) lo conservan y siguen bloqueando la resubida
+    UPDATE video SET status = 'suspendido', youtube_id = NULL WHERE id = p_id;
 END//
 
 DROP PROCEDURE IF EXISTS sp_get_video_tags//
@@ -476,7 +499,7 @@ END//
 DROP PROCEDURE IF EXISTS sp_get_albums//
 CREATE PROCEDURE sp_get_albums()
 BEGIN
-    SELECT id, user_id, title, description, thumbnail, created_at FROM album WHERE status = 'activo';
+    SELECT id, user_id, title, description, thumbnail, thumbnail_placeholder, created_at FROM album WHERE status = 'activo';
 END//
 
 DROP PROCEDURE IF EXISTS sp_get_album_by_id//
@@ -484,7 +507,7 @@ CREATE PROCEDURE sp_get_album_by_id(
     IN p_id INT
 )
 BEGIN
-    SELECT id, user_id, title, description, thumbnail, created_at FROM album WHERE id = p_id AND status = 'activo';
+    SELECT id, user_id, title, description, thumbnail, thumbnail_placeholder, created_at FROM album WHERE id = p_id AND status = 'activo';
 END//
 
 DROP PROCEDURE IF EXISTS sp_get_album_by_user_id//
@@ -492,7 +515,7 @@ CREATE PROCEDURE sp_get_album_by_user_id(
     IN p_user_id INT
 )
 BEGIN
-    SELECT a.id, a.user_id, a.title, a.description, a.thumbnail, a.created_at,
+    SELECT a.id, a.user_id, a.title, a.description, a.thumbnail, a.thumbnail_placeholder, a.created_at,
            IFNULL((SELECT COUNT(*) FROM album_video_map avm 
             JOIN video v ON avm.video_id = v.id 
             WHERE avm.album_id = a.id AND v.status = 'activo'), 0) as video_count
@@ -505,13 +528,15 @@ CREATE PROCEDURE sp_update_album(
     IN p_id INT,
     IN p_title VARCHAR(100),
     IN p_description TEXT,
-    IN p_thumbnail TEXT
+    IN p_thumbnail TEXT,
+    IN p_thumbnail_placeholder VARCHAR(1024)
 )
 BEGIN
     UPDATE album
     SET title = p_title,
         description = p_description,
-        thumbnail = p_thumbnail
+        thumbnail = p_thumbnail,
+        thumbnail_placeholder = p_thumbnail_placeholder
     WHERE id = p_id;
 END//
 
@@ -537,7 +562,7 @@ CREATE PROCEDURE sp_get_videos_by_album_id(
     IN p_album_id INT
 )
 BEGIN
-    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, created_at
+    SELECT id, user_id, title, youtube_link, description, type, status, thumbnail, thumbnail_placeholder, created_at
     FROM video
     WHERE id IN (
         SELECT video_id
@@ -568,6 +593,7 @@ BEGIN
         v.type, 
         v.status, 
         v.thumbnail, 
+        v.thumbnail_placeholder, 
         v.created_at,
         COALESCE(u.username, 'Usuario eliminado') as creator_username,
         (SELECT COUNT(*) FROM report r WHERE r.video_id = v.id AND r.status = 'pendiente') as report_count
@@ -583,7 +609,7 @@ CREATE PROCEDURE sp_search_videos(
     IN p_search_term VARCHAR(255)
 )
 BEGIN
-    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.created_at,
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
            (SELECT JSON_ARRAYAGG(vt.name)
             FROM video_tag_map vtm
             JOIN video_tag vt ON vtm.tag_id = vt.id
@@ -604,6 +630,73 @@ BEGIN
     ORDER BY v.created_at DESC;
 END//
 
+-- Procedimiento para cargar los índices en memoria (sugerencias, recomendaciones)
+DROP PROCEDURE IF EXISTS sp_get_video_index_data//
+CREATE PROCEDURE sp_get_video_index_data()
+BEGIN
+    SELECT v.id, v.user_id, v.title, v.description, u.username AS creator_username,
+           (SELECT JSON_ARRAYAGG(vt.name)
+            FROM video_tag_map vtm
+            JOIN video_tag vt ON vtm.tag_id = vt.id
+            WHERE vtm.video_id = v.id AND vt.status = 'activo') AS tags
+    FROM video v
+    LEFT JOIN user u ON v.user_id = u.id
+    WHERE v.status = 'activo';
+END//
+
+-- Procedimiento para obtener varios videos activos por sus IDs
+DROP PROCEDURE IF EXISTS sp_get_videos_by_ids//
+CREATE PROCEDURE sp_get_videos_by_ids(
+    IN p_ids JSON
+)
+BEGIN
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
+           (SELECT JSON_ARRAYAGG(vt.name)
+            FROM video_tag_map vtm
+            JOIN video_tag vt ON vtm.tag_id = vt.id
+            WHERE vtm.video_id = v.id AND vt.status = 'activo') AS tags
+    FROM JSON_TABLE(p_ids, '$[*]' COLUMNS (id INT PATH '$')) ids
+    JOIN video v ON v.id = ids.id
+    WHERE v.status = 'activo';
+END//
+
+-- Procedimiento para sumar vistas e impresiones acumuladas en memoria (upsert por lotes)
+-- p_stats: [[video_id, vistas, impresiones], ...]
+DROP PROCEDURE IF EXISTS sp_add_video_stats//
+CREATE PROCEDURE sp_add_video_stats(
+    IN p_stats JSON
+)
+BEGIN
+    INSERT INTO video_stats (video_id, views, impressions)
+    SELECT v.id, s.views, s.impressions
+    FROM JSON_TABLE(p_stats, '$[*]' COLUMNS (
+        video_id BIGINT PATH '$[0]',
+        views BIGINT PATH '$[1]',
+        impressions BIGINT PATH '$[2]'
+    )) s
+    JOIN video v ON v.id = s.video_id
+    ON DUPLICATE KEY UPDATE
+        views = video_stats.views + VALUES(views),
+        impressions = video_stats.impressions + VALUES(impressions);
+END//
+
+-- Procedimiento para obtener los videos activos ordenados por vistas
+DROP PROCEDURE IF EXISTS sp_get_videos_popular//
+CREATE PROCEDURE sp_get_videos_popular()
+BEGIN
+    SELECT v.id, v.user_id, v.title, v.youtube_link, v.description, v.type, v.status, v.thumbnail, v.thumbnail_placeholder, v.created_at,
+           (SELECT JSON_ARRAYAGG(vt.name)
+            FROM video_tag_map vtm
+            JOIN video_tag vt ON vtm.tag_id = vt.id
+            WHERE vtm.video_id = v.id AND vt.status = 'activo') AS tags,
+           IFNULL(vs.views, 0) AS views,
+           IFNULL(vs.impressions, 0) AS impressions
+    FROM video v
+    LEFT JOIN video_stats vs ON vs.video_id = v.id
+    WHERE v.status = 'activo'
+    ORDER BY views DESC, v.created_at DESC;
+END//
+
 -- Procedimiento para eliminar un video por incumplimiento
 DROP PROCEDURE IF EXISTS sp_delete_video_by_admin//
 CREATE PROCEDURE sp_delete_video_by_admin(
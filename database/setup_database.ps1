@@ -54,4 +54,13 @@ if ($LASTEXITCODE -eq 0) {
 # Clean up
 Remove-Item -Path $tempFile -Force
 
+# Apply versioned migrations on top of the base scripts
+Write-Host "Applying schema migrations..." -ForegroundColor Cyan
+python (Join-Path $PSScriptRoot "migrate.py")
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Error applying migrations!" -ForegroundColor Red
+    exit 1
+}
+
 Write-Host "Database setup completed successfully!" -ForegroundColor Green
@@ -1,5 +1,5 @@
 import { useAuth } from '../hooks/useAuthHook';
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { toast } from 'sonner';
 
@@ -44,6 +44,43 @@ interface Video {
   user_id: number;
 }
 
+interface Page<T> {
+  items: T[];
+  total: number;
+  total_is_estimate: boolean;
+  page: number;
+  page_size: number;
+}
+
+type AdminTab = 'users' | 'videos' | 'reports';
+
+const PAGE_SIZE = 50;
+
+function Pagination({ page, total, onChange }: { page: number; total: number; onChange: (page: number) => void }) {
+  const lastPage = Math.max(1, Math.ceil(total / PAGE_SIZE));
+  return (
+    <div className="flex justify-between items-center mt-4 text-sm text-gray-600">
+      <span>Página {page} de {lastPage} ({total} en total)</span>
+      <div className="space-x-2">
+        <button
+          onClick={() => onChange(page - 1)}
+          disabled={page <= 1}
+          className="px-3 py-1 border rounded disabled:opacity-50"
+        >
+          Anterior
+        </button>
+        <button
+          onClick={() => onChange(page + 1)}
+          disabled={page >= lastPage}
+          className="px-3 py-1 border rounded disabled:opacity-50"
+        >
+          Siguiente
+        </button>
+      </div>
+    </div>
+  );
+}
+
 interface Report {
   id: number;
   video_id: number;
@@ -66,22 +103,63 @@ export default function Admin() {
     videos: false,
     reports: false
   });
-  const [activeTab, setActiveTab] = useState('users');
+  const [activeTab, setActiveTab] = useState<AdminTab>('users');
+  const [pages, setPages] = useState({ users: 1, videos: 1, reports: 1 });
+  const [totals, setTotals] = useState({ users: 0, videos: 0, reports: 0 });
+  const [pendingReports, setPendingReports] = useState(0);
+  // Página cargada de cada pestaña (0 = ninguna), para no repetir peticiones al cambiar de pestaña
+  const loadedPages = useRef({ users: 0, videos: 0, reports: 0 });
+  const overviewRequested = useRef(false);
 
+  // La primera carga trae usuarios y videos en una sola petición; después solo
+  // se pide la pestaña visible cuando cambia su página
   useEffect(() => {
     if (user?.role !== 'admin') return;
-    
-    fetchUsers();
-    fetchVideos();
-    fetchReports();
-  }, [user]);
+
+    if (!overviewRequested.current) {
+      overviewRequested.current = true;
+      fetchOverview();
+      return;
+    }
+    if (loadedPages.current[activeTab] === pages[activeTab]) return;
+    if (activeTab === 'users') fetchUsers();
+    else if (activeTab === 'videos') fetchVideos();
+    else fetchReports();
+  }, [user, activeTab, pages]);
+
+  const fetchOverview = async () => {
+    try {
+      setLoading({ users: true, videos: true, reports: false });
+      const response = await api.get('/admin/overview', { params: { page_size: PAGE_SIZE } });
+      if (response.data && response.data.data) {
+        const overview: { users: Page<User>; videos: Page<Video>; reports: Page<Report> } = response.data.data;
+        setUsers(overview.users.items);
+        setVideos(overview.videos.items);
+        setTotals(prev => ({ ...prev, users: overview.users.total, videos: overview.videos.total }));
+        setPendingReports(overview.reports.total);
+        loadedPages.current = { ...loadedPages.current, users: 1, videos: 1 };
+      }
+    } catch (error) {
+      console.error('Error fetching overview:', error);
+      toast.error('Error al cargar el panel');
+    } finally {
+      setLoading({ users: false, videos: false, reports: false });
+    }
+  };
+
+  const changePage = (tab: AdminTab, page: number) => {
+    setPages(prev => ({ ...prev, [tab]: page }));
+  };
 
   const fetchUsers = async () => {
     try {
       setLoading(prev => ({ ...prev, users: true }));
-      const response = await api.get('/admin/users');
+      const response = await api.get('/admin/users', { params: { page: pages.users, page_size: PAGE_SIZE } });
+      loadedPages.current = { ...loadedPages.current, users: pages.users };
       if (response.data && response.data.data) {
-        setUsers(response.data.data);
+        const page: Page<User> = response.data.data;
+        setUsers(page.items);
+        setTotals(prev => ({ ...prev, users: page.total }));
       }
     } catch (error) {
       console.error('Error fetching users:', error);
@@ -94,9 +172,12 @@ export default function Admin() {
   const fetchVideos = async () => {
     try {
       setLoading(prev => ({ ...prev, videos: true }));
-      const response = await api.get('/admin/videos');
+      const response = await api.get('/admin/videos', { params: { page: pages.videos, page_size: PAGE_SIZE } });
+      loadedPages.current = { ...loadedPages.current, videos: pages.videos };
       if (response.data && response.data.data) {
-        setVideos(response.data.data);
+        const page: Page<Video> = response.data.data;
+        setVideos(page.items);
+        setTotals(prev => ({ ...prev, videos: page.total }));
       }
     } catch (error) {
       console.error('Error fetching videos:', error);
@@ -109,9 +190,12 @@ export default function Admin() {
   const fetchReports = async () => {
     try {
       setLoading(prev => ({ ...prev, reports: true }));
-      const response = await api.get('/admin/reports');
+      const response = await api.get('/admin/reports', { params: { page: pages.reports, page_size: PAGE_SIZE } });
+      loadedPages.current = { ...loadedPages.current, reports: pages.reports };
       if (response.data && response.data.data) {
-        setReports(response.data.data);
+        const page: Page<Report> = response.data.data;
+        setReports(page.items);
+        setTotals(prev => ({ ...prev, reports: page.total }));
       }
     } catch (error) {
       console.error('Error fetching reports:', error);
@@ -175,8 +259,9 @@ export default function Admin() {
     try {
       await api.delete(`/admin/videos/${videoId}`);
       toast.success('Video eliminado correctamente');
-      fetchVideos();
-      fetchReports(); // Actualizar reportes ya que pueden cambiar al eliminar un video
+      // Actualizar la pestaña visible (los reportes del video también se resuelven)
+      if (activeTab === 'reports') fetchReports();
+      else fetchVideos();
     } catch (error) {
       console.error('Error deleting video:', error);
       toast.error('Error al eliminar video');
@@ -187,6 +272,7 @@ export default function Admin() {
     try {
       await api.put(`/admin/reports/${reportId}/resolve`);
       toast.success('Reporte resuelto correctamente');
+      setPendingReports(prev => Math.max(0, prev - 1));
       fetchReports();
     } catch (error) {
       console.error('Error resolving report:', error);
@@ -226,7 +312,7 @@ export default function Admin() {
             onClick={() => setActiveTab('reports')}
             className={`py-4 px-1 border-b-2 font-medium text-sm ${activeTab === 'reports' ? 'border-white-500 text-white-600' : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'}`}
           >
-            Reportes de Abuso
+            Reportes de Abuso{pendingReports > 0 && ` (${pendingReports} pendientes)`}
           </button>
         </nav>
       </div>
@@ -318,6 +404,7 @@ export default function Admin() {
               </table>
             </div>
           )}
+          <Pagination page={pages.users} total={totals.users} onChange={(page) => changePage('users', page)} />
         </div>
       )}
 
@@ -388,6 +475,7 @@ export default function Admin() {
               </table>
             </div>
           )}
+          <Pagination page={pages.videos} total={totals.videos} onChange={(page) => changePage('videos', page)} />
         </div>
       )}
 
@@ -445,6 +533,7 @@ export default function Admin() {
               )}
             </div>
           )}
+          <Pagination page={pages.reports} total={totals.reports} onChange={(page) => changePage('reports', page)} />
         </div>
       )}
     </div>